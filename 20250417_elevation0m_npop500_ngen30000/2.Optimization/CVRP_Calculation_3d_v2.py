@@ -12,7 +12,7 @@ class CVRP_Calculation_3d:
         CVRP計算クラスの初期化。
         :param nodes: ノード情報（辞書リスト）
         :param vehicles: 車両情報（辞書リスト）
-        :param cost_matrix: 移動コスト行列（numpy.array）
+        :param cost_matrix: 移動コスト行列（numpy.array, 行=起点, 列=終点。一方通行を反映した非対称の行列でもよい）
         :param population_size: 集団サイズ
         :param crossover_rate: 交叉率
         :param mutation_rate: 突然変異率
@@ -48,6 +48,9 @@ class CVRP_Calculation_3d:
         self.waiting_times = {client: 0 for client in self.V}  # 要支援者IDごとの待ち時間
         self.transport_times = {client: 0 for client in self.V}  # 要支援者IDごとの搬送時間
 
+        # 拠点間のルート（CVRP_RouteStore.RouteStore）。設定すると visualize_routes でルートを道路に沿って描く
+        self.route_store = None
+
     def evaluate_individual(self, individual):
         """
         目的関数: 移動コスト + 搬送回数ペナルティ（theta × y_m）
@@ -551,7 +554,7 @@ class CVRP_Calculation_3d:
 
         self.plot_results(results, output_csv.replace('.csv', '.png'))
         self.calculate_times(best_overall_individual)
-        self.plot_histograms()
+        self.plot_histograms(os.path.dirname(output_csv))
 
         return best_overall_individual, best_overall_fitness
 
@@ -718,6 +721,21 @@ class CVRP_Calculation_3d:
         plt.close()
         print(f"グラフを保存しました: {output_image}")
 
+    def route_leg_points(self, node_id, next_node_id, node_positions):
+        """
+        2つのノード間の区間を描く座標列を返す。
+        route_store があれば道路上の最短経路をたどり、無い場合（またはルートが無い・拠点が含まれない区間）は直線で結ぶ。
+        :param node_positions: ノードID → (x, y)（経度, 緯度）
+        :return: (x, y) のリスト（2点以上）
+        """
+        start, end = node_positions[node_id], node_positions[next_node_id]
+        if self.route_store is None or not (self.route_store.has_node(node_id) and self.route_store.has_node(next_node_id)):
+            return [start, end]
+        path = self.route_store.path_coords(node_id, next_node_id)
+        if not path:
+            return [start, end]
+        return [start] + [(lon, lat) for lat, lon in path[1:-1]] + [end]
+
     def visualize_routes(self, best_individual, nodes, output_dir='./result/'):
         """
         車両ごとの搬送ルートを可視化し、画像として保存。
@@ -765,7 +783,11 @@ class CVRP_Calculation_3d:
                 node = next(n for n in nodes if n["id"] == node_id)
                 plot_node(node, x, y)
 
-                # 矢印でルートを表示
+                # 道路に沿った線と、区間の最後に矢印でルートを表示
+                points = self.route_leg_points(node_id, next_node_id, node_positions)
+                if len(points) > 2:
+                    plt.plot(*zip(*points[:-1]), color="black", alpha=0.7, linewidth=1)
+                (x, y), (next_x, next_y) = points[-2], points[-1]
                 plt.arrow(x, y, next_x - x, next_y - y, color="black", **arrow_params)
 
             # 最後のノードをプロット
@@ -796,8 +818,12 @@ class CVRP_Calculation_3d:
                 x, y = node_positions[node_id]
                 next_x, next_y = node_positions[next_node_id]
                 
-                # 矢印でルートを表示
+                # 道路に沿った線と、区間の最後に矢印でルートを表示
                 arrow_params["color"] = vehicle_color  # 矢印の色を更新
+                points = self.route_leg_points(node_id, next_node_id, node_positions)
+                if len(points) > 2:
+                    plt.plot(*zip(*points[:-1]), color=vehicle_color, alpha=0.7, linewidth=1)
+                (x, y), (next_x, next_y) = points[-2], points[-1]
                 plt.arrow(x, y, next_x - x, next_y - y, **arrow_params)
 
             # ノードのプロット
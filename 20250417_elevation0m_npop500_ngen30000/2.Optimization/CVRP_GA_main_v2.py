@@ -2,6 +2,12 @@ from CVRP_Calculation_3d_v2 import CVRP_Calculation_3d
 import time
 import pandas as pd
 import numpy as np
+import sys
+import os
+
+sys.path.append("../..")
+from cvrp.CVRP_BinaryStore import load_travel_time_matrix
+from cvrp.CVRP_RouteStore import RouteStore
 
 # 時間計測開始
 start_time = time.time()
@@ -33,8 +39,12 @@ try:
 except FileNotFoundError:
     print(f"ファイル '{omaezaki_nodes_csv}' が見つかりませんでした。パスを確認してください。")
 
-# 対称行列（移動時間行列）の読み込み
-symmetric_matrix = pd.read_csv("../1.Geography/omaezaki_symmetric_travel_time_matrix.csv", index_col=0).values
+# 移動時間行列の読み込み（有向: 行=起点, 列=終点。バイナリ形式, 無い場合は同名のCSVを読み込む）
+# 有向行列が無い場合は従来の対称行列を読み込む
+matrix_bin = "../1.Geography/omaezaki_directed_travel_time_matrix.bin"
+if not os.path.exists(matrix_bin) and not os.path.exists(matrix_bin.replace(".bin", ".csv")):
+    matrix_bin = "../1.Geography/omaezaki_symmetric_travel_time_matrix.bin"
+travel_time_matrix, _ = load_travel_time_matrix(matrix_bin, dtype=np.float64)
 
 # 車両情報の読み込み
 vehicles = pd.read_csv("../1.Geography/omaezaki_vehicle_info.csv").to_dict(orient="records")
@@ -44,7 +54,7 @@ vehicles = pd.read_csv("../1.Geography/omaezaki_vehicle_info.csv").to_dict(orien
 calculation = CVRP_Calculation_3d(
     nodes=nodes,
     vehicles=vehicles,
-    cost_matrix=symmetric_matrix,
+    cost_matrix=travel_time_matrix,
     population_size=population_size,
     crossover_rate=crossover_rate,
     mutation_rate=mutation_rate,
@@ -53,6 +63,11 @@ calculation = CVRP_Calculation_3d(
     theta= theta
 )
 
+# 拠点間のルート（CVRP_Geography_v7 の calculate_travel_times で output_routes を指定して作成）があれば、ルートを道路に沿って描く
+routes_bin = "../1.Geography/omaezaki_routes.bin"
+if os.path.exists(routes_bin):
+    calculation.route_store = RouteStore(routes_bin)
+
 # 初期集団を生成
 population = calculation.generate_initial_population(population_size)
 # 遺伝アルゴリズムの実行
@@ -0,0 +1,326 @@
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import osmnx as ox
+import pandas as pd
+
+# 共通の処理は cvrp パッケージ、入力データ（地区ポリゴン・拠点・車両・DEM）は標高0mのシナリオのものを使う
+ROOT = os.path.dirname(os.path.abspath(__file__))
+GEOGRAPHY_DIR = os.path.join(ROOT, "20250511_elevation0m_gurubi_client12m", "1.Geography")
+GA_DIR = os.path.join(ROOT, "20250417_elevation0m_npop500_ngen30000", "2.Optimization")
+sys.path[:0] = [ROOT, GA_DIR]
+
+from cvrp.CVRP_Geography_v7 import CVRP_Geography
+from cvrp.CVRP_Pipeline import Pipeline
+from cvrp.CVRP_GraphStore import load_graph
+from cvrp.CVRP_BinaryStore import load_travel_time_matrix
+from cvrp.CVRP_RouteStore import RouteStore
+
+# シナリオの既定値（シナリオごとに上書きできる）
+DEFAULT_SCENARIO = {
+    "nrate": 0.5,
+    "nodes_csv": os.path.join(GEOGRAPHY_DIR, "omaezaki_nodes.csv"),
+    "vehicles_csv": os.path.join(GEOGRAPHY_DIR, "omaezaki_vehicle_info.csv"),
+    "solver": "gurobi",
+    "penalty": 100000,
+    "highway_speeds": None,
+}
+
+# Gurobi の既定値（cvrp/CVRP_gurobi_3d_v2.py の main と同じ。シナリオの "gurobi" で上書きする）
+GUROBI_DEFAULTS = {
+    "theta": 0,
+}
+
+# 遺伝アルゴリズムの既定値（CVRP_GA_main_v2.py と同じ。シナリオの "ga" で上書きする）
+GA_DEFAULTS = {
+    "population_size": 500,
+    "crossover_rate": 0.8,
+    "mutation_rate": 0.1,
+    "generations": 30000,
+    "penalty": 1000,
+    "theta": 10,
+}
+
+SOLVER_DEFAULTS = {"gurobi": GUROBI_DEFAULTS, "ga": GA_DEFAULTS}
+
+
+def paper_scenarios(solver="gurobi"):
+    """
+    論文の10シナリオ（20250511_elevationXXm_gurubi_client12m と同じ条件）
+    標高7〜11mは到達可能な要支援者（omaezaki_nodes_class0.csv）のみを対象とする
+    """
+    scenarios = []
+    for elev in (0, 3, 5, 6, 7, 8, 9, 10, 11, 12):
+        nodes_csv = "omaezaki_nodes_class0.csv" if 7 <= elev <= 11 else "omaezaki_nodes.csv"
+        scenarios.append({
+            "name": f"elevation{elev}m_{solver}",
+            "elev": elev,
+            "nodes_csv": os.path.join(ROOT, f"20250511_elevation{elev}m_gurubi_client12m", "1.Geography", nodes_csv),
+            "solver": solver,
+        })
+    return scenarios
+
+
+def load_scenarios(json_file):
+    """
+    シナリオの一覧をJSONから読み込む（相対パスはJSONファイルの場所から解決する）
+    例: [{"name": "elev6m_ga", "elev": 6, "nrate": 0.5, "solver": "ga", "ga": {"generations": 5000}}]
+    """
+    with open(json_file, encoding="utf-8") as f:
+        scenarios = json.load(f)
+    base_dir = os.path.dirname(os.path.abspath(json_file))
+    for scenario in scenarios:
+        for key in ("nodes_csv", "vehicles_csv"):
+            if key in scenario:
+                scenario[key] = os.path.join(base_dir, scenario[key])
+    return scenarios
+
+
+def _prepare_travel_times(task):
+    """
+    1つのネットワーク × 要支援者集合について、スナップ・移動時間行列・ルートを作成する（ワーカープロセスで実行）
+    結果は task["output_dir"] に保存し、入力と条件が前回と同じ場合は CVRP_Pipeline により省略される
+    """
+    output_dir = task["output_dir"]
+    os.makedirs(output_dir, exist_ok=True)
+    geo = CVRP_Geography(os.path.join(GEOGRAPHY_DIR, "r2ka22223.topojson"))
+
+    snapped_csv = os.path.join(output_dir, "snapped_nodes.csv")
+    output_bin = os.path.join(output_dir, "omaezaki_directed_travel_time_matrix.bin")
+    output_routes = os.path.join(output_dir, "omaezaki_routes.bin")
+    equivalence_csv = os.path.join(output_dir, "equivalence_classes.csv")
+
+    def travel_times():
+        # シナリオ単位で並列化するため、行列の計算は1プロセスで行う
+        # CSVは作成しない（シナリオの最適化はバイナリ形式の行列を読み込む）
+        geo.calculate_travel_times(task["graphml_file"], task["nodes_csv"], None, None, penalty=task["penalty"], n_jobs=1, output_bin=output_bin,
+                                   incremental=True, highway_speeds=task["highway_speeds"], output_routes=output_routes,
+                                   snapped_csv=snapped_csv)
+
+    pipeline = Pipeline(os.path.join(output_dir, "pipeline_state.json"))
+    pipeline.add_stage("snap", lambda: geo.snap_nodes_to_graph(task["graphml_file"], task["nodes_csv"], force=True, snapped_csv=snapped_csv),
+                       inputs=[task["graphml_file"], task["nodes_csv"]], outputs=[snapped_csv])
+    pipeline.add_stage("travel_times", travel_times, inputs=[task["graphml_file"], task["nodes_csv"], snapped_csv],
+                       outputs=[output_bin, output_routes], params={"penalty": task["penalty"], "highway_speeds": task["highway_speeds"]})
+    pipeline.add_stage("equivalence", lambda: geo.analyze_equivalence_classes(output_bin, equivalence_csv),
+                       inputs=[output_bin], outputs=[equivalence_csv])
+    pipeline.run()
+    return task["key"], output_bin, output_routes
+
+
+def _solve_scenario(scenario, matrix_bin, routes_bin, threads=None):
+    """
+    1シナリオを最適化する（ワーカープロセスで実行）。結果は scenario["output_dir"] に保存する
+    ワーカーは次のタスクにも使われるため、カレントディレクトリは変えずに出力先を明示して渡す
+    :return: シナリオの結果（名前, ソルバー, 目的関数値, 計算時間）
+    """
+    output_dir = scenario["output_dir"]
+    result_dir = os.path.join(output_dir, "result")
+    os.makedirs(result_dir, exist_ok=True)
+
+    nodes = pd.read_csv(scenario["nodes_csv"])[["id", "type", "x", "y", "z", "demand"]].to_dict(orient="records")
+    vehicles = pd.read_csv(scenario["vehicles_csv"]).to_dict(orient="records")
+    cost_matrix, _ = load_travel_time_matrix(matrix_bin, dtype=np.float64)
+    route_store = RouteStore(routes_bin)
+
+    start = time.time()
+    if scenario["solver"] == "gurobi":
+        from cvrp.CVRP_gurobi_3d_v2 import CVRP_Gurobi_Model
+
+        model = CVRP_Gurobi_Model(nodes=nodes, vehicles=vehicles, cost_matrix=cost_matrix, theta=scenario["gurobi"]["theta"])
+        model.route_store = route_store
+        if threads:
+            # 同時に実行するシナリオでコアを分け合う
+            model.model.setParam("Threads", threads)
+        model.build_model()
+        model.solve_model(output_dir=output_dir)
+        elapsed = time.time() - start
+        model.save_summary_report(elapsed, output_dir=output_dir)
+        objective = model.model.ObjVal
+    elif scenario["solver"] == "ga":
+        from CVRP_Calculation_3d_v2 import CVRP_Calculation_3d
+
+        params = scenario["ga"]
+        calculation = CVRP_Calculation_3d(nodes=nodes, vehicles=vehicles, cost_matrix=cost_matrix, population_size=params["population_size"],
+                                          crossover_rate=params["crossover_rate"], mutation_rate=params["mutation_rate"],
+                                          generations=params["generations"], penalty=params["penalty"], theta=params["theta"])
+        calculation.route_store = route_store
+        calculation.generate_initial_population(params["population_size"])
+        best_individual, objective = calculation.run_genetic_algorithm(
+            params["generations"], output_csv=os.path.join(result_dir, "genetic_results.csv"),
+            best_individual_csv=os.path.join(result_dir, "best_individual.csv"), log_file=os.path.join(result_dir, "log.txt"))
+        elapsed = time.time() - start
+        calculation.save_vehicle_statistics(best_individual, output_dir=result_dir)
+        try:
+            calculation.visualize_routes(best_individual, nodes, output_dir=result_dir)
+            calculation.visualize_routes_3d(best_individual, nodes, output_dir=result_dir)
+        except Exception as e:
+            print(f"警告: {scenario['name']} のルート図を作成できませんでした - {e}")
+
+    return {"name": scenario["name"], "solver": scenario["solver"], "objective": float(objective), "elapsed": round(elapsed, 2)}
+
+
+class CVRP_Scenarios:
+    """
+    複数のシナリオ（標高しきい値 elev・割合 nrate・要支援者集合 nodes_csv・車両 vehicles_csv・ソルバー solver）をまとめて実行する
+        1. 共有キャッシュ（cache_dir）の作成: DEMの結合, OSMの取得, 全 (elev, nrate) のネットワーク（エッジの標高サンプリングは1回）
+        2. ネットワーク × 要支援者集合ごとのスナップ・移動時間行列・ルート（同じ組み合わせのシナリオで共有）
+        3. シナリオごとの最適化（output_dir/<シナリオ名>/ に保存）
+    2 と 3 はプロセスプールで並行に実行し、行列ができたシナリオから順に最適化を始める。
+    共有キャッシュは 1 でまとめて作成し、ワーカーは読み込むだけにする（入力と条件が前回と同じなら各段階は省略される）。
+    :param scenarios: シナリオ（辞書）のリスト。省略したキーは DEFAULT_SCENARIO の値を使う
+    :param output_dir: シナリオごとの結果の出力先
+    :param cache_dir: 共有キャッシュの保存先
+    :param dem_dir: GMLタイルのディレクトリ
+    :param osm_file: ローカルの OSM データ（None の場合は Overpass API から取得）
+    :param max_workers: 同時に実行するプロセス数（None の場合は全コア）
+    """
+
+    def __init__(self, scenarios, output_dir="scenario_results", cache_dir="scenario_cache", dem_dir=os.path.join(GEOGRAPHY_DIR, "PackDLMap_xml_10m"),
+                 osm_file=None, max_workers=None):
+        self.output_dir = os.path.abspath(output_dir)
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.dem_dir = os.path.abspath(dem_dir)
+        self.osm_file = os.path.abspath(osm_file) if osm_file else None
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.scenarios = [self.normalize_scenario(scenario) for scenario in scenarios]
+
+        names = [scenario["name"] for scenario in self.scenarios]
+        duplicated = sorted({name for name in names if names.count(name) > 1})
+        if duplicated:
+            raise ValueError(f"シナリオ名が重複しています: {duplicated}")
+
+    def normalize_scenario(self, scenario):
+        """
+        既定値を補い、名前・出力先・ネットワークのパス・ソルバーの条件を決める
+        ソルバーの条件は scenario["gurobi"] / scenario["ga"] にまとめる（ソルバーの既定値 < シナリオの "theta" < シナリオの "gurobi" / "ga"）
+        """
+        scenario = {**DEFAULT_SCENARIO, **scenario}
+        if "elev" not in scenario:
+            raise ValueError(f"シナリオに elev がありません: {scenario}")
+        solver = scenario["solver"]
+        if solver not in SOLVER_DEFAULTS:
+            raise ValueError(f"未対応のsolverです: {solver}")
+        params = dict(SOLVER_DEFAULTS[solver])
+        if "theta" in scenario:
+            params["theta"] = scenario["theta"]
+        scenario[solver] = {**params, **scenario.get(solver, {})}
+        scenario["theta"] = scenario[solver]["theta"]
+        scenario["nodes_csv"] = os.path.abspath(scenario["nodes_csv"])
+        scenario["vehicles_csv"] = os.path.abspath(scenario["vehicles_csv"])
+        scenario.setdefault("name", f"elev{scenario['elev']}m_nrate{scenario['nrate']}_{scenario['solver']}_"
+                                    f"{os.path.splitext(os.path.basename(scenario['nodes_csv']))[0]}")
+        scenario["output_dir"] = os.path.join(self.output_dir, scenario["name"])
+        scenario["graphml_file"] = os.path.join(self.cache_dir, "networks", f"omaezaki_≤{scenario['elev']}melev_nrate{scenario['nrate']}.graphml")
+        return scenario
+
+    def travel_time_key(self, scenario):
+        """ 移動時間行列を共有できるシナリオの組（ネットワーク・要支援者集合・移動時間の条件）のキー """
+        params = [scenario["graphml_file"], scenario["nodes_csv"], scenario["penalty"], scenario["highway_speeds"]]
+        digest = hashlib.sha1(json.dumps(params, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:12]
+        nodes_name = os.path.splitext(os.path.basename(scenario["nodes_csv"]))[0]
+        return f"elev{scenario['elev']}m_nrate{scenario['nrate']}_{nodes_name}_{digest}"
+
+    def prepare_networks(self):
+        """ 共有キャッシュ（DEM, OSM, 全 (elev, nrate) のネットワークとそのスナップショット）を作成する """
+        os.makedirs(os.path.join(self.cache_dir, "networks"), exist_ok=True)
+        geo = CVRP_Geography(os.path.join(GEOGRAPHY_DIR, "r2ka22223.topojson"))
+        if self.osm_file:
+            geo.load_data()  # OSMデータを地区ポリゴンで切り出すため
+
+        dem_bin = os.path.join(self.cache_dir, "PackDLMap_xml_10m_output.bin")
+        raw_graphml = os.path.join(self.cache_dir, "omaezaki_drive.graphml")
+        elevs = sorted({scenario["elev"] for scenario in self.scenarios})
+        nrates = sorted({scenario["nrate"] for scenario in self.scenarios})
+        output_pattern = os.path.join(self.cache_dir, "networks", "omaezaki_≤{elev}melev_nrate{nrate}.graphml")
+        graphml_files = [output_pattern.format(elev=elev, nrate=nrate) for elev in elevs for nrate in nrates]
+
+        def merge():
+            geo.merge_gml_elevation_tiles_10m(self.dem_dir, output_prefix=os.path.splitext(dem_bin)[0],
+                                              latlon_csv=os.path.join(self.cache_dir, "latlon_range.csv"))
+
+        def download():
+            ox.save_graphml(geo.download_road_network(osm_file=self.osm_file), filepath=raw_graphml)
+
+        def sweep():
+            geo.load_elev(dem_bin)
+            geo.get_filtered_road_network_sweep(elevs, nrates=nrates, output_pattern=output_pattern, G=load_graph(raw_graphml))
+
+        pipeline = Pipeline(os.path.join(self.cache_dir, "pipeline_state.json"))
+        pipeline.add_stage("dem_merge", merge, inputs=[self.dem_dir], outputs=[dem_bin])
+        pipeline.add_stage("road_download", download, inputs=[self.osm_file] if self.osm_file else [], outputs=[raw_graphml],
+                           params={"osm_file": self.osm_file})
+        pipeline.add_stage("road_sweep", sweep, inputs=[raw_graphml, dem_bin], outputs=graphml_files,
+                           params={"elevs": elevs, "nrates": nrates})
+        pipeline.run()
+
+        # ワーカーが同時に書き込まないよう、ネットワークのスナップショットはここで作成しておく
+        for graphml_file in graphml_files:
+            load_graph(graphml_file, as_networkx=False)
+
+    def run(self):
+        """
+        全シナリオを実行し、結果の一覧を output_dir/scenario_summary.csv に保存する
+        :return: シナリオごとの結果（DataFrame）
+        """
+        start = time.time()
+        self.prepare_networks()
+        print(f"共有キャッシュの準備完了: {time.time() - start:.2f} 秒")
+
+        groups = {}
+        for scenario in self.scenarios:
+            groups.setdefault(self.travel_time_key(scenario), []).append(scenario)
+        # 同時に解くシナリオで Gurobi のスレッド数を分け合う
+        threads = max(1, (os.cpu_count() or 1) // min(self.max_workers, len(self.scenarios)))
+
+        results = []
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            matrix_futures = {}
+            for key, members in groups.items():
+                task = {"key": key, "graphml_file": members[0]["graphml_file"], "nodes_csv": members[0]["nodes_csv"],
+                        "penalty": members[0]["penalty"], "highway_speeds": members[0]["highway_speeds"],
+                        "output_dir": os.path.join(self.cache_dir, "travel_times", key)}
+                matrix_futures[executor.submit(_prepare_travel_times, task)] = key
+
+            solve_futures = {}
+            for future in as_completed(matrix_futures):
+                key = matrix_futures[future]
+                try:
+                    _, matrix_bin, routes_bin = future.result()
+                except Exception as e:
+                    print(f"エラー: 移動時間行列 {key} - {e}")
+                    results.extend({"name": scenario["name"], "solver": scenario["solver"], "error": str(e)} for scenario in groups[key])
+                    continue
+                # 行列ができたシナリオから順に最適化を始める
+                for scenario in groups[key]:
+                    solve_futures[executor.submit(_solve_scenario, scenario, matrix_bin, routes_bin, threads)] = scenario
+
+            for future in as_completed(solve_futures):
+                scenario = solve_futures[future]
+                try:
+                    result = future.result()
+                    print(f"✅ {scenario['name']}: 目的関数値 {result['objective']:.2f}（{result['elapsed']:.2f} 秒）")
+                except Exception as e:
+                    print(f"エラー: シナリオ {scenario['name']} - {e}")
+                    result = {"name": scenario["name"], "solver": scenario["solver"], "error": str(e)}
+                results.append(result)
+
+        order = {scenario["name"]: i for i, scenario in enumerate(self.scenarios)}
+        summary = pd.DataFrame(sorted(results, key=lambda result: order[result["name"]]))
+        for column in ("elev", "nrate", "theta", "nodes_csv", "vehicles_csv"):
+            summary[column] = [next(s[column] for s in self.scenarios if s["name"] == name) for name in summary["name"]]
+        os.makedirs(self.output_dir, exist_ok=True)
+        summary.to_csv(os.path.join(self.output_dir, "scenario_summary.csv"), index=False, encoding="utf-8-sig")
+        print(f"全 {len(self.scenarios)} シナリオ完了: {time.time() - start:.2f} 秒（{self.output_dir}/scenario_summary.csv）")
+        return summary
+
+
+if __name__ == "__main__":
+    # シナリオの一覧（JSON）を引数で指定しない場合は論文の10シナリオを Gurobi で実行する
+    # 例: python CVRP_Scenarios.py scenarios.json
+    scenarios = load_scenarios(sys.argv[1]) if len(sys.argv) > 1 else paper_scenarios()
+    CVRP_Scenarios(scenarios).run()
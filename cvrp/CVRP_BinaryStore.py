@@ -0,0 +1,196 @@
+import hashlib
+import json
+import os
+import numpy as np
+
+# バイナリ保存形式（1ファイル）
+#   MAGIC(8バイト) + ヘッダー長(uint64, little endian) + JSONヘッダー + 配列データ（各配列は ALIGN バイト境界から）
+# ヘッダーには任意のメタ情報と各配列の dtype / shape / offset を持つため、
+# 配列は np.memmap でそのまま開け、読み込み時に必要な部分だけがページインされる。
+MAGIC = b"CVRPBIN1"
+ALIGN = 64
+
+# 移動時間行列の保存形式の版
+TRAVEL_TIME_MATRIX_VERSION = 1
+
+# 標高ラスタの保存形式の版と既定のタイルサイズ（セル数）
+# タイル (tile_size × tile_size) ごとに連続して保存するため、参照した地点を含むタイルだけがページインされる
+TILED_RASTER_VERSION = 1
+DEM_TILE_SIZE = 256
+
+
+def save_arrays(path, arrays, meta=None, align=ALIGN):
+    """
+    複数の numpy 配列とメタ情報を1つのバイナリファイルに保存する
+    :param path: 保存先のパス
+    :param arrays: {名前: numpy配列} の辞書
+    :param meta: JSONで保存できるメタ情報の辞書
+    :param align: 各配列の先頭をそろえるバイト境界（メモリマップ用）
+    """
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+
+    # 配列の並びと大きさからオフセットを決めるため、ヘッダー長が確定するまで繰り返す
+    header_size = 0
+    while True:
+        offset = _round_up(len(MAGIC) + 8 + header_size, align)
+        layout = {}
+        for name, array in arrays.items():
+            layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+            offset = _round_up(offset + array.nbytes, align)
+        header = json.dumps({"meta": meta or {}, "arrays": layout}, ensure_ascii=False).encode("utf-8")
+        if len(header) <= header_size:
+            break
+        header_size = _round_up(len(header), align)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(np.uint64(header_size).tobytes())
+        f.write(header.ljust(header_size, b" "))
+        for name, array in arrays.items():
+            f.seek(layout[name]["offset"])
+            f.write(array.tobytes())
+    os.replace(tmp_path, path)
+
+
+def load_arrays(path, mmap=True):
+    """
+    save_arrays で保存したファイルを読み込む
+    :param path: ファイルのパス
+    :param mmap: True の場合は読み取り専用のメモリマップとして開く
+    :return: ({名前: numpy配列}, メタ情報の辞書)
+    """
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"バイナリ形式ではありません: {path}")
+        header_size = int(np.frombuffer(f.read(8), dtype=np.uint64)[0])
+        header = json.loads(f.read(header_size).decode("utf-8"))
+
+        arrays = {}
+        for name, info in header["arrays"].items():
+            dtype = np.dtype(info["dtype"])
+            shape = tuple(info["shape"])
+            if mmap and int(np.prod(shape)) > 0:
+                arrays[name] = np.memmap(path, dtype=dtype, mode="r", offset=info["offset"], shape=shape)
+            else:
+                f.seek(info["offset"])
+                arrays[name] = np.fromfile(f, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+    return arrays, header["meta"]
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """ ファイル内容のSHA-1ハッシュ（グラフの同一性確認に使用） """
+    sha1 = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+def save_travel_time_matrix(path, matrix, node_ids, penalty, graph_hash=None, arrays=None, **meta):
+    """
+    移動時間行列を float32 のバイナリ形式で保存する
+    :param path: 保存先のパス（例: omaezaki_symmetric_travel_time_matrix.bin）
+    :param matrix: n×n の移動時間行列（行=起点, 列=終点, 拠点IDの順）
+    :param node_ids: 行・列に対応する拠点ID
+    :param penalty: ルートが見つからない場合に入っている移動時間（番兵値）
+    :param graph_hash: 計算に使ったネットワーク（GraphML）のハッシュ
+    :param arrays: 同じファイルに保存する追加の配列（{名前: 配列}, float32 で保存）
+    :param meta: その他のメタ情報
+    """
+    header = {
+        "version": TRAVEL_TIME_MATRIX_VERSION,
+        "node_ids": [int(i) for i in node_ids],
+        "penalty": float(penalty),
+        "graph_hash": graph_hash,
+    }
+    header.update(meta)
+    stored = {"matrix": np.asarray(matrix, dtype=np.float32)}
+    for name, array in (arrays or {}).items():
+        stored[name] = np.asarray(array, dtype=np.float32)
+    save_arrays(path, stored, header)
+    print(f"移動時間行列（float32, {len(node_ids)}×{len(node_ids)}）を {path} に保存しました。")
+
+
+def load_travel_time_matrix(path, mmap=True, dtype=None, csv_fallback=True):
+    """
+    移動時間行列を読み込む（Geography・Gurobi・GA で共通）
+    :param path: バイナリ形式（.bin）または従来のCSV行列のパス
+    :param mmap: True の場合はメモリマップとして開く（dtype を指定した場合はメモリ上にコピー）
+    :param dtype: 変換後の dtype（例: np.float64）。None の場合は保存時の float32 のまま
+    :param csv_fallback: バイナリが無い場合に同名の .csv を読み込む
+    :return: (行列, メタ情報の辞書 node_ids / penalty / graph_hash)
+    """
+    if csv_fallback and not os.path.exists(path) and not path.endswith(".csv"):
+        csv_path = f"{os.path.splitext(path)[0]}.csv"
+        if os.path.exists(csv_path):
+            print(f"{path} が無いため {csv_path} を読み込みます。")
+            path = csv_path
+
+    if path.endswith(".csv"):
+        import pandas as pd
+        df = pd.read_csv(path, index_col=0)
+        matrix = df.values
+        meta = {"node_ids": df.index.tolist(), "penalty": None, "graph_hash": None}
+    else:
+        arrays, meta = load_arrays(path, mmap=mmap)
+        matrix = arrays["matrix"]
+
+    if dtype is not None:
+        matrix = np.asarray(matrix, dtype=dtype)
+    return matrix, meta
+
+
+def save_tiled_raster(path, array, tile_size=DEM_TILE_SIZE, dtype=np.float32, **meta):
+    """
+    2次元ラスタ（標高など）をタイル分割して保存する
+    配列は (タイル行数, タイル列数, tile_size, tile_size) の形で保存し、端のタイルの余りは NaN で埋める
+    :param path: 保存先のパス（例: PackDLMap_xml_10m_output.bin）
+    :param array: 2次元配列（行=緯度方向（北が0）, 列=経度方向（西が0））
+    :param tile_size: 1タイルのセル数（一辺）
+    :param dtype: 保存する dtype
+    :param meta: その他のメタ情報（範囲・解像度など）
+    """
+    array = np.asarray(array)
+    nrows, ncols = array.shape
+    tile_rows = -(-nrows // tile_size)
+    tile_cols = -(-ncols // tile_size)
+
+    padded = np.full((tile_rows * tile_size, tile_cols * tile_size), np.nan, dtype=dtype)
+    padded[:nrows, :ncols] = array
+    tiles = padded.reshape(tile_rows, tile_size, tile_cols, tile_size).transpose(0, 2, 1, 3)
+
+    header = {"version": TILED_RASTER_VERSION, "shape": [nrows, ncols], "tile_size": tile_size}
+    header.update(meta)
+    save_arrays(path, {"tiles": tiles}, header)
+    print(f"ラスタ（{nrows}×{ncols}, {tile_rows}×{tile_cols} タイル）を {path} に保存しました。")
+
+
+class TiledRaster:
+    """
+    save_tiled_raster で保存したラスタをメモリマップで開き、元の2次元配列と同じ添字で参照する
+    raster[rows, cols] は整数（または整数配列）の行・列で、参照したタイルだけを読み込む
+    """
+
+    def __init__(self, path, mmap=True):
+        arrays, self.meta = load_arrays(path, mmap=mmap)
+        self.tiles = arrays["tiles"]
+        self.shape = tuple(self.meta["shape"])
+        self.tile_size = int(self.meta["tile_size"])
+        self.dtype = self.tiles.dtype
+
+    def __getitem__(self, key):
+        rows, cols = key
+        tile_row, row = np.divmod(rows, self.tile_size)
+        tile_col, col = np.divmod(cols, self.tile_size)
+        return self.tiles[tile_row, tile_col, row, col]
+
+    def to_array(self):
+        """ ラスタ全体を通常の2次元配列として読み込む """
+        tile_rows, tile_cols = self.tiles.shape[:2]
+        array = np.asarray(self.tiles).transpose(0, 2, 1, 3).reshape(tile_rows * self.tile_size, tile_cols * self.tile_size)
+        return array[:self.shape[0], :self.shape[1]]
+
+
+def _round_up(value, align):
+    return -(-value // align) * align
@@ -0,0 +1,316 @@
+import heapq
+import math
+import os
+import numpy as np
+import scipy.spatial
+from .CVRP_BinaryStore import save_arrays, load_arrays
+from .CVRP_Distance import latlon_to_unit_xyz, chord_to_m
+
+# 縮約階層（Contraction Hierarchy）の保存形式（CVRP_BinaryStore のコンテナに保存）
+#   rank: ネットワークのノードの縮約順（大きいほど重要なノード）
+#   up_indptr, up_heads, up_weights: 上向きグラフ（CSR）。ノード u から rank の高いノード v へのエッジ u→v
+#   down_indptr, down_tails, down_weights: 下向きグラフを逆向きにしたもの（CSR）。ノード v に入る、rank の高いノード u からのエッジ u→v
+#   shortcut_tails, shortcut_heads, shortcut_middles: ショートカット u→w と、その経由ノード v（u→v→w に展開する）
+#   graph_node_ids, graph_x, graph_y: ネットワークのノードID（OSM）と経緯度
+# 点間の移動時間は、起点からの上向き探索と終点からの（逆向きの）上向き探索が出会うノードで求まり、
+# 探索するノードは縮約前のネットワークの Dijkstra と比べて桁違いに少ない
+CONTRACTION_HIERARCHY_VERSION = 1
+
+# 縮約時の witness 探索（ショートカットが不要かどうかの確認）で確定させるノード数の上限
+# 上限で打ち切ると不要なショートカットが増えるだけで、最短距離は変わらない
+WITNESS_SETTLE_LIMIT = 500
+
+
+def contraction_hierarchy_path(graphml_file):
+    """ GraphML に対応する縮約階層のパス（例: omaezaki_≤0melev.ch.bin） """
+    return f"{os.path.splitext(graphml_file)[0]}.ch.bin"
+
+
+def _witness_distances(out_edges, source, excluded, targets, limit):
+    """
+    縮約中のネットワークで source から targets までの距離を求める（excluded は通らない）
+    :param limit: この距離を超えるノードは探索しない
+    :return: {ノード: 距離}（到達したノードのみ）
+    """
+    distances = {source: 0.0}
+    heap = [(0.0, source)]
+    remaining = set(targets)
+    settled = 0
+    while heap and remaining and settled < WITNESS_SETTLE_LIMIT:
+        distance, node = heapq.heappop(heap)
+        if distance > limit:
+            break
+        if distance > distances[node]:
+            continue
+        remaining.discard(node)
+        settled += 1
+        for head, weight in out_edges[node].items():
+            if head == excluded:
+                continue
+            candidate = distance + weight
+            if candidate < distances.get(head, math.inf):
+                distances[head] = candidate
+                heapq.heappush(heap, (candidate, head))
+    return distances
+
+
+def _contract(out_edges, in_edges, node):
+    """
+    ノードを縮約した場合に必要なショートカットを求める
+    :return: [(起点, 終点, 重み)] のリスト
+    """
+    shortcuts = []
+    heads = out_edges[node]
+    for tail, weight_in in in_edges[node].items():
+        if tail == node:
+            continue
+        targets = {head: weight_in + weight_out for head, weight_out in heads.items() if head != tail and head != node}
+        if not targets:
+            continue
+        witness = _witness_distances(out_edges, tail, node, targets, max(targets.values()))
+        for head, weight in targets.items():
+            if witness.get(head, math.inf) > weight:
+                shortcuts.append((tail, head, weight))
+    return shortcuts
+
+
+def build_contraction_hierarchy(csr):
+    """
+    有向の道路ネットワーク（CSR疎行列）から縮約階層を作る
+    ノードは「追加されるショートカット数 - 削除されるエッジ数 + 縮約済みの隣接ノード数」の小さい順に縮約し、
+    優先度は取り出すときに計算し直す（lazy update）
+    :param csr: scipy.sparse.csr_matrix（CVRP_Geography.graph_to_csr の戻り値。平行エッジは最小の重み）
+    :return: rank, edges の辞書 {(起点, 終点): (重み, 経由ノード)}（元のエッジの経由ノードは -1）
+    """
+    n = csr.shape[0]
+    out_edges = [dict() for _ in range(n)]
+    in_edges = [dict() for _ in range(n)]
+    edges = {}
+    indptr, indices, data = csr.indptr.tolist(), csr.indices.tolist(), csr.data.tolist()
+    for tail in range(n):
+        for k in range(indptr[tail], indptr[tail + 1]):
+            head, weight = indices[k], data[k]
+            if head == tail:
+                continue
+            out_edges[tail][head] = weight
+            in_edges[head][tail] = weight
+            edges[(tail, head)] = (weight, -1)
+
+    contracted_neighbors = [0] * n
+
+    def priority(node, shortcuts):
+        return len(shortcuts) - len(out_edges[node]) - len(in_edges[node]) + contracted_neighbors[node]
+
+    heap = [(priority(node, _contract(out_edges, in_edges, node)), node) for node in range(n)]
+    heapq.heapify(heap)
+    rank = np.empty(n, dtype=np.int32)
+    order = 0
+    while heap:
+        _, node = heapq.heappop(heap)
+        shortcuts = _contract(out_edges, in_edges, node)
+        current = priority(node, shortcuts)
+        if heap and current > heap[0][0]:
+            heapq.heappush(heap, (current, node))
+            continue
+
+        for tail, head, weight in shortcuts:
+            if weight < out_edges[tail].get(head, math.inf):
+                out_edges[tail][head] = weight
+                in_edges[head][tail] = weight
+                edges[(tail, head)] = (weight, node)
+
+        # 縮約したノードを残りのネットワークから外す（そのエッジは上向き・下向きグラフとして残る）
+        for head in out_edges[node]:
+            del in_edges[head][node]
+            contracted_neighbors[head] += 1
+        for tail in in_edges[node]:
+            del out_edges[tail][node]
+            contracted_neighbors[tail] += 1
+        out_edges[node] = {}
+        in_edges[node] = {}
+        rank[node] = order
+        order += 1
+
+        if order % max(1, n // 10) == 0:
+            print(f"縮約中: {order}/{n} ノード")
+
+    return rank, edges
+
+
+def _csr_arrays(n, keys, values, weights):
+    """ (キーのノード, 値のノード, 重み) を キーのノードごとの CSR 配列に変換する """
+    order = np.argsort(keys, kind="stable")
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=n), out=indptr[1:])
+    return indptr, values[order].astype(np.int32), weights[order].astype(np.float64)
+
+
+def save_contraction_hierarchy(path, rank, edges, graph_node_ids, graph_x, graph_y, graph_hash=None):
+    """
+    縮約階層を保存する
+    :param path: 保存先のパス（contraction_hierarchy_path を参照）
+    :param rank: build_contraction_hierarchy の戻り値（ノードの縮約順）
+    :param edges: build_contraction_hierarchy の戻り値（元のエッジとショートカット）
+    :param graph_node_ids: ネットワークのノードID（CSRの行番号の順）
+    :param graph_x: ネットワークのノードの経度
+    :param graph_y: ネットワークのノードの緯度
+    :param graph_hash: 作成に使ったGraphML（と重み条件）のハッシュ（再利用の確認用）
+    """
+    n = len(rank)
+    rank = np.asarray(rank)
+    if edges:
+        tails, heads = (np.array(a, dtype=np.int64) for a in zip(*edges.keys()))
+        weights, middles = (np.array(a) for a in zip(*edges.values()))
+    else:
+        tails = heads = middles = np.array([], dtype=np.int64)
+        weights = np.array([], dtype=np.float64)
+
+    upward = rank[heads] > rank[tails]
+    up_indptr, up_heads, up_weights = _csr_arrays(n, tails[upward], heads[upward], weights[upward])
+    down_indptr, down_tails, down_weights = _csr_arrays(n, heads[~upward], tails[~upward], weights[~upward])
+    shortcut = middles >= 0
+
+    arrays = {
+        "rank": rank.astype(np.int32),
+        "up_indptr": up_indptr,
+        "up_heads": up_heads,
+        "up_weights": up_weights,
+        "down_indptr": down_indptr,
+        "down_tails": down_tails,
+        "down_weights": down_weights,
+        "shortcut_tails": tails[shortcut].astype(np.int32),
+        "shortcut_heads": heads[shortcut].astype(np.int32),
+        "shortcut_middles": middles[shortcut].astype(np.int32),
+        "graph_node_ids": np.asarray(graph_node_ids, dtype=np.int64),
+        "graph_x": np.asarray(graph_x, dtype=np.float64),
+        "graph_y": np.asarray(graph_y, dtype=np.float64),
+    }
+    meta = {"version": CONTRACTION_HIERARCHY_VERSION, "graph_hash": graph_hash,
+            "nodes": n, "edges": int(len(tails) - shortcut.sum()), "shortcuts": int(shortcut.sum())}
+    save_arrays(path, arrays, meta)
+
+
+class ContractionHierarchy:
+    """
+    save_contraction_hierarchy で保存した縮約階層を読み込み、点間の移動時間・経路を求める
+    （結果は同じ重みのネットワークでの Dijkstra と一致する。浮動小数の足し合わせる順序による 1e-9 秒程度の差は除く）
+    """
+
+    def __init__(self, path, mmap=True):
+        self.arrays, self.meta = load_arrays(path, mmap=mmap)
+        self.graph_node_ids = np.asarray(self.arrays["graph_node_ids"])
+        self.node_index = {node: i for i, node in enumerate(self.graph_node_ids.tolist())}
+
+        # 探索はノード単位の小さな参照を繰り返すため、numpy 配列ではなく Python のリストで持つ
+        self._up = self._adjacency("up_indptr", "up_heads", "up_weights")
+        self._down = self._adjacency("down_indptr", "down_tails", "down_weights")
+        self._middles = None
+        self._tree = None
+
+    def _adjacency(self, indptr_name, nodes_name, weights_name):
+        indptr = self.arrays[indptr_name].tolist()
+        nodes = self.arrays[nodes_name].tolist()
+        weights = self.arrays[weights_name].tolist()
+        return [list(zip(nodes[indptr[i]:indptr[i + 1]], weights[indptr[i]:indptr[i + 1]])) for i in range(len(indptr) - 1)]
+
+    def _search(self, source, target):
+        """
+        双方向の上向き探索
+        :return: (移動時間, 出会ったノード, 前向きの先行ノード, 後ろ向きの先行ノード)。到達できない場合の移動時間は inf
+        """
+        if source == target:
+            return 0.0, source, {source: -1}, {target: -1}
+
+        distances = ({source: 0.0}, {target: 0.0})
+        parents = ({source: -1}, {target: -1})
+        heaps = ([(0.0, source)], [(0.0, target)])
+        graphs = (self._up, self._down)
+        best, meeting = math.inf, -1
+        while heaps[0] or heaps[1]:
+            for side in (0, 1):
+                heap = heaps[side]
+                if not heap:
+                    continue
+                distance, node = heapq.heappop(heap)
+                if distance >= best:
+                    heap.clear()
+                    continue
+                dist, parent = distances[side], parents[side]
+                if distance > dist[node]:
+                    continue
+                other = distances[1 - side].get(node)
+                if other is not None and distance + other < best:
+                    best, meeting = distance + other, node
+                # stall-on-demand: 逆向きのエッジを通って rank の高いノードからより短く来られる場合、このノードの先は探索しない
+                if any(dist.get(higher, math.inf) + weight < distance for higher, weight in graphs[1 - side][node]):
+                    continue
+                for neighbor, weight in graphs[side][node]:
+                    candidate = distance + weight
+                    if candidate < dist.get(neighbor, math.inf):
+                        dist[neighbor] = candidate
+                        parent[neighbor] = node
+                        heapq.heappush(heap, (candidate, neighbor))
+        return best, meeting, parents[0], parents[1]
+
+    def travel_time(self, source_id, target_id):
+        """
+        ネットワークのノード間の最短移動時間
+        :param source_id: 起点のノードID（OSM）
+        :param target_id: 終点のノードID（OSM）
+        :return: 移動時間（秒）。到達できない場合は inf
+        """
+        return self._search(self.node_index[source_id], self.node_index[target_id])[0]
+
+    def _unpack(self, tail, head):
+        """ ショートカット tail→head を元のエッジの経路（tail を除く）に展開する """
+        if self._middles is None:
+            self._middles = dict(zip(zip(self.arrays["shortcut_tails"].tolist(), self.arrays["shortcut_heads"].tolist()),
+                                     self.arrays["shortcut_middles"].tolist()))
+        path, stack = [], [(tail, head)]
+        while stack:
+            tail, head = stack.pop()
+            middle = self._middles.get((tail, head))
+            if middle is None:
+                path.append(head)
+            else:
+                stack.append((middle, head))
+                stack.append((tail, middle))
+        return path
+
+    def shortest_path(self, source_id, target_id):
+        """
+        ネットワークのノード間の最短経路
+        :return: ノードID（OSM）のリスト（到達できない場合は None）
+        """
+        distance, meeting, forward, backward = self._search(self.node_index[source_id], self.node_index[target_id])
+        if math.isinf(distance):
+            return None
+        hierarchy_path = [meeting]
+        while forward[hierarchy_path[0]] != -1:
+            hierarchy_path.insert(0, forward[hierarchy_path[0]])
+        while backward[hierarchy_path[-1]] != -1:
+            hierarchy_path.append(backward[hierarchy_path[-1]])
+
+        path = hierarchy_path[:1]
+        for tail, head in zip(hierarchy_path[:-1], hierarchy_path[1:]):
+            path.extend(self._unpack(tail, head))
+        return self.graph_node_ids[path].tolist()
+
+    def nearest_node(self, lat, lon):
+        """
+        地点に最も近いネットワークのノード
+        :return: (ノードID（OSM）, 距離（m）)
+        """
+        if self._tree is None:
+            self._tree = scipy.spatial.cKDTree(latlon_to_unit_xyz(self.arrays["graph_y"], self.arrays["graph_x"]))
+        chord, index = self._tree.query(latlon_to_unit_xyz(lat, lon), k=1)
+        return int(self.graph_node_ids[index]), float(chord_to_m(chord))
+
+    def travel_time_between(self, from_lat, from_lon, to_lat, to_lon):
+        """
+        2地点（車両の現在地・新たに通報のあった住民など）を最寄りのノードにスナップして移動時間を求める
+        :return: 移動時間（秒）。到達できない場合は inf
+        """
+        source, _ = self.nearest_node(from_lat, from_lon)
+        target, _ = self.nearest_node(to_lat, to_lon)
+        return self.travel_time(source, target)
@@ -0,0 +1,50 @@
+import numpy as np
+
+# 地球の平均半径 (m)（IUGG の平均半径 R1）
+EARTH_RADIUS_M = 6371008.8
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """
+    2地点間の大円距離（m）を haversine 公式で求める。引数は配列で与えることができ、numpy のブロードキャストに従う。
+    （例: 候補点 k 個 × 避難所 m 個 の距離行列は haversine_m(lats[:, None], lons[:, None], shelter_lats, shelter_lons)）
+
+    geopy.distance.geodesic（WGS84楕円体）との差:
+        球面近似のため、御前崎市付近（北緯34.6度）では南北方向に約 +0.24%、東西方向に約 -0.22% の誤差がある。
+        市域内のランダムな2点（1 m〜14 km）で比較した相対誤差は ±0.24% 以内（14 km で最大約 33 m）、
+        60 m 未満では約 0.15 m 未満、140 m 未満では約 0.35 m 未満であり、避難所からの最小距離（50 m）や
+        エッジの分割（n 分割）の判定に与える影響は無視できる。
+
+    :param lat1: 地点1の緯度（度）
+    :param lon1: 地点1の経度（度）
+    :param lat2: 地点2の緯度（度）
+    :param lon2: 地点2の経度（度）
+    :return: 距離（m）の numpy 配列
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(a, dtype=float)) for a in (lat1, lon1, lat2, lon2))
+    h = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+
+def latlon_to_unit_xyz(lats, lons):
+    """
+    緯度経度を単位球面上の3次元座標に変換する（KD木での近傍探索用）
+    単位球面上の弦の長さは大円距離と単調に対応するため、KD木の最近傍・半径探索の結果は haversine_m と一致する。
+    :param lats: 緯度（度）の配列
+    :param lons: 経度（度）の配列
+    :return: (n, 3) の numpy 配列
+    """
+    lats = np.radians(np.asarray(lats, dtype=float))
+    lons = np.radians(np.asarray(lons, dtype=float))
+    cos_lat = np.cos(lats)
+    return np.stack([cos_lat * np.cos(lons), cos_lat * np.sin(lons), np.sin(lats)], axis=-1)
+
+
+def chord_to_m(chord):
+    """ 単位球面上の弦の長さを大円距離（m）に変換する """
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.clip(np.asarray(chord, dtype=float) / 2, 0.0, 1.0))
+
+
+def m_to_chord(distance_m):
+    """ 大円距離（m）を単位球面上の弦の長さに変換する（chord_to_m の逆変換） """
+    return 2 * np.sin(np.minimum(np.asarray(distance_m, dtype=float) / (2 * EARTH_RADIUS_M), np.pi / 2))
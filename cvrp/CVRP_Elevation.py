@@ -0,0 +1,159 @@
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# 国土地理院 標高API
+GSI_ELEVATION_URL = "https://cyberjapandata2.gsi.go.jp/general/dem/scripts/getelevation.php"
+
+
+class ElevationProvider(ABC):
+    """
+    標高の取得元の共通インターフェース（サブクラスは get_elevations を実装する）
+    """
+
+    @abstractmethod
+    def get_elevations(self, lats, lons):
+        """
+        複数地点の標高
+        :param lats: 緯度の配列
+        :param lons: 経度の配列
+        :return: 標高（m）の numpy 配列（取得できなかった地点は NaN）
+        """
+
+    def get_elevation(self, lat, lon):
+        """ 1地点の標高（取得できない場合は None） """
+        elevation = self.get_elevations([lat], [lon])[0]
+        return None if np.isnan(elevation) else float(elevation)
+
+
+class LocalDEMProvider(ElevationProvider):
+    """
+    読み込み済みの標高ラスタ（CVRP_Geography.load_elev）から標高を取得する
+    :param geo: load_elev 済みの CVRP_Geography
+    :param decimals: 丸める小数点以下の桁数（GSI API と同じ 2 桁）
+    """
+
+    def __init__(self, geo, decimals=2):
+        self.geo = geo
+        self.decimals = decimals
+
+    def get_elevations(self, lats, lons):
+        return np.round(self.geo.get_elevations_from_latlon(lats, lons), self.decimals)
+
+
+class GSIElevationProvider(ElevationProvider):
+    """
+    国土地理院 標高API から標高を取得する
+    スレッドごとにセッションを作って使い回し、未取得の地点だけを max_workers 本まで並行して問い合わせる
+    （requests.Session はスレッドセーフとは明記されていないため、スレッド間で共有しない）。
+    結果（無効値 '-----' を含む）は座標を precision 桁に丸めたキーでディスクにキャッシュし、通信エラーの地点はキャッシュしない。
+    :param cache_file: キャッシュ（JSON）のパス。None の場合はメモリ上のみ
+    :param max_workers: 同時に送るリクエスト数の上限
+    :param retries: 接続エラー・429/5xx の再試行回数
+    :param timeout: 1リクエストのタイムアウト（秒）
+    :param precision: キャッシュキーの座標の桁数（6 桁で約 0.1 m）
+    :param url: APIのURL（テスト用のローカルサーバーに差し替え可能）
+    """
+
+    def __init__(self, cache_file="gsi_elevation_cache.json", max_workers=8, retries=3, timeout=10, precision=6, url=GSI_ELEVATION_URL):
+        self.cache_file = cache_file
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.precision = precision
+        self.url = url
+        self.retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504), allowed_methods=("GET",))
+
+        self.cache = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        if cache_file and os.path.exists(cache_file):
+            with open(cache_file, encoding="utf-8") as f:
+                self.cache = json.load(f)
+
+    @property
+    def session(self):
+        """ 呼び出したスレッド専用のセッション（初回に作成し、同じスレッドでは接続を使い回す） """
+        session = getattr(self._local, "session", None)
+        if session is None:
+            adapter = HTTPAdapter(max_retries=self.retry)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self._local.session = session
+        return session
+
+    def _key(self, lat, lon):
+        return f"{lat:.{self.precision}f},{lon:.{self.precision}f}"
+
+    def _request(self, key):
+        """ 1地点を問い合わせる（戻り値: (キー, 標高 or None, キャッシュしてよいか)） """
+        lat, lon = key.split(",")
+        try:
+            response = self.session.get(self.url, params={"lon": lon, "lat": lat, "outtype": "JSON"}, timeout=self.timeout)
+            response.raise_for_status()
+            elevation = response.json().get("elevation")
+            if elevation == "-----" or elevation is None:
+                return key, None, True
+            return key, round(float(elevation), 2), True
+        except requests.exceptions.RequestException as e:
+            print(f"エラー: 標高データの取得に失敗しました ({lat}, {lon}) - {e}")
+            return key, None, False
+        except ValueError as ve:
+            print(f"エラー: 標高データの変換に失敗しました（{lat}, {lon}）- {ve}")
+            return key, None, False
+
+    def get_elevations(self, lats, lons):
+        lats, lons = np.broadcast_arrays(np.asarray(lats, dtype=float), np.asarray(lons, dtype=float))
+        keys = [self._key(lat, lon) for lat, lon in zip(lats.ravel(), lons.ravel())]
+        missing = sorted({key for key in keys if key not in self.cache})
+
+        if missing:
+            if len(missing) == 1 or self.max_workers <= 1:
+                fetched = [self._request(key) for key in missing]
+            else:
+                with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                    fetched = list(pool.map(self._request, missing))
+            with self._lock:
+                for key, elevation, cacheable in fetched:
+                    if cacheable:
+                        self.cache[key] = elevation
+            self.save_cache()
+
+        values = [self.cache.get(key) for key in keys]
+        return np.array([np.nan if v is None else v for v in values], dtype=float).reshape(lats.shape)
+
+    def save_cache(self):
+        """ キャッシュをJSONに書き出す """
+        if not self.cache_file:
+            return
+        with self._lock:
+            tmp_path = f"{self.cache_file}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.cache, f)
+            os.replace(tmp_path, self.cache_file)
+
+
+class FallbackElevationProvider(ElevationProvider):
+    """
+    複数の取得元を順に試し、前の取得元で得られなかった地点（NaN）だけを次の取得元に問い合わせる
+    :param providers: 優先順の ElevationProvider
+    """
+
+    def __init__(self, *providers):
+        self.providers = providers
+
+    def get_elevations(self, lats, lons):
+        lats, lons = np.broadcast_arrays(np.asarray(lats, dtype=float), np.asarray(lons, dtype=float))
+        elevations = np.full(lats.shape, np.nan)
+        for provider in self.providers:
+            missing = np.isnan(elevations)
+            if not missing.any():
+                break
+            elevations[missing] = provider.get_elevations(lats[missing], lons[missing])
+        return elevations
@@ -0,0 +1,1802 @@
+import geopandas as gpd
+import folium
+import pandas as pd
+import random
+import requests
+import osmnx as ox
+import matplotlib.pyplot as plt
+import networkx as nx
+from itertools import combinations
+from shapely.geometry import Point
+import shapely
+import csv
+import numpy as np
+from shapely.geometry import LineString
+import time
+import os
+import xml.etree.ElementTree as ET
+import re
+import hashlib
+import json
+import scipy.ndimage
+import scipy.sparse
+import scipy.sparse.csgraph
+import scipy.spatial
+import matplotlib.colors as mcolors
+import statistics
+from concurrent.futures import ProcessPoolExecutor
+from .CVRP_Distance import haversine_m, latlon_to_unit_xyz, chord_to_m, m_to_chord
+from .CVRP_Elevation import GSIElevationProvider, LocalDEMProvider, FallbackElevationProvider
+from .CVRP_OSM import graph_from_osm_file
+from .CVRP_GraphStore import load_graph
+from .CVRP_RouteStore import save_route_store, RouteStore, ROUTE_STORE_VERSION
+from .CVRP_ContractionHierarchy import build_contraction_hierarchy, save_contraction_hierarchy, ContractionHierarchy, \
+    contraction_hierarchy_path, CONTRACTION_HIERARCHY_VERSION
+from .CVRP_Pipeline import Pipeline
+from .CVRP_BinaryStore import save_travel_time_matrix, load_travel_time_matrix, load_arrays, file_hash, save_tiled_raster, TiledRaster, \
+    DEM_TILE_SIZE, TILED_RASTER_VERSION
+
+# maxspeed が無いエッジの道路種別ごとの速度（km/h）の例（add_travel_time_weights / calculate_travel_times の highway_speeds に渡す）
+# 一般道は法定速度 60 km/h、生活道路は 30 km/h とした目安
+HIGHWAY_DEFAULT_SPEEDS = {
+    "motorway": 80, "motorway_link": 60, "trunk": 60, "trunk_link": 40,
+    "primary": 60, "primary_link": 40, "secondary": 50, "secondary_link": 40,
+    "tertiary": 40, "tertiary_link": 30, "unclassified": 30, "residential": 30, "living_street": 20,
+}
+
+# 移動時間行列の並列計算用ワーカーの状態（ワーカープロセスごとに1回だけ設定される）
+_travel_time_worker_state = {}
+
+
+def _init_travel_time_worker(data, indices, indptr, shape, target_indices):
+    """ ワーカー起動時にCSR配列を受け取り、以降のブロック計算で使い回す """
+    _travel_time_worker_state["csr"] = scipy.sparse.csr_matrix((data, indices, indptr), shape=shape)
+    _travel_time_worker_state["targets"] = target_indices
+
+
+def _travel_time_rows(block):
+    """ 起点ブロックの移動時間行（終点は拠点のみ）を計算する """
+    start, sources = block
+    csr = _travel_time_worker_state["csr"]
+    distances = scipy.sparse.csgraph.dijkstra(csr, directed=True, indices=sources)
+    return start, distances[:, _travel_time_worker_state["targets"]]
+
+
+# GML標高データ（基盤地図情報 DEM）の要素名
+_GML_NS = "{http://www.opengis.net/gml/3.2}"
+_GML_DEM_TAGS = {f"{_GML_NS}lowerCorner", f"{_GML_NS}upperCorner", f"{_GML_NS}high", f"{_GML_NS}tupleList"}
+# tupleList の各行「種別,標高値」から標高値だけを取り出す
+_GML_TUPLE_VALUE = re.compile(r",\s*([-+0-9.eE]+)")
+
+
+def parse_gml_dem_tile(xml_file):
+    """
+    GML標高データ1タイルを読み込む（補間は行わない）
+    ElementTree を全体で作らずに必要な要素だけを順に読み、tupleList の標高値は正規表現でまとめて数値化する
+    （プロセスプールから呼び出せるようにモジュール関数としている）
+    :param xml_file: GMLファイルのパス
+    :return: {"filename", "elevations", "lat_range", "lon_range"}、読み込めない場合は None
+    """
+    try:
+        found = {}
+        for _, elem in ET.iterparse(xml_file, events=("end",)):
+            if elem.tag in _GML_DEM_TAGS and elem.tag not in found:
+                found[elem.tag] = elem.text
+            elem.clear()
+
+        # 緯度経度の範囲を取得 / Get coordinate bounds
+        lat_min, lon_min = map(float, found[f"{_GML_NS}lowerCorner"].split())
+        lat_max, lon_max = map(float, found[f"{_GML_NS}upperCorner"].split())
+
+        # グリッドサイズ取得 / Get grid size
+        grid_x, grid_y = map(int, found[f"{_GML_NS}high"].split())
+        expected_size = (grid_x + 1) * (grid_y + 1)
+
+        # 標高データ取得 / Get elevation data
+        elevations = np.array(_GML_TUPLE_VALUE.findall(found[f"{_GML_NS}tupleList"]), dtype=float)
+        elevations[elevations == -9999.0] = np.nan  # 異常値をNaNに / Replace -9999 with NaN
+
+        # サイズ調整 / Adjust size if mismatched
+        if elevations.size < expected_size:
+            elevations = np.pad(elevations, (0, expected_size - elevations.size), mode='edge')
+        elif elevations.size > expected_size:
+            elevations = elevations[:expected_size]
+
+        # 配列の形状を設定（緯度 × 経度）/ Reshape as (lat, lon)
+        elevations = elevations.reshape((grid_y + 1, grid_x + 1))
+
+        return {
+            "filename": os.path.basename(xml_file),
+            "elevations": elevations,
+            "lat_range": (lat_min, lat_max),
+            "lon_range": (lon_min, lon_max)
+        }
+
+    except Exception as e:
+        print(f"❌ エラー: {xml_file} - {e}")
+        return None
+
+
+class CVRP_Geography:
+    def __init__(self, file_path, layer_name="town"):
+        """
+        初期化メソッド
+        :param file_path: TopoJSONファイルのパス
+        :param layer_name: 読み込むレイヤー名（デフォルトは "town"）
+        """
+        self.file_path = file_path
+        self.layer_name = layer_name
+        self.gdf = None
+        self.center_lat = None
+        self.center_lon = None
+        self.shelter_tree = None  # 避難所のKD木（load_shelters で作成）
+
+    def load_data(self):
+        """ TopoJSONファイルを読み込む """
+        try:
+            self.gdf = gpd.read_file(self.file_path, layer=self.layer_name)
+
+            # CRS（座標系）の設定（WGS84）
+            if self.gdf.crs is None:
+                self.gdf.set_crs(epsg=4326, inplace=True)
+
+            # 地図の中心座標を取得
+            self.center_lat = self.gdf.geometry.centroid.y.mean()
+            self.center_lon = self.gdf.geometry.centroid.x.mean()
+
+            print(f"成功: データの読み込みが完了しました。({self.layer_name})")
+        except Exception as e:
+            print(f"エラー: データの読み込みに失敗しました - {e}")
+
+    def save_csv(self, output_csv_path):
+        """
+        CSVファイルとして保存
+        :param output_csv_path: 保存するCSVファイルのパス
+        """
+        try:
+            columns_to_keep = ["PREF_NAME", "CITY_NAME", "S_NAME", "AREA", "JINKO", "SETAI", "X_CODE", "Y_CODE", "SUPPORT_NEEDS"]
+            if all(col in self.gdf.columns for col in columns_to_keep):
+                self.gdf[columns_to_keep].to_csv(output_csv_path, index=False, encoding='utf-8-sig')
+                print(f"CSVファイルが {output_csv_path} に保存されました。")
+            else:
+                print("必要なカラムがデータ内に見つかりませんでした。")
+        except Exception as e:
+            print(f"エラー: CSVファイルの保存に失敗しました - {e}")
+
+    def generate_map(self, output_html_path):
+        """
+        Foliumを使用して地図を生成し、HTMLファイルとして保存
+        :param output_html_path: 保存するHTMLファイルのパス
+        """
+        if self.gdf is None:
+            print("エラー: データをロードしてください。")
+            return
+
+        try:
+            m = folium.Map(location=[self.center_lat, self.center_lon], zoom_start=13, tiles="cartodbpositron")
+
+            # 各地区にマーカーを設置
+            for _, row in self.gdf.iterrows():
+                s_name = row["S_NAME"]      # 町名
+                area = row["AREA"]          # 面積
+                jinko = row["JINKO"]         # 人口
+                x_code = row["X_CODE"]       # 経度
+                y_code = row["Y_CODE"]       # 緯度
+                support_needs = row["SUPPORT_NEEDS"] # 要支援者人数
+
+                # ポップアップに表示する内容
+                popup_text = f"""
+                <b>町名:</b> {s_name}<br>
+                <b>面積:</b> {area:.2f} m²<br>
+                <b>人口:</b> {jinko} 人 <br>
+                <b>要支援者:</b> {support_needs} 人
+                """
+
+                # マーカーの追加
+                folium.Marker(
+                    location=[y_code, x_code],
+                    popup=folium.Popup(popup_text, max_width=300),
+                    icon=folium.Icon(color="blue", icon="info-sign")
+                ).add_to(m)
+
+            # GeoJSONレイヤーの追加
+            folium.GeoJson(
+                self.gdf.to_json(),
+                style_function=lambda x: {'color': 'red', 'weight': 2, 'fillOpacity': 0.3}
+            ).add_to(m)
+
+            # HTMLファイルとして保存
+            m.save(output_html_path)
+            print(f"地図が {output_html_path} に保存されました。")
+        except Exception as e:
+            print(f"エラー: 地図の生成に失敗しました - {e}")
+    
+    def assign_support_needs(self, total_support_needs):
+        """
+        総要支援者人数を地区の人口比率に基づいて割り振る
+        :param total_support_needs: 全体の要支援者の総数
+        """
+        if "JINKO" not in self.gdf.columns:
+            print("エラー: 人口（JINKO）データが存在しません。")
+            return
+
+        # 人口の合計を取得
+        total_population = self.gdf["JINKO"].sum()
+
+        # 各地区に要支援者を人口比で割り当て
+        self.gdf["SUPPORT_NEEDS"] = (self.gdf["JINKO"] / total_population * total_support_needs).round().astype(int)
+
+        print("要支援者人数の割り当てが完了しました。")
+
+    def load_shelters(self, csv_file, city_office_info=None):
+        """
+        避難所データのCSVファイルを読み込み、データフレームとして保存
+        :param csv_file: 避難所情報を含むCSVファイルのパス
+        """
+        try:
+            self.shelters_df = pd.read_csv(csv_file, encoding='shift_jis')
+
+            # "一時避難所" 以外の避難所をフィルタリング
+            self.shelters_df = self.shelters_df[self.shelters_df['備考'] != '一次避難所']
+            # 市役所の情報が提供された場合に追加
+            if city_office_info:
+                city_office_df = pd.DataFrame([city_office_info])
+                self.shelters_df = pd.concat([self.shelters_df, city_office_df], ignore_index=True)
+
+            self.build_shelter_index()
+            print(f"避難所データが正常にロードされました。対象避難所数: {len(self.shelters_df)}")
+        except Exception as e:
+            print(f"エラー: 避難所データの読み込みに失敗しました - {e}")
+
+    def build_shelter_index(self):
+        """ 避難所の座標（単位球面上の3次元座標）からKD木を作成する """
+        xyz = latlon_to_unit_xyz(self.shelters_df["緯度"].values.astype(float), self.shelters_df["経度"].values.astype(float))
+        self.shelter_tree = scipy.spatial.cKDTree(xyz.reshape(-1, 3))
+
+    def shelters_within(self, lats, lons, radius_m):
+        """
+        各地点から半径 radius_m 以内にある避難所を求める
+        :param lats: 緯度の配列
+        :param lons: 経度の配列
+        :param radius_m: 半径（m）
+        :return: 各地点について shelters_df の行番号のリスト
+        """
+        if self.shelter_tree is None:
+            self.build_shelter_index()
+        xyz = latlon_to_unit_xyz(np.atleast_1d(lats), np.atleast_1d(lons))
+        return self.shelter_tree.query_ball_point(xyz, r=float(m_to_chord(radius_m)))
+
+    def nearest_shelter(self, lats, lons):
+        """
+        各地点から最も近い避難所を求める
+        :param lats: 緯度の配列
+        :param lons: 経度の配列
+        :return: (距離（m）の配列, shelters_df の行番号の配列)。避難所が無い場合の距離は inf
+        """
+        if self.shelter_tree is None:
+            self.build_shelter_index()
+        xyz = latlon_to_unit_xyz(np.atleast_1d(lats), np.atleast_1d(lons))
+        if self.shelter_tree.n == 0:
+            return np.full(len(xyz), np.inf), np.full(len(xyz), -1)
+        chord, index = self.shelter_tree.query(xyz, k=1)
+        return chord_to_m(chord), index
+
+    def plot_shelters(self, output_html_path):
+        """
+        一時避難所以外の避難所を地図上に表示し、名称と想定収容人数を表示する
+        :param output_html_path: 保存するHTMLファイルのパス
+        """
+        if self.shelters_df is None or self.shelters_df.empty:
+            print("エラー: 避難所データがロードされていません。")
+            return
+
+        try:
+            # 欠損値を適切な値に置き換え（収容人数が不明の場合は0にする）
+            self.shelters_df["想定収容人数"] = self.shelters_df["想定収容人数"].fillna(0).astype(int)
+            m = folium.Map(location=[self.center_lat, self.center_lon], zoom_start=13, tiles="cartodbpositron")
+
+            for _, row in self.shelters_df.iterrows():
+                name = row["名称"]
+                capacity = row["想定収容人数"]
+                lat = row["緯度"]
+                lon = row["経度"]
+                category = row["備考"]
+
+                # 市役所は赤色アイコン、他の避難所は緑色アイコン
+                if category == "市役所":
+                    icon_color = "red"
+                    icon_type = "info-sign"
+                else:
+                    icon_color = "green"
+                    icon_type = "home"
+
+                popup_text = f"<b>避難所:</b> {name}<br><b>想定収容人数:</b> {int(capacity)} 人<br><b>備考:</b> {category}"
+
+                folium.Marker(
+                    location=[lat, lon],
+                    popup=folium.Popup(popup_text, max_width=300),
+                    icon=folium.Icon(color=icon_color, icon=icon_type)
+                ).add_to(m)
+
+            m.save(output_html_path)
+            print(f"避難所の地図が {output_html_path} に保存されました。")
+        except Exception as e:
+            print(f"エラー: 避難所の地図の生成に失敗しました - {e}")
+
+    def get_gsi_elevation(self, lat, lon):
+        """ 国土地理院APIを利用して標高を取得し、無効な値を処理 """
+        url = f"https://cyberjapandata2.gsi.go.jp/general/dem/scripts/getelevation.php?lon={lon}&lat={lat}&outtype=JSON"
+        try:
+            response = requests.get(url)
+            response.raise_for_status()  # HTTPリクエストのエラーチェック
+            data = response.json()
+
+            # 取得したレスポンスを表示（デバッグ用）
+            print(f"取得データ（{lat}, {lon}）: {data}")
+
+            if "elevation" in data:
+                elevation = data["elevation"]
+
+                # 標高データが '-----' などの無効な値かどうかをチェック
+                if elevation == "-----" or elevation is None:
+                    print(f"警告: 標高データが無効 ({lat}, {lon})")
+                    return None  # または return 0 に変更可
+
+                return round(float(elevation), 2)
+
+            else:
+                print(f"警告: 標高データが存在しない ({lat}, {lon})")
+                return None
+
+        except requests.exceptions.RequestException as e:
+            print(f"エラー: 標高データの取得に失敗しました ({lat}, {lon}) - {e}")
+            return None
+        except ValueError as ve:
+            print(f"エラー: 標高データの変換に失敗しました（{lat}, {lon}）- {ve}")
+            return None
+
+    def assign_random_support_needs(self, output_csv_path, map_output_html, min_distance_m=50, min_elevation_m=5.0, elevation_provider=None, seed=None):
+        """
+        各地区の要支援者をランダムに割り当て、位置情報と標高データを設定して保存
+        :param elevation_provider: 標高の取得元（CVRP_Elevation の ElevationProvider）。None の場合は国土地理院API（キャッシュ付き）
+        :param seed: 要支援者の位置・人数（demand）・優先度（priority）を生成する乱数のシード（None の場合は毎回異なる）
+        """
+        if self.gdf is None:
+            print("エラー: データをロードしてください。")
+            return
+        if elevation_provider is None:
+            elevation_provider = GSIElevationProvider()
+
+        assigned_data = []
+
+        # 避難所・市役所の標高はまとめて取得
+        shelter_elevations = elevation_provider.get_elevations(self.shelters_df["緯度"].values.astype(float),
+                                                               self.shelters_df["経度"].values.astype(float))
+        shelter_elevations = [None if np.isnan(e) else float(e) for e in shelter_elevations]
+
+        # 1. 市役所データを先に追加
+        id_counter = 0  # idのカウンタを0から開始
+        for k, (_, row) in enumerate(self.shelters_df.iterrows()):
+            if row['備考'] == '市役所':
+                entry_type = 'city_hall'
+                elevation = shelter_elevations[k]
+                assigned_data.append({
+                    'id': id_counter,  # idを設定
+                    'type': entry_type,
+                    'x': row['経度'],
+                    'y': row['緯度'],
+                    'z': elevation,  # elevationをzに変更
+                    'demand': 0,
+                    'priority': '-',
+                    'name': row['名称'],
+                    'capacity': row.get('想定収容人数', 0),
+                    'remarks': row.get('備考', '')
+                })
+                id_counter += 1  # idをインクリメント
+
+        # 2. 一般の避難所データを追加
+        for k, (_, row) in enumerate(self.shelters_df.iterrows()):
+            if row['備考'] != '市役所':
+                entry_type = 'shelter'
+                elevation = shelter_elevations[k]
+                assigned_data.append({
+                    'id': id_counter,  # idを設定
+                    'type': entry_type,
+                    'x': row['経度'],
+                    'y': row['緯度'],
+                    'z': elevation,  # elevationをzに変更
+                    'demand': 0,
+                    'priority': '-',
+                    'name': row['名称'],
+                    'capacity': row.get('想定収容人数', 0),
+                    'remarks': row.get('備考', '')
+                })
+                id_counter += 1  # idをインクリメント
+
+        # 3. 要配慮者データを追加（地区ごとに候補点をまとめて生成し、制約を配列で判定）
+        rng = np.random.default_rng(seed)
+        for _, row in self.gdf.iterrows():
+            support_needs = row['SUPPORT_NEEDS']
+            points = self.sample_support_need_points(row['geometry'], support_needs, elevation_provider, rng,
+                                                     min_distance_m=min_distance_m, min_elevation_m=min_elevation_m)
+            if len(points) < support_needs:
+                print(f"警告: {row['S_NAME']} は条件を満たす地点が {len(points)}/{support_needs} 件しか見つかりませんでした。")
+
+            for i, (lon, lat, elevation) in enumerate(points):
+                # 有効な座標と標高データで追加
+                assigned_data.append({
+                    'id': id_counter,
+                    'type': 'client',
+                    'x': lon,
+                    'y': lat,
+                    'z': elevation,
+                    'demand': int(rng.choice([1, 2])),
+                    'priority': int(rng.integers(1, 6)),
+                    'name': f"{row['S_NAME']}_{i+1}",
+                    'capacity': 0,
+                    'remarks': ''
+                })
+                id_counter += 1  # idをインクリメント
+
+        # データをDataFrameに変換してCSV保存
+        df_assigned = pd.DataFrame(assigned_data)
+        df_assigned.to_csv(output_csv_path, index=False, encoding='utf-8-sig')
+        print(f"要支援者データと避難所情報が {output_csv_path} に保存されました。")
+
+        # 地図の作成
+        m = folium.Map(location=[self.center_lat, self.center_lon], zoom_start=13, tiles="cartodbpositron")
+        for entry in assigned_data:
+            if entry['type'] == 'client':
+                popup_text = f"<b>名前:</b> {entry['name']}<br><b>人数:</b> {entry['demand']} 人<br><b>優先度:</b> {entry['priority']}<br><b>標高:</b> {entry['z']} m"
+                color, icon = "red", "user"
+            else:
+                popup_text = f"<b>避難所:</b> {entry['name']}<br><b>想定収容人数:</b> {entry['capacity']} 人<br><b>標高:</b> {entry['z']} m<br><b>備考:</b> {entry['remarks']}"
+                color, icon = ("blue", "info-sign") if entry['type'] == 'city_hall' else ("green", "home")
+
+            folium.Marker(
+                location=[entry['y'], entry['x']],
+                popup=folium.Popup(popup_text, max_width=300),
+                icon=folium.Icon(color=color, icon=icon)
+            ).add_to(m)
+
+        m.save(map_output_html)
+        print(f"地図が {map_output_html} に保存されました。")
+            
+            
+    def sample_support_need_points(self, polygon, k, elevation_provider, rng,
+                                   min_distance_m=50, min_elevation_m=5.0, batch_size=256, max_batch_size=50000, max_rounds=200):
+        """
+        地区ポリゴン内で条件を満たす要支援者の地点を k 個生成する
+        外接矩形内の候補点をまとめて生成し、ポリゴン内判定・避難所からの距離・標高の条件を配列で判定して、k 個になるまで補充する。
+        標高は問い合わせ件数を抑えるため、これまでの採用率から必要な件数だけを問い合わせる。
+        :param polygon: 地区のポリゴン
+        :param k: 必要な地点数
+        :param elevation_provider: 標高の取得元（ElevationProvider）
+        :param rng: numpy の乱数生成器
+        :param min_distance_m: 避難所からの最小距離（m）
+        :param min_elevation_m: 最低標高（m）
+        :param batch_size: 1回に生成する候補点数の下限
+        :param max_batch_size: 1回に生成する候補点数の上限
+        :param max_rounds: 候補点生成の最大回数（条件を満たす地点が無い地区で無限に探さないため）
+        :return: [(経度, 緯度, 標高), ...]（最大 k 個）
+        """
+        points = []
+        if k <= 0:
+            return points
+        shapely.prepare(polygon)
+        minx, miny, maxx, maxy = polygon.bounds
+        inside_rate = max(polygon.area / ((maxx - minx) * (maxy - miny)), 0.01) if maxx > minx and maxy > miny else 0.01
+        accept_rate = 1.0  # ポリゴン内・距離条件を満たした候補のうち標高条件も満たした割合
+
+        for _ in range(max_rounds):
+            remaining = k - len(points)
+            if remaining <= 0:
+                break
+
+            # ポリゴン内にランダムな候補点を生成
+            n = min(max(batch_size, int(np.ceil(remaining / (inside_rate * accept_rate) * 2))), max_batch_size)
+            lons = rng.uniform(minx, maxx, n)
+            lats = rng.uniform(miny, maxy, n)
+            mask = shapely.contains_xy(polygon, lons, lats)
+
+            # 最寄りの避難所までの距離をKD木で求め、min_distance_m 未満の候補を除外
+            if mask.any():
+                dists, _ = self.nearest_shelter(lats[mask], lons[mask])
+                mask[mask] = dists >= min_distance_m
+            lons, lats = lons[mask], lats[mask]
+
+            # 必要な件数の見込み分だけ標高を問い合わせ、最低標高未満・取得できない候補を除外
+            n_query = min(len(lats), int(np.ceil(remaining / accept_rate)))
+            if n_query == 0:
+                continue
+            elevations = elevation_provider.get_elevations(lats[:n_query], lons[:n_query])
+            valid = ~np.isnan(elevations) & (elevations >= min_elevation_m)
+            accept_rate = max(valid.mean(), 0.05)
+
+            for lon, lat, elevation in zip(lons[:n_query][valid], lats[:n_query][valid], elevations[valid]):
+                points.append((float(lon), float(lat), float(elevation)))
+        return points[:k]
+
+    def plot_colored_roads(self, graphml_file, output_filepath, nodes_csv=None):
+        """
+        道路種別ごとに色分けしたネットワーク図を保存する
+        :param graphml_file: GraphMLファイルのパス
+        :param output_filepath: 保存する画像ファイルのパス
+        :param nodes_csv: 指定した場合は拠点とスナップ先ノードも描画する
+        """
+        try:
+            G = load_graph(graphml_file)
+            print("ネットワークデータを読み込みました。")
+
+            road_colors = {
+                "trunk": "red",
+                "primary": "blue",
+                "secondary": "green",
+                "tertiary": "orange",
+            }
+
+            fig, ax = plt.subplots(figsize=(12, 12))
+
+            edge_groups = {}  # color: list of (xs, ys)
+            for u, v, k, data in G.edges(keys=True, data=True):
+                highway_type = data.get("highway")
+                if isinstance(highway_type, list):
+                    highway_type = highway_type[0]
+                highway_type = highway_type or "other"
+                color = road_colors.get(highway_type, "gray")
+
+                if "geometry" in data:
+                    xs, ys = data["geometry"].xy
+                else:
+                    # fallback to straight line if no geometry
+                    x1, y1 = G.nodes[u]["x"], G.nodes[u]["y"]
+                    x2, y2 = G.nodes[v]["x"], G.nodes[v]["y"]
+                    xs, ys = [x1, x2], [y1, y2]
+
+                edge_groups.setdefault(color, []).append((xs, ys))
+
+            # 描画
+            for color, lines in edge_groups.items():
+                for xs, ys in lines:
+                    ax.plot(xs, ys, color=color, linewidth=2)
+
+            # 凡例
+            legend_labels = {
+                "trunk": "Trunk",
+                "primary": "Primary",
+                "secondary": "Secondary",
+                "tertiary": "Tertiary",
+                "gray": "Other"
+            }
+            used_colors = set(edge_groups.keys())
+            handles = [plt.Line2D([0], [0], color=c, lw=2, label=legend_labels.get(k, "Other"))
+                    for k, c in road_colors.items() if c in used_colors]
+            if "gray" in used_colors:
+                handles.append(plt.Line2D([0], [0], color="gray", lw=2, label="Other"))
+
+            # 拠点とスナップ先ノード（スナップ結果を再利用）
+            if nodes_csv:
+                snapped_df = self.snap_nodes_to_graph(graphml_file, nodes_csv, G=G)
+                snapped_xs = [G.nodes[node]["x"] for node in snapped_df["graph_node"]]
+                snapped_ys = [G.nodes[node]["y"] for node in snapped_df["graph_node"]]
+                for x, y, sx, sy in zip(snapped_df["x"], snapped_df["y"], snapped_xs, snapped_ys):
+                    ax.plot([x, sx], [y, sy], color="black", linewidth=0.5)
+                ax.scatter(snapped_df["x"], snapped_df["y"], color="black", s=8, zorder=3)
+                handles.append(plt.Line2D([0], [0], color="black", marker="o", lw=0.5, label="Nodes (snapped)"))
+
+            ax.legend(handles=handles, title="Road Types", loc="upper left")
+            plt.title("Color-coded Road Types in Omaezaki City", fontsize=16)
+            plt.axis("off")
+            plt.savefig(output_filepath, dpi=300, bbox_inches="tight")
+            print(f"地図を保存しました: {output_filepath}")
+
+        except Exception as e:
+            print(f"エラー: 道路地図の生成に失敗しました - {e}")
+
+    def parse_maxspeeds(self, values):
+        """
+        maxspeed 属性の値（文字列・数値・リスト・None）を km/h の配列に変換する
+        リストの場合は最初の値を使い、数値に変換できない値や 0 以下は NaN とする。同じ値は1回だけ変換する。
+        :param values: エッジごとの maxspeed の値
+        :return: float64 の numpy 配列
+        """
+        parsed = {}
+        speeds = np.empty(len(values))
+        for i, value in enumerate(values):
+            key = tuple(value) if isinstance(value, list) else value
+            if key not in parsed:
+                speed = value[0] if isinstance(value, list) else value
+                try:
+                    speed = float(speed)
+                except (TypeError, ValueError):
+                    speed = np.nan
+                parsed[key] = speed if speed > 0 else np.nan
+            speeds[i] = parsed[key]
+        return speeds
+
+    def add_travel_time_weights(self, G, default_speed=30, highway_speeds=None):
+        """
+        全エッジの移動時間（秒）を配列でまとめて計算し、weight 属性に書き込む
+        :param G: MultiDiGraph
+        :param default_speed: maxspeed が無い（解釈できない）エッジの速度（km/h）
+        :param highway_speeds: maxspeed が無いエッジに使う道路種別ごとの速度 {highway: km/h}。
+                               highway がリストの場合は最初の値、辞書に無い種別は default_speed
+        :return: weight の numpy 配列（G.edges(keys=True) の順）
+        """
+        edge_data = [data for _, _, data in G.edges(data=True)]
+        lengths = np.array([data.get("length", 1) for data in edge_data], dtype=float)  # 距離 (m)
+        speeds = self.parse_maxspeeds([data.get("maxspeed") for data in edge_data])  # 制限速度 (km/h)
+
+        # 制限速度がない場合は道路種別ごとの速度、それも無ければデフォルト値を使用
+        missing = np.isnan(speeds)
+        if highway_speeds and missing.any():
+            for i in np.flatnonzero(missing):
+                highway = edge_data[i].get("highway")
+                if isinstance(highway, list):
+                    highway = highway[0]
+                speeds[i] = highway_speeds.get(highway, default_speed)
+        speeds[np.isnan(speeds)] = default_speed
+
+        # 移動時間（秒）を計算してエッジに追加
+        weights = lengths / (speeds * 1000 / 3600)
+        for data, weight in zip(edge_data, weights.tolist()):
+            data["weight"] = weight
+        return weights
+
+    def snapped_nodes_path(self, graphml_file):
+        """ GraphMLファイルに対応するスナップ結果CSVのパスを返す """
+        return f"{os.path.splitext(graphml_file)[0]}_snapped_nodes.csv"
+
+    def snap_nodes_to_graph(self, graphml_file, nodes_csv, G=None, force=False, snapped_csv=None):
+        """
+        拠点（omaezaki_nodes.csv の全行）をネットワーク上の最近傍ノードに一括でスナップし、
+        GraphMLファイルの隣に保存する。保存済みの結果が有効であれば再利用する。
+        :param graphml_file: GraphMLファイルのパス
+        :param nodes_csv: ノード情報を含むCSVファイルのパス
+        :param G: 読み込み済みのネットワーク（None の場合は必要なときだけ読み込む）
+        :param force: True の場合は保存済みの結果を使わずに再計算する
+        :param snapped_csv: スナップ結果の保存先（None の場合は GraphML の隣。同じネットワークを複数の拠点集合で使う場合に指定する）
+        :return: id, x, y, graph_node, snap_dist_m を列に持つDataFrame（拠点IDの順）
+        """
+        nodes_df = pd.read_csv(nodes_csv)
+        snapped_csv = snapped_csv or self.snapped_nodes_path(graphml_file)
+
+        # 保存済みのスナップ結果が「ネットワークより新しく、拠点座標が一致する」場合は再利用
+        if not force and os.path.exists(snapped_csv) and os.path.getmtime(snapped_csv) >= os.path.getmtime(graphml_file):
+            snapped_df = pd.read_csv(snapped_csv)
+            if (len(snapped_df) == len(nodes_df)
+                    and (snapped_df["id"].values == nodes_df["id"].values).all()
+                    and np.allclose(snapped_df[["x", "y"]].values, nodes_df[["x", "y"]].values)):
+                print(f"スナップ結果を再利用します: {snapped_csv}")
+                return snapped_df
+
+        if G is None:
+            G = load_graph(graphml_file)
+
+        # 全拠点を1回のベクトル化呼び出しでスナップ
+        graph_nodes, distances = ox.distance.nearest_nodes(G, X=nodes_df["x"].values, Y=nodes_df["y"].values, return_dist=True)
+
+        snapped_df = pd.DataFrame({
+            "id": nodes_df["id"].values,
+            "x": nodes_df["x"].values,
+            "y": nodes_df["y"].values,
+            "graph_node": graph_nodes,
+            "snap_dist_m": np.round(distances, 2),
+        })
+        snapped_df.to_csv(snapped_csv, index=False, encoding="utf-8-sig")
+        print(f"{len(snapped_df)} 拠点をネットワークにスナップしました（最大距離 {snapped_df['snap_dist_m'].max():.1f} m）: {snapped_csv}")
+        return snapped_df
+
+    def calculate_travel_times(self, graphml_file, nodes_csv, output_csv, output_matrix_csv, penalty=100000, output_symmetric_csv=None, backend="scipy", n_jobs=1,
+                               output_bin=None, incremental=False, highway_speeds=None, output_routes=None, snapped_csv=None, symmetric=False,
+                               output_directed_csv=None):
+        """
+        全てのノード間の移動時間を計算し、結果をバイナリ形式（およびCSVと行列形式）で保存
+        :param graphml_file: GraphMLファイルのパス
+        :param nodes_csv: ノード情報を含むCSVファイルのパス
+        :param output_csv: 結果を保存するCSVファイルのパス（None を渡した場合は保存しない）
+        :param output_matrix_csv: 行列形式の結果を保存するCSVファイルのパス（None を渡した場合は保存しない）
+        :param output_symmetric_csv: 対称行列を保存するCSVファイルのパス（None の場合は保存しない）
+        :param backend: 最短経路計算のバックエンド（"scipy" または参照実装の "networkx"）
+        :param n_jobs: 起点を分担して並列計算するプロセス数（None または 0 以下で全コア）
+        :param output_bin: 移動時間行列を float32 のバイナリ形式で保存するパス（None の場合は保存しない）
+        :param incremental: True の場合は output_bin の既存行列を再利用し、追加された拠点の行・列だけを計算する
+        :param highway_speeds: maxspeed が無いエッジに使う道路種別ごとの速度 {highway: km/h}（例: HIGHWAY_DEFAULT_SPEEDS）。None の場合は一律 30 km/h
+        :param output_routes: 拠点間のルート（起点ごとの最短経路木）を保存するパス（None の場合は保存しない。build_route_store を参照）
+        :param snapped_csv: スナップ結果の保存先（snap_nodes_to_graph を参照）
+        :param symmetric: False（既定）の場合は output_bin に有向（非対称）行列を、True の場合は従来の上三角を写した対称行列を保存する
+        :param output_directed_csv: 有向行列を保存するCSVファイルのパス（None の場合は保存しない）
+        :return: n×n の移動時間行列（有向, 行=起点, 列=終点）。読み込み・計算・保存に失敗した場合は例外を送出する
+        """
+        # グラフを読み込み
+        print("ネットワークデータを読み込んでいます...")
+        G = load_graph(graphml_file)
+        print("ネットワークデータを読み込みました。")
+
+        # エッジに移動時間（weight）を追加
+        self.add_travel_time_weights(G, highway_speeds=highway_speeds)
+
+        # ノードデータを読み込み、ネットワークにスナップ（保存済みなら再利用）
+        print("ノードデータを読み込んでいます...")
+        snapped_df = self.snap_nodes_to_graph(graphml_file, nodes_csv, G=G, snapped_csv=snapped_csv)
+        print("ノードデータを読み込みました。")
+
+        node_ids = snapped_df["id"].tolist()
+        graph_nodes = snapped_df["graph_node"].tolist()
+
+        # 道路種別ごとの速度を指定した場合は重みが変わるため、保存済み行列の照合キーにも含める
+        graph_hash = self.travel_time_graph_hash(graphml_file, highway_speeds)
+        matrix = None
+        if incremental and output_bin and os.path.exists(output_bin):
+            matrix = self.update_travel_time_matrix(G, graph_nodes, output_bin, graph_hash, penalty=penalty)
+        if matrix is None:
+            # 起点ごとに1回の単一始点探索で全終点の移動時間を求める
+            matrix = self.build_travel_time_matrix(G, graph_nodes, penalty=penalty, backend=backend, n_jobs=n_jobs)
+
+        self.save_travel_time_outputs(matrix, node_ids, output_csv, output_matrix_csv, output_symmetric_csv,
+                                      output_bin=output_bin, penalty=penalty, graph_hash=graph_hash, graph_nodes=graph_nodes,
+                                      symmetric=symmetric, output_directed_csv=output_directed_csv)
+        if output_routes:
+            self.build_route_store(G, snapped_df, output_routes, graph_hash=graph_hash)
+        return matrix
+
+    def travel_time_graph_hash(self, graphml_file, highway_speeds=None):
+        """ 保存済みの行列・ルート・縮約階層の照合に使う、GraphMLと重み条件（道路種別ごとの速度）のハッシュ """
+        graph_hash = file_hash(graphml_file)
+        if highway_speeds:
+            graph_hash += ":" + hashlib.sha1(json.dumps(highway_speeds, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+        return graph_hash
+
+    def update_travel_time_matrix(self, G, graph_nodes, previous_bin, graph_hash, penalty=100000):
+        """
+        既存の移動時間行列を再利用し、拠点の追加・削除分だけを更新する。
+        拠点の同一性はスナップ先のネットワークノードで判定するため、IDの振り直しにも対応する。
+        追加された拠点は、順方向の探索で行を、逆向きグラフの探索で列を求める。
+        :param G: weight 属性付きのネットワーク
+        :param graph_nodes: 新しい拠点集合のスナップ先ノード（拠点IDの順）
+        :param previous_bin: 既存の移動時間行列（バイナリ形式）のパス
+        :param graph_hash: 現在のGraphMLのハッシュ
+        :param penalty: ルートが見つからない場合の移動時間
+        :return: n×n の移動時間行列（既存の行列が使えない場合は None）
+        """
+        arrays, meta = load_arrays(previous_bin, mmap=False)
+        if meta.get("graph_hash") != graph_hash or meta.get("penalty") != float(penalty) or "graph_nodes" not in meta:
+            print("既存の移動時間行列はネットワークまたは条件が異なるため、全体を再計算します。")
+            return None
+
+        # 既存行列での位置（スナップ先ノード → 行番号）
+        previous = arrays.get("directed", arrays["matrix"]).astype(np.float64)
+        previous_index = {}
+        for i, node in enumerate(meta["graph_nodes"]):
+            previous_index.setdefault(node, i)
+
+        graph_nodes = [int(node) for node in graph_nodes]
+        n = len(graph_nodes)
+        old_positions = np.array([previous_index.get(node, -1) for node in graph_nodes])
+        kept = np.flatnonzero(old_positions >= 0)
+        added = np.flatnonzero(old_positions < 0)
+        removed = len(set(meta["graph_nodes"]) - set(graph_nodes))
+        print(f"差分更新: 既存 {len(kept)} 拠点を再利用, 追加 {len(added)} 拠点, 削除 {removed} 拠点")
+
+        matrix = np.full((n, n), float(penalty))
+        matrix[np.ix_(kept, kept)] = previous[np.ix_(old_positions[kept], old_positions[kept])]
+
+        if len(added):
+            graph_node_list, node_index, csr = self.graph_to_csr(G)
+            indices = np.array([node_index[node] for node in graph_nodes])
+            sources = indices[added]
+            # 追加拠点からの移動時間（行）と、追加拠点への移動時間（列 = 逆向きグラフでの探索）
+            forward = scipy.sparse.csgraph.dijkstra(csr, directed=True, indices=sources)
+            backward = scipy.sparse.csgraph.dijkstra(csr.T.tocsr(), directed=True, indices=sources)
+            matrix[added, :] = forward[:, indices]
+            matrix[:, added] = backward[:, indices].T
+
+        np.fill_diagonal(matrix, 0)
+        matrix[np.isinf(matrix)] = penalty
+        print(f"Travel time matrix updated with shape: {matrix.shape} (探索 {2 * len(added)} 回)")
+        return matrix
+
+    def build_travel_time_matrix(self, G, graph_nodes, penalty=100000, backend="scipy", n_jobs=1):
+        """
+        起点ごとに single-source Dijkstra を1回だけ実行し、全ノード間の移動時間行列を作成する
+        （ペアごとの探索 n(n-1) 回 → 起点ごとの探索 n 回）
+        :param G: weight 属性付きのネットワーク
+        :param graph_nodes: 各拠点に対応するネットワーク上のノード（拠点IDの順）
+        :param penalty: ルートが見つからない場合の移動時間
+        :param backend: "scipy"（CSR疎行列 + scipy.sparse.csgraph）または "networkx"（参照実装）
+        :param n_jobs: scipy バックエンドで起点を分担するプロセス数（None または 0 以下で全コア）
+        :return: n×n の移動時間行列（numpy.array, 行=起点, 列=終点）
+        """
+        if backend == "scipy":
+            matrix = self._travel_time_matrix_csr(G, graph_nodes, penalty, n_jobs=n_jobs)
+        elif backend == "networkx":
+            if n_jobs != 1:
+                print("警告: networkx バックエンドは並列化に対応していません。1プロセスで計算します。")
+            matrix = self._travel_time_matrix_networkx(G, graph_nodes, penalty)
+        else:
+            raise ValueError(f"未対応のbackendです: {backend}")
+
+        np.fill_diagonal(matrix, 0)
+        unreachable = int((matrix >= penalty).sum())
+        if unreachable:
+            print(f"ルートが見つからない組み合わせ: {unreachable} 件（移動時間 {penalty} として扱います）")
+        print(f"Travel time matrix created with shape: {matrix.shape} (backend={backend})")
+        return matrix
+
+    def _travel_time_matrix_networkx(self, G, graph_nodes, penalty):
+        """ NetworkX の single_source_dijkstra_path_length による参照実装 """
+        n = len(graph_nodes)
+        matrix = np.full((n, n), float(penalty))
+
+        # 同じネットワークノードに吸着した拠点は探索結果を共有する
+        columns_by_node = {}
+        for j, node in enumerate(graph_nodes):
+            columns_by_node.setdefault(node, []).append(j)
+
+        rows_by_node = {}
+        for i, source_node in enumerate(graph_nodes):
+            if source_node not in rows_by_node:
+                lengths = nx.single_source_dijkstra_path_length(G, source_node, weight="weight")
+                row = np.full(n, float(penalty))
+                for target_node, columns in columns_by_node.items():
+                    if target_node in lengths:
+                        row[columns] = lengths[target_node]
+                rows_by_node[source_node] = row
+            matrix[i] = rows_by_node[source_node]
+
+            if i % max(1, n // 20) == 0:
+                print(f"計算中: {i + 1}/{n} 起点（探索 {len(rows_by_node)} 回）")
+
+        return matrix
+
+    def _travel_time_matrix_csr(self, G, graph_nodes, penalty, n_jobs=1):
+        """ CSR疎行列に変換したネットワークに対して scipy.sparse.csgraph.dijkstra で一括計算する """
+        graph_node_list, node_index, csr = self.graph_to_csr(G)
+
+        # 同じネットワークノードに吸着した拠点は1回だけ探索する
+        indices = np.array([node_index[node] for node in graph_nodes])
+        unique_sources, source_rows = np.unique(indices, return_inverse=True)
+
+        if n_jobs is None or n_jobs < 1:
+            n_jobs = os.cpu_count() or 1
+        n_jobs = min(n_jobs, len(unique_sources)) or 1
+
+        print(f"CSRネットワーク（ノード {csr.shape[0]}, エッジ {csr.nnz}）で {len(unique_sources)} 起点を探索します（{n_jobs} プロセス）...")
+        if n_jobs == 1:
+            unique_rows = scipy.sparse.csgraph.dijkstra(csr, directed=True, indices=unique_sources)[:, indices]
+        else:
+            unique_rows = np.empty((len(unique_sources), len(indices)))
+            # 起点をブロックに分割し、各ワーカーは起動時に受け取ったCSR配列でブロックごとの行を計算する
+            block_size = max(1, -(-len(unique_sources) // (n_jobs * 4)))
+            blocks = [(start, unique_sources[start:start + block_size]) for start in range(0, len(unique_sources), block_size)]
+            with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_travel_time_worker,
+                                     initargs=(csr.data, csr.indices, csr.indptr, csr.shape, indices)) as executor:
+                for done, (start, rows) in enumerate(executor.map(_travel_time_rows, blocks), start=1):
+                    # 親プロセスが結果の行を出力行列へ直接書き込む
+                    unique_rows[start:start + len(rows)] = rows
+                    print(f"計算中: {done}/{len(blocks)} ブロック")
+
+        matrix = unique_rows[source_rows]
+        matrix[np.isinf(matrix)] = penalty
+        return matrix
+
+    def graph_to_csr(self, G, weight="weight"):
+        """
+        MultiDiGraph を圧縮疎行列（CSR）に変換する。平行エッジは最小の重みを採用する。
+        :param G: weight 属性付きのネットワーク
+        :param weight: 重みとして使うエッジ属性
+        :return: (ノードのリスト, ノード→行番号の辞書, scipy.sparse.csr_matrix)
+        """
+        graph_node_list = list(G.nodes)
+        node_index = {node: i for i, node in enumerate(graph_node_list)}
+        n = len(graph_node_list)
+
+        edges = [(node_index[u], node_index[v], data[weight]) for u, v, data in G.edges(data=True)]
+        if edges:
+            rows, cols, weights = (np.array(a) for a in zip(*edges))
+        else:
+            rows, cols, weights = np.array([], dtype=int), np.array([], dtype=int), np.array([], dtype=float)
+        rows = rows.astype(np.int32)
+        cols = cols.astype(np.int32)
+        weights = weights.astype(np.float64)
+
+        # (起点, 終点, 重み) の順に並べ、同じ (起点, 終点) の先頭＝最小重みだけを残す
+        order = np.lexsort((weights, cols, rows))
+        rows, cols, weights = rows[order], cols[order], weights[order]
+        keep = np.ones(len(rows), dtype=bool)
+        keep[1:] = (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])
+        rows, cols, weights = rows[keep], cols[keep], weights[keep]
+
+        # 重み0のエッジも辺として扱われるよう、data/indices/indptr から直接組み立てる
+        indptr = np.zeros(n + 1, dtype=np.int32)
+        np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+        csr = scipy.sparse.csr_matrix((weights, cols, indptr), shape=(n, n))
+        return graph_node_list, node_index, csr
+
+    def compare_travel_time_backends(self, graphml_file, nodes_csv, penalty=100000, atol=1e-6):
+        """
+        Omaezaki のネットワークで scipy バックエンドと NetworkX 参照実装の移動時間行列が一致するか確認する
+        :param graphml_file: GraphMLファイルのパス
+        :param nodes_csv: ノード情報を含むCSVファイルのパス
+        :param atol: 許容する絶対誤差（秒）
+        :return: 一致すれば True
+        """
+        G = load_graph(graphml_file)
+        self.add_travel_time_weights(G)
+
+        graph_nodes = self.snap_nodes_to_graph(graphml_file, nodes_csv, G=G)["graph_node"].tolist()
+
+        start = time.time()
+        reference = self.build_travel_time_matrix(G, graph_nodes, penalty=penalty, backend="networkx")
+        networkx_time = time.time() - start
+        start = time.time()
+        candidate = self.build_travel_time_matrix(G, graph_nodes, penalty=penalty, backend="scipy")
+        scipy_time = time.time() - start
+
+        max_diff = float(np.abs(reference - candidate).max()) if reference.size else 0.0
+        matched = max_diff <= atol
+        print(f"{'✅' if matched else '❌'} backend比較: 最大誤差 {max_diff:.3g} 秒 "
+              f"(networkx {networkx_time:.2f} 秒 / scipy {scipy_time:.2f} 秒)")
+        return matched
+
+    def report_asymmetry(self, matrix, penalty=100000, atol=0.5):
+        """
+        有向の移動時間行列と、上三角（i<j）を下三角に写した従来の対称行列との差を集計する
+        （一方通行などで往路と復路の移動時間が異なる拠点の組がどれだけあるか）
+        :param matrix: n×n の有向の移動時間行列
+        :param penalty: ルートが見つからない場合の移動時間
+        :param atol: 同じとみなす差（秒）
+        :return: 集計結果の辞書
+        """
+        matrix = np.asarray(matrix, dtype=np.float64)
+        i, j = np.triu_indices(len(matrix), k=1)
+        forward, backward = matrix[i, j], matrix[j, i]
+        # 対称行列では下三角（j→i）も上三角（i→j）の値になる
+        reachable = (forward < penalty) & (backward < penalty)
+        one_way = (forward < penalty) != (backward < penalty)
+        diff = np.abs(forward - backward)[reachable]
+        asymmetric = diff > atol
+        relative = diff / np.maximum(np.maximum(forward, backward)[reachable], 1e-9)
+
+        report = {
+            "pairs": int(len(i)),
+            "asymmetric_pairs": int(asymmetric.sum()),
+            "asymmetric_share": float(asymmetric.mean()) if len(diff) else 0.0,
+            "one_way_reachable_pairs": int(one_way.sum()),
+            "max_diff_s": float(diff.max()) if len(diff) else 0.0,
+            "mean_diff_s": float(diff[asymmetric].mean()) if asymmetric.any() else 0.0,
+            "mean_relative_diff": float(relative[asymmetric].mean()) if asymmetric.any() else 0.0,
+            # 対称行列の下三角（i→j の値）を実際の j→i の移動時間に置き換えた場合の合計の変化
+            "total_diff_s": float((backward - forward)[reachable].sum()),
+        }
+        print(f"有向行列と対称行列（上三角を写したもの）の差: 往復で移動時間が異なる組 {report['asymmetric_pairs']}/{len(diff)} "
+              f"({report['asymmetric_share']:.1%}), 最大 {report['max_diff_s']:.1f} 秒, 平均 {report['mean_diff_s']:.1f} 秒 "
+              f"(相対 {report['mean_relative_diff']:.1%}), 片方向のみ到達可能 {report['one_way_reachable_pairs']} 組")
+        return report
+
+    def save_travel_time_outputs(self, matrix, node_ids, output_csv=None, output_matrix_csv=None, output_symmetric_csv=None,
+                                 output_bin=None, penalty=100000, graph_hash=None, graph_nodes=None, symmetric=False, output_directed_csv=None):
+        """
+        移動時間行列を保存する。バイナリ（float32）が基本で、CSVは指定した場合のみ出力する。
+        バイナリの matrix は有向行列（symmetric=True の場合は従来の対称行列）で、もう一方も同じファイルに保存する。
+        従来のCSVは同じ形式（i<j の上三角のみ、それ以外は0）。
+        :param matrix: n×n の移動時間行列（有向, 行=起点, 列=終点）
+        :param node_ids: 行・列に対応する拠点ID
+        :param output_csv: 結果を保存するCSVファイルのパス（source_id, target_id, travel_time）
+        :param output_matrix_csv: 行列形式の結果を保存するCSVファイルのパス
+        :param output_symmetric_csv: 対称行列を保存するCSVファイルのパス（None の場合は保存しない）
+        :param output_bin: 行列をバイナリ形式で保存するパス（None の場合は保存しない）
+        :param penalty: ルートが見つからない場合の移動時間（バイナリのヘッダーに記録）
+        :param graph_hash: 計算に使ったGraphMLのハッシュ（バイナリのヘッダーに記録）
+        :param graph_nodes: 各拠点のスナップ先ノード（バイナリのヘッダーに記録し、差分更新に使う）
+        :param symmetric: True の場合はバイナリの matrix を対称行列にする
+        :param output_directed_csv: 有向行列を保存するCSVファイルのパス（None の場合は保存しない）
+        """
+        upper = np.triu(matrix, k=1)
+        # 上三角部分を下三角にコピーして対称行列を作成
+        symmetric_matrix = upper + upper.T
+        asymmetry = self.report_asymmetry(matrix, penalty=penalty)
+
+        if output_bin:
+            extra = {"graph_nodes": [int(node) for node in graph_nodes]} if graph_nodes is not None else {}
+            if symmetric:
+                # 差分更新で向きを保ったまま再利用できるよう、対称化前の行列も保存する
+                save_travel_time_matrix(output_bin, symmetric_matrix, node_ids, penalty, graph_hash=graph_hash,
+                                        arrays={"directed": matrix}, directed=False, asymmetry=asymmetry, **extra)
+            else:
+                save_travel_time_matrix(output_bin, matrix, node_ids, penalty, graph_hash=graph_hash,
+                                        arrays={"symmetric": symmetric_matrix}, directed=True, asymmetry=asymmetry, **extra)
+
+        travel_time_matrix = pd.DataFrame(upper, index=pd.Index(node_ids, name="source_id"), columns=pd.Index(node_ids, name="target_id"))
+        if output_csv:
+            travel_times_df = travel_time_matrix.stack().rename("travel_time").reset_index()
+            travel_times_df.to_csv(output_csv, index=False, encoding="utf-8-sig")
+            print(f"移動時間データを {output_csv} に保存しました。")
+
+        if output_matrix_csv:
+            travel_time_matrix.to_csv(output_matrix_csv, index=True, encoding="utf-8-sig")
+            print(f"行列形式の移動時間データを {output_matrix_csv} に保存しました。")
+
+        if output_symmetric_csv:
+            symmetric_matrix_df = pd.DataFrame(symmetric_matrix, index=node_ids, columns=node_ids)
+            symmetric_matrix_df.to_csv(output_symmetric_csv)
+            print(f"対称行列の移動時間データを {output_symmetric_csv} に保存しました。")
+
+        if output_directed_csv:
+            pd.DataFrame(matrix, index=node_ids, columns=node_ids).to_csv(output_directed_csv)
+            print(f"有向行列の移動時間データを {output_directed_csv} に保存しました。")
+            
+            
+    def build_route_store(self, G, snapped_df, output_routes, graph_hash=None):
+        """
+        拠点間のルートを、ペアごとのノード列ではなく起点ごとの最短経路木（先行ノード配列, int32）として保存する
+        起点ごとに return_predecessors=True の Dijkstra を1回実行し、同じノードにスナップした拠点は1行を共有する。
+        保存済みのファイルがあり、ネットワーク（graph_hash）が同じ場合は、既にある起点の行を再利用して追加分だけを探索する。
+        :param G: weight 属性付きのネットワーク
+        :param snapped_df: snap_nodes_to_graph の結果（id, x, y, graph_node）
+        :param output_routes: 保存先のパス
+        :param graph_hash: 計算に使ったGraphML（と重み条件）のハッシュ
+        :return: RouteStore
+        """
+        graph_node_list, node_index, csr = self.graph_to_csr(G)
+        graph_node_ids = np.array(graph_node_list, dtype=np.int64)
+        node_graph_index = np.array([node_index[node] for node in snapped_df["graph_node"].tolist()], dtype=np.int32)
+        sources = np.unique(node_graph_index)
+
+        predecessors = np.empty((len(sources), len(graph_node_list)), dtype=np.int32)
+        missing = np.ones(len(sources), dtype=bool)
+        if graph_hash and os.path.exists(output_routes):
+            previous = RouteStore(output_routes, mmap=False)
+            if (previous.meta.get("version") == ROUTE_STORE_VERSION and previous.meta.get("graph_hash") == graph_hash
+                    and np.array_equal(previous.graph_node_ids, graph_node_ids)):
+                for i, source in enumerate(sources.tolist()):
+                    if source in previous.row_of_source:
+                        predecessors[i] = previous.predecessors[previous.row_of_source[source]]
+                        missing[i] = False
+
+        print(f"ルートの最短経路木を作成します（起点 {len(sources)} 個, 探索 {int(missing.sum())} 回）...")
+        if missing.any():
+            _, found = scipy.sparse.csgraph.dijkstra(csr, directed=True, indices=sources[missing], return_predecessors=True)
+            predecessors[missing] = found
+
+        save_route_store(output_routes, predecessors, sources, graph_node_ids,
+                         [G.nodes[node]["x"] for node in graph_node_list], [G.nodes[node]["y"] for node in graph_node_list],
+                         snapped_df["id"].values, node_graph_index, snapped_df["x"].values, snapped_df["y"].values, graph_hash=graph_hash)
+        print(f"ルートを {output_routes} に保存しました（{predecessors.nbytes / 1e6:.1f} MB）。")
+        return RouteStore(output_routes)
+
+    def calculate_travel_times2(self, graphml_file, nodes_csv, output_csv, output_matrix_csv, penalty=100000, highway_speeds=None,
+                                output_routes="omaezaki_routes.bin"):
+        """
+        全てのノード間の移動時間を計算し、結果をCSVと行列形式で保存 + ルートを返す
+        ルートは起点ごとの最短経路木として output_routes に保存する。全ての組のリストが不要な場合は
+        RouteStore(output_routes).reconstruct_path(source_id, target_id) で必要な組だけを復元する
+        :param output_routes: ルートの保存先のパス
+        :return: 拠点の組（source_id < target_id の順の全組合せ）ごとの {"source_id", "target_id", "route"（ネットワークのノードIDのリスト）} のリスト。
+                 ルートが無い組は含まない
+        """
+        self.calculate_travel_times(graphml_file, nodes_csv, output_csv, output_matrix_csv, penalty=penalty,
+                                    highway_speeds=highway_speeds, output_routes=output_routes)
+        store = RouteStore(output_routes)
+        routes = []
+        for source_id, target_id in combinations(pd.read_csv(nodes_csv)["id"], 2):
+            route = store.reconstruct_path(source_id, target_id)
+            if route is not None:
+                routes.append({"source_id": source_id, "target_id": target_id, "route": route})
+        return routes  # ← ルート情報を返す
+
+    def load_contraction_hierarchy(self, graphml_file, output_file=None, highway_speeds=None, force=False):
+        """
+        道路ネットワークの縮約階層（CVRP_ContractionHierarchy）を読み込む。GraphMLの隣に有効なものが無ければ作成して保存する
+        事故・通行止めの発生時に、車両の現在地から新たな要支援者までなど、行列に無い地点間の移動時間を1回あたり1ミリ秒未満で求めるために使う
+        :param graphml_file: GraphMLファイルのパス（get_filtered_road_network の出力）
+        :param output_file: 保存先のパス（None の場合は GraphML の隣の <名前>.ch.bin）
+        :param highway_speeds: maxspeed が無いエッジに使う道路種別ごとの速度（calculate_travel_times と同じ重みにする）
+        :param force: True の場合は保存済みの縮約階層を使わずに作り直す
+        :return: ContractionHierarchy
+        """
+        output_file = output_file or contraction_hierarchy_path(graphml_file)
+        graph_hash = self.travel_time_graph_hash(graphml_file, highway_speeds)
+        if not force and os.path.exists(output_file):
+            hierarchy = ContractionHierarchy(output_file)
+            if hierarchy.meta.get("version") == CONTRACTION_HIERARCHY_VERSION and hierarchy.meta.get("graph_hash") == graph_hash:
+                return hierarchy
+            print(f"ネットワークが変わったため縮約階層を作り直します: {output_file}")
+
+        G = load_graph(graphml_file)
+        self.add_travel_time_weights(G, highway_speeds=highway_speeds)
+        graph_node_list, _, csr = self.graph_to_csr(G)
+
+        start = time.time()
+        rank, edges = build_contraction_hierarchy(csr)
+        save_contraction_hierarchy(output_file, rank, edges, graph_node_list,
+                                   [G.nodes[node]["x"] for node in graph_node_list], [G.nodes[node]["y"] for node in graph_node_list],
+                                   graph_hash=graph_hash)
+        hierarchy = ContractionHierarchy(output_file)
+        print(f"縮約階層を {output_file} に保存しました（ノード {hierarchy.meta['nodes']}, エッジ {hierarchy.meta['edges']}, "
+              f"ショートカット {hierarchy.meta['shortcuts']}, {time.time() - start:.2f} 秒）。")
+        return hierarchy
+
+    def benchmark_contraction_hierarchy(self, graphml_file, n_queries=1000, highway_speeds=None, seed=None, atol=1e-6):
+        """
+        ランダムなノードの組について、縮約階層の移動時間を nx.shortest_path_length（Dijkstra）と比較する
+        :param graphml_file: GraphMLファイルのパス
+        :param n_queries: 比較する組の数
+        :param highway_speeds: maxspeed が無いエッジに使う道路種別ごとの速度
+        :param seed: 乱数シード
+        :param atol: 一致とみなす誤差（秒）
+        :return: 結果の辞書（queries, mismatches, max_diff_s, ch_ms, networkx_ms。時間は1回あたりの平均）
+        """
+        hierarchy = self.load_contraction_hierarchy(graphml_file, highway_speeds=highway_speeds)
+        G = load_graph(graphml_file)
+        self.add_travel_time_weights(G, highway_speeds=highway_speeds)
+
+        rng = np.random.default_rng(seed)
+        node_list = list(G.nodes)
+        pairs = [(node_list[i], node_list[j]) for i, j in rng.integers(len(node_list), size=(n_queries, 2))]
+
+        start = time.time()
+        ch_results = [hierarchy.travel_time(source, target) for source, target in pairs]
+        ch_time = time.time() - start
+
+        start = time.time()
+        reference = []
+        for source, target in pairs:
+            try:
+                reference.append(nx.shortest_path_length(G, source, target, weight="weight"))
+            except nx.NetworkXNoPath:
+                reference.append(np.inf)
+        networkx_time = time.time() - start
+
+        ch_results, reference = np.array(ch_results), np.array(reference)
+        # 両方とも到達不能（inf）の組は一致とみなす
+        diffs = np.zeros(n_queries)
+        finite = ~(np.isinf(ch_results) & np.isinf(reference))
+        diffs[finite] = np.abs(ch_results[finite] - reference[finite])
+        result = {
+            "queries": n_queries,
+            "mismatches": int((diffs > atol).sum()),
+            "max_diff_s": float(diffs.max()) if n_queries else 0.0,
+            "ch_ms": ch_time / max(n_queries, 1) * 1000,
+            "networkx_ms": networkx_time / max(n_queries, 1) * 1000,
+        }
+        print(f"{'✅' if result['mismatches'] == 0 else '❌'} 縮約階層: {n_queries} 組で不一致 {result['mismatches']} 組, 最大誤差 {result['max_diff_s']:.3g} 秒, "
+              f"1回あたり {result['ch_ms']:.3f} ms（nx.shortest_path_length {result['networkx_ms']:.3f} ms, "
+              f"{result['networkx_ms'] / max(result['ch_ms'], 1e-9):.0f} 倍）")
+        return result
+
+    def set_vehicle_info(self, num_vehicles, vehicle_capacity, vehicle_file="omaezaki_vehicles.csv"):
+        """
+        車両情報を設定するメソッド
+        :param num_vehicles: 車両の台数
+        :param vehicle_capacity: 各車両の容量
+        :param vehicle_file: 車両情報を保存するCSVファイル名
+        """
+
+        # 車両の生成
+        vehicles = [{"id": i, "capacity": vehicle_capacity} for i in range(num_vehicles)]
+        df_vehicles = pd.DataFrame(vehicles)
+
+        # CSV保存
+        df_vehicles.to_csv(vehicle_file, index=False, columns = ["id", "capacity"])
+
+        return vehicles
+    
+    
+    def interpolate_points(self, lat1, lon1, lat2, lon2, distance, interval_m=5):
+        """緯度経度を指定して5m間隔で補間点を作る"""
+        start = np.array([lat1, lon1])
+        end = np.array([lat2, lon2])
+
+        # 総距離（メートル単位）
+        num_points = int(distance // interval_m)
+
+        if num_points <= 1:
+            return [(lat1, lon1), (lat2, lon2)]
+
+        lats = np.linspace(lat1, lat2, num_points + 1)
+        lons = np.linspace(lon1, lon2, num_points + 1)
+        return list(zip(lats, lons))
+    
+    def latlon_to_int_id(self, lat, lon):
+        return int(lat * 1e7) * 10**9 + int(lon * 1e7)
+
+    def download_road_network(self, include_types=None, exclude_types=None, osm_file=None, clip=None):
+        """
+        OpenStreetMap から御前崎市の道路ネットワーク（drive）を取得する
+        :param include_types: 含める道路種別（highway）のリスト
+        :param exclude_types: 除外する道路種別（highway）のリスト
+        :param osm_file: ローカルの OSM データ（.osm / .osm.pbf など）。指定した場合は Overpass API を使わずに作成する
+        :param clip: osm_file から切り出す範囲（shapely の Polygon または (西, 南, 東, 北)）。
+                     None の場合は load_data 済みなら地区ポリゴン全体、未読み込みなら切り出さない
+        :return: MultiDiGraph
+        """
+        if osm_file:
+            if clip is None and self.gdf is not None:
+                clip = shapely.union_all(self.gdf.geometry.values)
+            if isinstance(clip, (tuple, list)):
+                return graph_from_osm_file(osm_file, bbox=clip, include_types=include_types, exclude_types=exclude_types)
+            return graph_from_osm_file(osm_file, polygon=clip, include_types=include_types, exclude_types=exclude_types)
+
+        if include_types:
+            custom_filter = '["highway"~"' + "|".join(include_types) + '"]'
+        elif exclude_types:
+            custom_filter = '["highway"!~"' + "|".join(exclude_types) + '"]'
+        else:
+            custom_filter = None
+
+        return ox.graph_from_place("Omaezaki, Shizuoka, Japan", network_type="drive", custom_filter=custom_filter)
+
+    def sample_edge_elevations(self, G, n=10):
+        """
+        各エッジをn分割した点の標高を1回だけ取得する（標高しきい値ごとの判定で使い回す）。
+        全エッジの補間点を1本の配列（エッジごとの開始位置 offsets 付き）にまとめ、標高を一括で取得する。
+        :param G: 道路ネットワーク
+        :param n: エッジの分割数
+        :return: (エッジのリスト [(u, v, key, data)], 標高サンプル（辞書）, エッジごとの距離のリスト)
+                 標高サンプルは elevations（全点の標高）, offsets（各エッジの先頭位置）, counts（各エッジの点数）,
+                 valid（標高判定できるエッジか）を持つ
+        """
+        edges = list(G.edges(keys=True, data=True))
+
+        node_index = {node: i for i, node in enumerate(G.nodes)}
+        node_lats = np.array([data["y"] for _, data in G.nodes(data=True)], dtype=float)
+        node_lons = np.array([data["x"] for _, data in G.nodes(data=True)], dtype=float)
+        u_idx = np.array([node_index[u] for u, _, _, _ in edges], dtype=np.intp)
+        v_idx = np.array([node_index[v] for _, v, _, _ in edges], dtype=np.intp)
+        lat1, lon1 = node_lats[u_idx], node_lons[u_idx]
+        lat2, lon2 = node_lats[v_idx], node_lons[v_idx]
+
+        distances = haversine_m(lat1, lon1, lat2, lon2)
+
+        ####対象edgeをn分割した点の数（interpolate_points と同じ規則）
+        interval = np.round(distances / n, 1)
+        valid = interval > 0  # 間隔が0になる極短エッジは標高判定しない
+        num_points = np.floor_divide(distances, np.where(valid, interval, 1.0)).astype(np.int64)
+        counts = np.where(num_points <= 1, 2, num_points + 1)
+        offsets = np.zeros(len(edges), dtype=np.int64)
+        np.cumsum(counts[:-1], out=offsets[1:])
+
+        # 各点のエッジ上の位置 t（0〜1）を平坦な配列で作成し、全点の緯度経度を一括で補間
+        edge_of_point = np.repeat(np.arange(len(edges)), counts)
+        step = np.arange(counts.sum()) - offsets[edge_of_point]
+        t = step / (counts[edge_of_point] - 1)
+        lats = lat1[edge_of_point] + (lat2 - lat1)[edge_of_point] * t
+        lons = lon1[edge_of_point] + (lon2 - lon1)[edge_of_point] * t
+
+        # 全点の標高を1回で取得（範囲外は NaN）
+        elevations = self.get_elevations_from_latlon(lats, lons)
+
+        # 範囲外の点を含むエッジは標高判定できない（削除しない）
+        if len(edges):
+            valid &= np.add.reduceat(np.isnan(elevations), offsets) == 0
+        for idx in np.flatnonzero(~valid):
+            u, v, _, _ = edges[idx]
+            print(f"⚠️ エラー on edge {u}-{v}: 標高判定できないため削除対象外とします")
+        print(f"{len(edges)} エッジ・{len(elevations)} 点の標高を取得しました。")
+
+        samples = {"elevations": elevations, "offsets": offsets, "counts": counts, "valid": valid}
+        return edges, samples, distances.tolist()
+
+    def edge_high_fractions(self, samples, elevs):
+        """
+        各エッジについて、標高しきい値以上の点の割合を求める（エッジ単位の区間集計）
+        :param samples: sample_edge_elevations で得た標高サンプル
+        :param elevs: 標高しきい値のリスト
+        :return: エッジ数×しきい値数 の配列（標高を判定できないエッジは NaN）
+        """
+        counts = samples["counts"]
+        fractions = np.full((len(counts), len(elevs)), np.nan)
+        if len(counts) == 0:
+            return fractions
+        thresholds = np.asarray(elevs, dtype=float)
+        with np.errstate(invalid="ignore"):
+            high = samples["elevations"][:, None] >= thresholds[None, :]
+        num_high = np.add.reduceat(high.astype(np.int64), samples["offsets"], axis=0)
+        valid = samples["valid"]
+        fractions[valid] = num_high[valid] / counts[valid, None]
+        return fractions
+
+    def _save_filtered_network(self, G, edges, remove_mask, output_file, elev):
+        """ 削除対象以外のエッジで構成したネットワークを保存する """
+        H = G.copy()
+        H.remove_edges_from([(u, v, key) for (u, v, key, _), remove in zip(edges, remove_mask) if remove])
+        print(f"{int(remove_mask.sum())}/{len(edges)}件({remove_mask.sum()/len(edges):.2})のエッジを削除しました")
+        ox.save_graphml(H, filepath=output_file)
+        print(f"標高{elev}m超の部分のみで構成したネットワークを {output_file} に保存しました。")
+        return H
+
+    # osm_file, clip: download_road_network を参照（ローカルの OSM データから作成する場合）
+    # G: 取得済みのネットワーク（指定した場合は download_road_network を呼ばない）
+    def get_filtered_road_network(self, include_types=None, exclude_types=None, output_file="filtered_network.graphml", elev=50, n=10, nrate=0.5,
+                                  osm_file=None, clip=None, G=None):
+        if G is None:
+            G = self.download_road_network(include_types, exclude_types, osm_file=osm_file, clip=clip)
+
+        edges, samples, distances = self.sample_edge_elevations(G, n=n)
+
+        # highway属性の無いエッジは削除
+        no_highway = np.array(["highway" not in data for _, _, _, data in edges], dtype=bool)
+        for idx in np.flatnonzero(no_highway):
+            print(f"Edge {idx+1}: highwayなし → 削除予定")
+
+        ####対象edgeをn分割してrate%が対象標高以下ならば削除する（標高判定できないエッジは残す）
+        ratio = self.edge_high_fractions(samples, [elev])[:, 0]
+        remove_mask = no_highway | (ratio < nrate)
+
+        G = self._save_filtered_network(G, edges, remove_mask, output_file, elev)
+        print("egdeごとの距離")
+        print("最大値:", max(distances))
+        print("最小値:", min(distances))
+        print("平均:", statistics.mean(distances))
+        print("中央値:", statistics.median(distances))
+        print("標準偏差:", statistics.stdev(distances))  # 不偏分散の標準偏差
+        return G
+
+    def get_filtered_road_network_sweep(self, elevs, nrates=(0.5,), include_types=None, exclude_types=None,
+                                        output_pattern="omaezaki_≤{elev}melev.graphml", n=10, profile_csv=None, osm_file=None, clip=None, G=None):
+        """
+        道路ネットワークの取得と各エッジの標高サンプリングを1回だけ行い、
+        複数の標高しきい値（elev）× 割合（nrate）の組み合わせごとに絞り込んだGraphMLを出力する
+        :param elevs: 標高しきい値(m)のリスト（例: [0, 3, 5, 6, 7, 8, 9, 10, 11, 12]）
+        :param nrates: 削除判定に使う割合のリスト
+        :param output_pattern: 出力ファイル名のパターン（{elev}, {nrate} を置換）
+        :param n: エッジの分割数
+        :param profile_csv: 指定した場合はエッジごとの「しきい値以上の点の割合」をCSV保存する
+        :param osm_file: ローカルの OSM データ（download_road_network を参照）
+        :param clip: osm_file から切り出す範囲
+        :param G: 取得済みのネットワーク（指定した場合は download_road_network を呼ばない）
+        :return: {(elev, nrate): 出力ファイルのパス}
+        """
+        if len(nrates) > 1 and "{nrate}" not in output_pattern:
+            raise ValueError("複数の nrate を指定する場合は output_pattern に {nrate} を含めてください。")
+
+        if G is None:
+            G = self.download_road_network(include_types, exclude_types, osm_file=osm_file, clip=clip)
+        edges, samples, distances = self.sample_edge_elevations(G, n=n)
+
+        no_highway = np.array(["highway" not in data for _, _, _, data in edges], dtype=bool)
+        fractions = self.edge_high_fractions(samples, elevs)
+
+        if profile_csv:
+            profile_df = pd.DataFrame(fractions, columns=[f"ratio_ge_{e}m" for e in elevs])
+            profile_df.insert(0, "key", [key for _, _, key, _ in edges])
+            profile_df.insert(0, "v", [v for _, v, _, _ in edges])
+            profile_df.insert(0, "u", [u for u, _, _, _ in edges])
+            profile_df.to_csv(profile_csv, index=False, encoding="utf-8-sig")
+            print(f"エッジごとの標高割合を {profile_csv} に保存しました。")
+
+        outputs = {}
+        for t, elev in enumerate(elevs):
+            for nrate in nrates:
+                output_file = output_pattern.format(elev=elev, nrate=nrate)
+                # しきい値ごとの削除判定は保存済みの割合に対するマスク演算だけで済む
+                remove_mask = no_highway | (fractions[:, t] < nrate)
+                self._save_filtered_network(G, edges, remove_mask, output_file, elev)
+                outputs[(elev, nrate)] = output_file
+        return outputs
+
+    def load_elev(self, npfile, csvfile=None):
+        """
+        標高データを読み込む
+        :param npfile: merge_gml_elevation_tiles_10m が出力したタイル分割形式（.bin）または従来の .npy
+        :param csvfile: .npy の場合の緯度経度範囲CSV（latlon_range.csv）。.bin は範囲を同じファイルに持つため不要
+        """
+        if npfile.endswith(".bin"):
+            # タイル分割形式をメモリマップで開く（参照した地点のタイルだけが読み込まれる）
+            self.elevation_array = TiledRaster(npfile)
+            meta = self.elevation_array.meta
+            self.lat_min, self.lat_max = meta["lat_min"], meta["lat_max"]
+            self.lon_min, self.lon_max = meta["lon_min"], meta["lon_max"]
+            return
+
+        # 標高データを読み込む（メモリマップで開き、参照した行だけを読み込む）
+        self.elevation_array = np.load(npfile, mmap_mode="r")
+
+        # 緯度経度をCSVから読み込む（上記と同様）
+        with open(csvfile, mode="r") as f:
+            reader = csv.DictReader(f)
+            row = next(reader)
+            self.lat_min = float(row["lat_min"])
+            self.lat_max = float(row["lat_max"])
+            self.lon_min = float(row["lon_min"])
+            self.lon_max = float(row["lon_max"])
+
+        #print("✅ elevation_array shape:", elevation_array.shape)
+        #print("📍 緯度経度範囲:", lat_min, "～", lat_max, " / ", lon_min, "～", lon_max)
+        
+    def get_elevation_from_latlon(self, lat, lon):
+        """
+        指定された緯度経度から標高を取得する関数
+        Get elevation from specified latitude and longitude.
+
+        Parameters:
+            lat (float): 緯度 / Latitude
+            lon (float): 経度 / Longitude
+
+        Returns:
+            float: 指定地点の標高（範囲外は None） / Elevation value or None if out of bounds
+        """
+        nrows, ncols = self.elevation_array.shape
+
+        # 範囲チェック / Check if coordinates are within bounds
+        if not (self.lat_min <= lat <= self.lat_max) or not (self.lon_min <= lon <= self.lon_max):
+            print("❌ 指定した地点はデータの範囲外です。 / Location is outside data bounds.")
+            return None
+
+        # 緯度・経度を配列インデックスに変換 / Convert lat/lon to array indices
+        row_ratio = (self.lat_max - lat) / (self.lat_max - self.lat_min)
+        col_ratio = (lon - self.lon_min) / (self.lon_max - self.lon_min)
+
+        row = int(round(row_ratio * (nrows - 1)))
+        col = int(round(col_ratio * (ncols - 1)))
+
+        # 安全対策：インデックスが範囲外にならないように制限 / Clip indices to valid range
+        row = min(max(row, 0), nrows - 1)
+        col = min(max(col, 0), ncols - 1)
+
+        return self.elevation_array[row, col]
+
+    def get_elevations_from_latlon(self, lats, lons):
+        """
+        緯度経度の配列から標高を一括取得する（get_elevation_from_latlon の配列版）
+        Get elevations for arrays of latitudes and longitudes in one call.
+
+        Parameters:
+            lats (array-like): 緯度の配列 / Latitudes
+            lons (array-like): 経度の配列 / Longitudes
+
+        Returns:
+            numpy.ndarray: 各地点の標高（範囲外は NaN） / Elevations, NaN where out of bounds
+        """
+        lats, lons = np.broadcast_arrays(np.asarray(lats, dtype=float), np.asarray(lons, dtype=float))
+        nrows, ncols = self.elevation_array.shape
+
+        # 範囲チェック / Check if coordinates are within bounds
+        inside = (self.lat_min <= lats) & (lats <= self.lat_max) & (self.lon_min <= lons) & (lons <= self.lon_max)
+
+        # 緯度・経度を配列インデックスに変換（範囲外は仮に0番目を参照）/ Convert lat/lon to array indices
+        row_ratio = np.where(inside, (self.lat_max - lats) / (self.lat_max - self.lat_min), 0.0)
+        col_ratio = np.where(inside, (lons - self.lon_min) / (self.lon_max - self.lon_min), 0.0)
+        rows = np.clip(np.rint(row_ratio * (nrows - 1)).astype(np.intp), 0, nrows - 1)
+        cols = np.clip(np.rint(col_ratio * (ncols - 1)).astype(np.intp), 0, ncols - 1)
+
+        return np.where(inside, self.elevation_array[rows, cols], np.nan)
+
+    # GML標高データの読み込み関数（補間は行わない）
+    # Function to parse GML elevation data (no interpolation here)
+    def parse_gml_dem_10m(self, xml_file):
+        return parse_gml_dem_tile(xml_file)
+
+
+    # GMLタイルを結合して補間処理を一括で行う関数
+    # Merge multiple GML tiles and apply interpolation afterward
+    def dem_source_hash(self, filepaths, **params):
+        """
+        DEMキャッシュのキー（入力タイルの内容と結合条件のハッシュ）
+        :param filepaths: GMLタイルのパス
+        :param params: 結合結果に影響する条件（平滑化の sigma, タイルサイズなど）
+        :return: SHA-1 の16進文字列
+        """
+        sha1 = hashlib.sha1(json.dumps(params, sort_keys=True).encode("utf-8"))
+        for filepath in sorted(filepaths, key=os.path.basename):
+            sha1.update(f"{os.path.basename(filepath)}:{file_hash(filepath)}\n".encode("utf-8"))
+        return sha1.hexdigest()
+
+    # n_jobs: タイル読み込みの並列プロセス数（1 は逐次, None は全コア）
+    # 同じタイル・条件で作成済みの {output_prefix}.bin があれば結合をやり直さずに読み込む（戻り値の配列は TiledRaster。use_cache=False で常に再作成）
+    # export_csv: True の場合のみ統合配列のCSV（{output_prefix}.csv）も出力する
+    def merge_gml_elevation_tiles_10m(self, input_dir, output_prefix="merged_10m_elevation", n_jobs=None, use_cache=True, export_csv=False,
+                                      latlon_csv="latlon_range.csv"):
+        filepaths = [os.path.join(input_dir, filename) for filename in os.listdir(input_dir) if filename.endswith('.xml')]
+
+        # キャッシュ確認 / Check cached raster
+        cache_file = f"{output_prefix}.bin"
+        sigma = 1
+        source_hash = self.dem_source_hash(filepaths, sigma=sigma, tile_size=DEM_TILE_SIZE, version=TILED_RASTER_VERSION)
+        if use_cache and os.path.exists(cache_file):
+            try:
+                cached = TiledRaster(cache_file)
+                if cached.meta.get("source_hash") == source_hash:
+                    print(f"♻️ 統合済みの標高データを再利用します: {cache_file} / Using cached merged DEM")
+                    meta = cached.meta
+                    return cached, meta["lat_min"], meta["lat_max"], meta["lon_min"], meta["lon_max"]
+            except Exception as e:
+                print(f"⚠️ キャッシュを読み込めないため再作成します: {cache_file} - {e}")
+
+        if n_jobs == 1 or len(filepaths) <= 1:
+            parsed = [parse_gml_dem_tile(filepath) for filepath in filepaths]
+        else:
+            max_workers = None if n_jobs is None or n_jobs <= 0 else n_jobs
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                parsed = list(pool.map(parse_gml_dem_tile, filepaths, chunksize=4))
+        results = [result for result in parsed if result]
+
+        if not results:
+            print("❌ 有効なデータが見つかりませんでした。 / No valid data found.")
+            return
+
+        print(f"📦 タイル読み込み完了: {len(results)} タイル / Loaded {len(results)} tiles")
+
+        # 解像度を取得 / Get resolution from sample tile
+        sample = results[0]
+        tile_rows, tile_cols = sample["elevations"].shape
+        lat_res = (sample["lat_range"][1] - sample["lat_range"][0]) / tile_rows
+        lon_res = (sample["lon_range"][1] - sample["lon_range"][0]) / tile_cols
+
+        # 全体の緯度経度範囲を算出 / Calculate overall lat/lon bounds
+        lat_min_all = min(r["lat_range"][0] for r in results)
+        lat_max_all = max(r["lat_range"][1] for r in results)
+        lon_min_all = min(r["lon_range"][0] for r in results)
+        lon_max_all = max(r["lon_range"][1] for r in results)
+
+        # 全体の配列サイズを決定 / Compute merged array size
+        total_rows = int(round((lat_max_all - lat_min_all) / lat_res))
+        total_cols = int(round((lon_max_all - lon_min_all) / lon_res))
+        merged_array = np.full((total_rows, total_cols), np.nan)  # 初期値は NaN / Initialize with NaNs
+
+        # 各タイルを正しい位置に挿入 / Place each tile in correct position
+        for r in results:
+            elev = r["elevations"]
+            lat_start, lat_end = r["lat_range"]
+            lon_start, lon_end = r["lon_range"]
+
+            row_start = int(round((lat_max_all - lat_end) / lat_res))
+            row_end = row_start + elev.shape[0]
+            col_start = int(round((lon_start - lon_min_all) / lon_res))
+            col_end = col_start + elev.shape[1]
+
+            merged_array[row_start:row_end, col_start:col_end] = elev
+
+        print(f"🗺 統合完了！ shape: {merged_array.shape} / Merge complete!")
+
+        # NaNを一括補間（最小値で埋めてから平滑化）
+        # Interpolate NaNs after merging (fill with min value, then smooth)
+        if np.any(np.isnan(merged_array)):
+            print("🔧 NaN を一括補間中... / Interpolating NaN values...")
+            filled = np.nan_to_num(merged_array, nan=np.nanmin(merged_array))
+            smoothed = scipy.ndimage.gaussian_filter(filled, sigma=sigma)
+            merged_array[np.isnan(merged_array)] = smoothed[np.isnan(merged_array)]
+            print("✅ 補間完了 / Interpolation complete")
+
+        # 結果を保存 / Save results
+        np.save(f"{output_prefix}.npy", merged_array)
+        print(f"✅ 統合配列を保存しました: {output_prefix}.npy")
+        if export_csv:
+            np.savetxt(f"{output_prefix}.csv", merged_array, delimiter=",", fmt="%.2f")
+            print(f"✅ 統合配列を保存しました: {output_prefix}.csv")
+
+        # タイル分割形式（範囲・解像度・キャッシュキーを含む）で保存 / Save as tiled raster with bounds and resolution
+        save_tiled_raster(cache_file, merged_array,
+                          lat_min=lat_min_all, lat_max=lat_max_all, lon_min=lon_min_all, lon_max=lon_max_all,
+                          lat_res=lat_res, lon_res=lon_res, source_hash=source_hash)
+
+        # 緯度経度範囲をCSVに保存 / Save lat/lon range to CSV
+        with open(latlon_csv, mode="w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["lat_min", "lat_max", "lon_min", "lon_max"])
+            writer.writerow([lat_min_all, lat_max_all, lon_min_all, lon_max_all])
+        print(f"✅ 緯度経度範囲を {latlon_csv} に保存しました。 / Saved coordinate range to {latlon_csv}")
+
+        return merged_array, lat_min_all, lat_max_all, lon_min_all, lon_max_all
+
+    def analyze_equivalence_classes(self, matrix_csv_path, output_csv_path="equivalence_classes.csv", penalty_threshold=1e5):
+        """
+        対称距離行列からグラフを構築し、同値類（連結成分）を判定・出力する。
+        行列をしきい値で二値化した疎な隣接行列（i<j の上三角）に対して連結成分をまとめて求める。
+        
+        :param matrix_csv_path: 対称距離行列のパス（バイナリ形式 .bin または CSV形式）
+        :param output_csv_path: 出力する同値類リストのCSVパス
+        :param penalty_threshold: パスがないとみなす距離のしきい値
+        """
+        matrix, meta = load_travel_time_matrix(matrix_csv_path)
+        node_ids = meta["node_ids"]
+
+        adjacency = scipy.sparse.triu(scipy.sparse.csr_matrix(np.asarray(matrix) < penalty_threshold), k=1)
+        _, labels = scipy.sparse.csgraph.connected_components(adjacency, directed=False)
+        return self.save_equivalence_classes(node_ids, labels, output_csv_path)
+
+    def analyze_equivalence_classes_from_graph(self, graphml_file, nodes_csv, output_csv_path="equivalence_classes.csv", connection="strong"):
+        """
+        移動時間行列を作らずに、道路ネットワークの連結成分から拠点の同値類を求める（行列計算の前の到達可能性の確認用）
+        拠点をスナップしたノードが同じ連結成分に属する拠点を同じ同値類とする。
+        行列から求める同値類（analyze_equivalence_classes）は、強連結成分による分類より粗く、弱連結成分による分類より細かい。
+        両者が一致する場合（一方通行で片側にしか行けない箇所が無い場合）は、行列から求めた結果と同じになる。
+
+        :param graphml_file: GraphMLファイルのパス
+        :param nodes_csv: ノード情報を含むCSVファイルのパス
+        :param output_csv_path: 出力する同値類リストのCSVパス
+        :param connection: "strong"（互いに到達可能）または "weak"（向きを無視して連結）
+        """
+        G = load_graph(graphml_file)
+        snapped_df = self.snap_nodes_to_graph(graphml_file, nodes_csv, G=G)
+        _, node_index, csr = self.graph_to_csr(G, weight="length")
+        graph_indices = np.array([node_index[node] for node in snapped_df["graph_node"]], dtype=np.int64)
+
+        _, strong = scipy.sparse.csgraph.connected_components(csr, directed=True, connection="strong")
+        _, weak = scipy.sparse.csgraph.connected_components(csr, directed=True, connection="weak")
+        strong_classes = len(np.unique(strong[graph_indices]))
+        weak_classes = len(np.unique(weak[graph_indices]))
+        if strong_classes != weak_classes:
+            print(f"⚠️ 強連結での同値類 {strong_classes} 個と弱連結での同値類 {weak_classes} 個が異なります"
+                  f"（行列から求める同値類の数はこの間になります）。")
+
+        labels = (strong if connection == "strong" else weak)[graph_indices]
+        return self.save_equivalence_classes(snapped_df["id"].tolist(), labels, output_csv_path)
+
+    def save_equivalence_classes(self, node_ids, labels, output_csv_path):
+        """
+        拠点ごとの連結成分ラベルから同値類リストを作成して保存する
+        同値類の番号は拠点IDの並びで最初に現れた順に 1 から振る。
+
+        :param node_ids: 拠点ID
+        :param labels: 拠点ごとの連結成分ラベル
+        :param output_csv_path: 出力する同値類リストのCSVパス
+        """
+        _, first, inverse = np.unique(labels, return_index=True, return_inverse=True)
+        class_numbers = np.argsort(np.argsort(first)) + 1
+        classes = class_numbers[inverse]
+        num_classes = len(first)
+
+        # 構造化して保存
+        df_output = pd.DataFrame({"equivalence_class": classes, "node_id": node_ids})
+        df_output = df_output.sort_values(["equivalence_class", "node_id"], kind="stable").reset_index(drop=True)
+        df_output.to_csv(output_csv_path, index=False, encoding='utf-8-sig')
+
+        # 簡易出力
+        print(f"✅ 同値類（連結成分）の数: {num_classes}")
+        sizes = np.bincount(classes)[1:]
+        for idx, size in enumerate(sizes, start=1):
+            print(f"  - 同値類 {idx}: {size} ノード")
+
+        print(f"💾 結果を {output_csv_path} に保存しました。")
+
+        return df_output
+
+     
+    def build_pipeline(self, elev=0, nrate=0.5, nodes_csv="omaezaki_nodes.csv", dem_dir="PackDLMap_xml_10m", dem_prefix="PackDLMap_xml_10m_output",
+                       include_types=None, exclude_types=None, osm_file=None, clip=None, n=10, penalty=100000, highway_speeds=None,
+                       n_jobs=None, export_csv=True, symmetric=False, with_hierarchy=False, state_file="pipeline_state.json"):
+        """
+        DEM結合から移動時間行列・同値類までの処理をステージの依存関係（CVRP_Pipeline.Pipeline）として宣言する
+            dem_merge → road_download → road_filter → road_plot
+                                                   → snap → travel_times → equivalence
+                                                   → contraction_hierarchy（with_hierarchy=True の場合のみ）
+        各ステージは入力ファイルの内容と条件が前回と同じなら省略される（拠点CSVの変更では snap 以降だけを実行する）。
+        :param elev: 標高しきい値(m)
+        :param nrate: エッジを残す「しきい値以上の点の割合」
+        :param nodes_csv: 拠点のCSV
+        :param dem_dir: GMLタイルのディレクトリ
+        :param dem_prefix: 結合したDEMの出力先（拡張子なし）
+        :param include_types: 含める道路種別（download_road_network を参照）
+        :param exclude_types: 除外する道路種別
+        :param osm_file: ローカルの OSM データ（指定した場合はファイルの内容も入力として扱う）
+        :param clip: osm_file から切り出す範囲
+        :param n: エッジの分割数
+        :param penalty: ルートが見つからない場合の移動時間
+        :param highway_speeds: maxspeed が無いエッジの道路種別ごとの速度
+        :param n_jobs: 移動時間行列の並列プロセス数
+        :param export_csv: True の場合は移動時間のCSVも出力する（False の場合、既存のCSVは更新されず .bin と内容が異なりうる）
+        :param symmetric: True の場合は従来の対称行列（omaezaki_symmetric_travel_time_matrix.bin）を作成する（既定は有向行列）。
+                          もう一方の形式の行列が残っている場合は削除する
+        :param with_hierarchy: True の場合は任意の地点間の移動時間を求める縮約階層（<GraphML名>.ch.bin）も作成する
+        :param state_file: 各ステージのキーを記録する状態ファイル
+        :return: Pipeline（run() で実行）
+        """
+        pipeline = Pipeline(state_file)
+        dem_bin = f"{dem_prefix}.bin"
+        raw_graphml = "omaezaki_drive.graphml"
+        graphml_file = f"omaezaki_≤{elev}melev.graphml"
+        snapped_csv = self.snapped_nodes_path(graphml_file)
+        output_bin = "omaezaki_symmetric_travel_time_matrix.bin" if symmetric else "omaezaki_directed_travel_time_matrix.bin"
+        output_routes = "omaezaki_routes.bin"
+        output_hierarchy = contraction_hierarchy_path(graphml_file)
+        output_csv = "omaezaki_travel_time.csv" if export_csv else None
+        output_matrix_csv = "omaezaki_travel_time_matrix.csv" if export_csv else None
+        output_symmetric_csv = "omaezaki_symmetric_travel_time_matrix.csv" if export_csv else None
+        output_directed_csv = "omaezaki_directed_travel_time_matrix.csv" if export_csv and not symmetric else None
+        travel_time_outputs = [output_bin, output_routes] + [path for path in (output_csv, output_matrix_csv, output_symmetric_csv, output_directed_csv) if path]
+        # symmetric を切り替える前に作成したもう一方の行列。最適化側は有向行列（.bin または .csv）があればそちらを読み込むため残さない
+        other_outputs = (["omaezaki_directed_travel_time_matrix.bin", "omaezaki_directed_travel_time_matrix.csv"] if symmetric
+                         else ["omaezaki_symmetric_travel_time_matrix.bin"])
+
+        def download():
+            ox.save_graphml(self.download_road_network(include_types, exclude_types, osm_file=osm_file, clip=clip), filepath=raw_graphml)
+
+        def filter_network():
+            self.load_elev(dem_bin)
+            self.get_filtered_road_network(output_file=graphml_file, elev=elev, n=n, nrate=nrate, G=load_graph(raw_graphml))
+
+        def travel_times():
+            self.calculate_travel_times(graphml_file, nodes_csv, output_csv, output_matrix_csv, penalty=penalty,
+                                        output_symmetric_csv=output_symmetric_csv, n_jobs=n_jobs, output_bin=output_bin,
+                                        incremental=True, highway_speeds=highway_speeds, output_routes=output_routes,
+                                        symmetric=symmetric, output_directed_csv=output_directed_csv)
+            for path in other_outputs:
+                if os.path.exists(path):
+                    os.remove(path)
+                    print(f"🗑️ 設定と異なる古い移動時間行列を削除しました: {path}")
+
+        pipeline.add_stage("dem_merge", lambda: self.merge_gml_elevation_tiles_10m(dem_dir, output_prefix=dem_prefix),
+                           inputs=[dem_dir], outputs=[dem_bin])
+        pipeline.add_stage("road_download", download, inputs=[osm_file] if osm_file else [], outputs=[raw_graphml],
+                           params={"include_types": include_types, "exclude_types": exclude_types, "osm_file": osm_file, "clip": clip})
+        pipeline.add_stage("road_filter", filter_network, inputs=[raw_graphml, dem_bin], outputs=[graphml_file],
+                           params={"elev": elev, "nrate": nrate, "n": n})
+        pipeline.add_stage("road_plot", lambda: self.plot_colored_roads(graphml_file, f"omaezaki_road_map_≤{elev}melev.png"),
+                           inputs=[graphml_file], outputs=[f"omaezaki_road_map_≤{elev}melev.png"])
+        pipeline.add_stage("snap", lambda: self.snap_nodes_to_graph(graphml_file, nodes_csv, force=True),
+                           inputs=[graphml_file, nodes_csv], outputs=[snapped_csv])
+        pipeline.add_stage("travel_times", travel_times, inputs=[graphml_file, nodes_csv, snapped_csv],
+                           outputs=travel_time_outputs,
+                           params={"penalty": penalty, "highway_speeds": highway_speeds, "symmetric": symmetric})
+        pipeline.add_stage("equivalence", lambda: self.analyze_equivalence_classes(output_bin, "equivalence_classes.csv"),
+                           inputs=[output_bin], outputs=["equivalence_classes.csv"])
+        if with_hierarchy:
+            # 保存済みの縮約階層が同じネットワーク・重みのものなら load_contraction_hierarchy がそのまま使う
+            pipeline.add_stage("contraction_hierarchy",
+                               lambda: self.load_contraction_hierarchy(graphml_file, output_file=output_hierarchy, highway_speeds=highway_speeds),
+                               inputs=[graphml_file], outputs=[output_hierarchy], params={"highway_speeds": highway_speeds})
+        return pipeline
+
+
+def main(elev=0, export_csv=True):
+    """
+    シナリオの 1.Geography ディレクトリで実行する（入力・出力ともカレントディレクトリ）
+    :param elev: 標高しきい値(m)（この標高以下の道路を削除する）
+    :param export_csv: False の場合は移動時間のCSVを出力しない（.bin だけを作成する。既存のCSVは更新されない）
+    """
+    start = time.time()  # 開始時刻
+    
+    # クラスのインスタンス化
+    geo = CVRP_Geography("r2ka22223.topojson")
+    print('インスタンス化完了', time.time() - start)
+    
+    #対象高度(m)以下を削除したネットワークから移動時間行列（有向: omaezaki_directed_travel_time_matrix.bin, Gurobi・GAが読み込む）と
+    #拠点間のルート（omaezaki_routes.bin）を作るまでの処理をステージとして宣言する
+    #  dem_merge（高度情報のbin化）→ road_download（OSM取得）→ road_filter（標高で絞り込み）→ road_plot（可視化）
+    #                                                          → snap（拠点のスナップ）→ travel_times（移動時間行列）→ equivalence（同値類）
+    #                                                          → contraction_hierarchy（任意の地点間の移動時間を求める縮約階層, with_hierarchy=True の場合のみ）
+    #入力ファイルの内容と条件が前回（pipeline_state.json）と同じステージは省略される。omaezaki_nodes.csv を変更した場合は snap 以降だけを実行する
+    pipeline = geo.build_pipeline(elev=elev, nrate=0.5, nodes_csv="omaezaki_nodes.csv", export_csv=export_csv, n_jobs=None)#exclude_types=["trunk"],
+    
+    #要支援者ノード作成(2025/05/09追加)「omaezaki_nodes.csv」の変更が必要無い場合はコメントアウト
+    '''
+    pipeline.run(["dem_merge"])
+    geo.load_elev("PackDLMap_xml_10m_output.bin")
+    geo.load_data()
+    geo.assign_support_needs(total_support_needs=300)
+    geo.load_shelters("【2024.10.16】御前崎市避難所一覧.csv", city_office_info={
+        "名称": "御前崎市役所", "想定収容人数": 0, "緯度": 34.637984, "経度": 138.128125, "備考": "市役所"
+    })
+    # 標高は国土地理院API（並行取得・gsi_elevation_cache.json にキャッシュ）から取得し、取得できない地点は読み込み済みのDEMで補う
+    elevation_provider = FallbackElevationProvider(GSIElevationProvider(cache_file="gsi_elevation_cache.json"), LocalDEMProvider(geo))
+    geo.assign_random_support_needs("omaezaki_nodes.csv", "omaezaki_nodes_map.html", min_distance_m=50, min_elevation_m=12.0,
+                                    elevation_provider=elevation_provider, seed=None)
+    print('要支援者と避難所のノード生成完了', time.time() - start)
+    '''
+
+    #全標高シナリオのネットワークを1回の取得・標高サンプリングでまとめて作成する場合
+    '''
+    pipeline.run(["dem_merge"])
+    geo.load_elev("PackDLMap_xml_10m_output.bin")
+    geo.get_filtered_road_network_sweep([0, 3, 5, 6, 7, 8, 9, 10, 11, 12], nrates=[0.5], output_pattern="omaezaki_≤{elev}melev.graphml")
+    print('全標高シナリオのネットワーク作成', time.time() - start)
+    '''
+
+    #Overpass API を使わずにローカルの OSM データ（例: Geofabrik の shizuoka-latest.osm.pbf）から作成する場合は
+    #build_pipeline / get_filtered_road_network / get_filtered_road_network_sweep に osm_file="shizuoka-latest.osm.pbf" を渡す（範囲は load_data の地区ポリゴン）
+
+    # 行列を作る前に道路ネットワークの連結成分から到達可能性（同値類）を確認する場合
+    #pipeline.run(["road_filter"])
+    #geo.analyze_equivalence_classes_from_graph(f"omaezaki_≤{elev}melev.graphml", "omaezaki_nodes.csv", "equivalence_classes_graph.csv")
+
+    # 最新でないステージだけを依存関係の順に実行する（やり直す場合は force=["road_download"] など）
+    pipeline.run()
+
+    # 行列に無い地点間（車両の現在地 → 新たな要支援者など）の移動時間は縮約階層で求める
+    #hierarchy = geo.load_contraction_hierarchy(f"omaezaki_≤{elev}melev.graphml")
+    #print(hierarchy.travel_time_between(34.637984, 138.128125, 34.6100, 138.1800))
+    #geo.benchmark_contraction_hierarchy(f"omaezaki_≤{elev}melev.graphml", n_queries=1000, seed=0)  # nx.shortest_path_length との比較
+    
+    print('処理完了', time.time() - start)
@@ -0,0 +1,216 @@
+import json
+import os
+import networkx as nx
+import numpy as np
+import osmnx as ox
+from shapely.geometry import LineString
+from .CVRP_BinaryStore import save_arrays, load_arrays
+
+# 道路ネットワークのスナップショット形式（CVRP_BinaryStore のコンテナに保存）
+#   ノード: node_ids, node:<属性>     エッジ: u, v（ノード配列の行番号）, key, edge:<属性>
+#   形状（geometry）: geometry_coords (k, 2) と geometry_offsets (エッジ数+1)。形状の無いエッジは点数 0
+# 属性は値の型ごとに次の形で保存し、ヘッダーの attributes に種類を記録する
+#   "float" / "int": float64（欠損は NaN）, "bool": int8（欠損は -1）, "category": int32 のコード（欠損は -1）と値の一覧（JSON）
+GRAPH_SNAPSHOT_VERSION = 1
+
+
+def graph_snapshot_path(graphml_file):
+    """ GraphML に対応するスナップショットのパス（例: omaezaki_≤0melev.graph.bin） """
+    return f"{os.path.splitext(graphml_file)[0]}.graph.bin"
+
+
+def _encode_attribute(values):
+    """ 属性値のリスト（欠損は None）を (配列, 種類, 値の一覧) に変換する """
+    present = [value for value in values if value is not None]
+    if present and all(isinstance(value, (bool, np.bool_)) for value in present):
+        return np.array([-1 if value is None else int(value) for value in values], dtype=np.int8), "bool", None
+    if present and all(isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, (bool, np.bool_))
+                       for value in present):
+        kind = "int" if all(isinstance(value, (int, np.integer)) for value in present) else "float"
+        return np.array([np.nan if value is None else value for value in values], dtype=np.float64), kind, None
+
+    categories = {}
+    codes = np.full(len(values), -1, dtype=np.int32)
+    for i, value in enumerate(values):
+        if value is not None:
+            codes[i] = categories.setdefault(json.dumps(value, ensure_ascii=False), len(categories))
+    return codes, "category", list(categories)
+
+
+def _decode_attribute(array, kind, categories):
+    """ _encode_attribute の逆変換（欠損は None の object 配列） """
+    array = np.asarray(array)
+    decoded = np.empty(len(array), dtype=object)
+    if kind == "bool":
+        present = array >= 0
+        decoded[present] = array[present].astype(bool).tolist()
+    elif kind in ("int", "float"):
+        present = ~np.isnan(array)
+        decoded[present] = (array[present].astype(np.int64) if kind == "int" else array[present]).tolist()
+    else:
+        present = array >= 0
+        values = [json.loads(category) for category in categories]
+        lookup = np.empty(len(values), dtype=object)
+        lookup[:] = values
+        decoded[present] = lookup[array[present]]
+    return decoded
+
+
+def save_graph_snapshot(G, path, source_file=None, include_geometry=True):
+    """
+    道路ネットワークをバイナリのスナップショットとして保存する
+    :param G: MultiDiGraph（ox.load_graphml で読み込んだもの）
+    :param path: 保存先のパス
+    :param source_file: 元のGraphML（更新の確認用に大きさ・更新時刻を記録する）
+    :param include_geometry: エッジの形状（geometry）も保存する
+    """
+    node_list = list(G.nodes)
+    node_index = {node: i for i, node in enumerate(node_list)}
+    edges = list(G.edges(keys=True, data=True))
+
+    arrays = {
+        "node_ids": np.array(node_list, dtype=np.int64),
+        "u": np.array([node_index[u] for u, _, _, _ in edges], dtype=np.int64),
+        "v": np.array([node_index[v] for _, v, _, _ in edges], dtype=np.int64),
+        "key": np.array([k for _, _, k, _ in edges], dtype=np.int64),
+    }
+    attributes = {"node": {}, "edge": {}}
+
+    node_keys = sorted({key for _, data in G.nodes(data=True) for key in data})
+    for key in node_keys:
+        array, kind, categories = _encode_attribute([data.get(key) for _, data in G.nodes(data=True)])
+        arrays[f"node:{key}"] = array
+        attributes["node"][key] = {"kind": kind, "categories": categories}
+
+    edge_keys = sorted({key for _, _, _, data in edges for key in data if key != "geometry"})
+    for key in edge_keys:
+        array, kind, categories = _encode_attribute([data.get(key) for _, _, _, data in edges])
+        arrays[f"edge:{key}"] = array
+        attributes["edge"][key] = {"kind": kind, "categories": categories}
+
+    if include_geometry:
+        counts = np.zeros(len(edges), dtype=np.int64)
+        coords = []
+        for i, (_, _, _, data) in enumerate(edges):
+            geometry = data.get("geometry")
+            if geometry is not None:
+                xy = np.asarray(geometry.coords, dtype=np.float64)
+                counts[i] = len(xy)
+                coords.append(xy)
+        arrays["geometry_coords"] = np.concatenate(coords) if coords else np.zeros((0, 2))
+        arrays["geometry_offsets"] = np.concatenate([[0], np.cumsum(counts)])
+
+    meta = {
+        "version": GRAPH_SNAPSHOT_VERSION,
+        "graph": {key: value if isinstance(value, (bool, int, float, str)) else str(value) for key, value in G.graph.items()},
+        "attributes": attributes,
+    }
+    if source_file:
+        stat = os.stat(source_file)
+        meta["source"] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    save_arrays(path, arrays, meta)
+
+
+class GraphSnapshot:
+    """
+    save_graph_snapshot で保存したネットワークをメモリマップで開く
+    座標・エッジの配列は NetworkX に変換せずにそのまま使え、必要な場合だけ to_networkx で MultiDiGraph に戻す
+    """
+
+    def __init__(self, path, mmap=True):
+        self.arrays, self.meta = load_arrays(path, mmap=mmap)
+        self.node_ids = self.arrays["node_ids"]
+        self.u = self.arrays["u"]
+        self.v = self.arrays["v"]
+        self.key = self.arrays["key"]
+
+    @property
+    def x(self):
+        return np.asarray(self.arrays["node:x"])
+
+    @property
+    def y(self):
+        return np.asarray(self.arrays["node:y"])
+
+    def has_edge_attribute(self, name):
+        return name in self.meta["attributes"]["edge"]
+
+    def edge_attribute(self, name, raw=False):
+        """
+        エッジ属性を配列で返す
+        :param name: 属性名（length, maxspeed, highway など）
+        :param raw: True の場合は保存形式のまま返す（float の属性は NaN 欠損の float64、文字列の属性はコード）
+        :return: numpy 配列（raw=False の場合は欠損を None とした object 配列）
+        """
+        info = self.meta["attributes"]["edge"][name]
+        array = self.arrays[f"edge:{name}"]
+        if raw:
+            return np.asarray(array)
+        return _decode_attribute(array, info["kind"], info["categories"])
+
+    def edge_categories(self, name):
+        """ 文字列などの属性の値の一覧（edge_attribute(name, raw=True) のコードに対応） """
+        return [json.loads(category) for category in self.meta["attributes"]["edge"][name]["categories"]]
+
+    def source_matches(self, graphml_file):
+        """ 元のGraphMLが保存時から変わっていないか（大きさ・更新時刻で確認） """
+        source = self.meta.get("source")
+        if not source or not os.path.exists(graphml_file):
+            return False
+        stat = os.stat(graphml_file)
+        return source["size"] == stat.st_size and source["mtime_ns"] == stat.st_mtime_ns
+
+    def to_networkx(self):
+        """ MultiDiGraph に変換する（ox.load_graphml と同じ属性の型） """
+        G = nx.MultiDiGraph(**self.meta["graph"])
+
+        node_ids = self.node_ids.tolist()
+        node_attrs = {key: _decode_attribute(self.arrays[f"node:{key}"], info["kind"], info["categories"])
+                      for key, info in self.meta["attributes"]["node"].items()}
+        G.add_nodes_from(
+            (node, {key: values[i] for key, values in node_attrs.items() if values[i] is not None})
+            for i, node in enumerate(node_ids)
+        )
+
+        edge_attrs = {key: self.edge_attribute(key) for key in self.meta["attributes"]["edge"]}
+        geometry = None
+        if "geometry_offsets" in self.arrays:
+            coords = np.asarray(self.arrays["geometry_coords"])
+            offsets = np.asarray(self.arrays["geometry_offsets"])
+            geometry = (coords, offsets)
+
+        u, v, key = self.u.tolist(), self.v.tolist(), self.key.tolist()
+        edges = []
+        for i in range(len(u)):
+            data = {name: values[i] for name, values in edge_attrs.items() if values[i] is not None}
+            if geometry is not None and geometry[1][i + 1] > geometry[1][i]:
+                data["geometry"] = LineString(geometry[0][geometry[1][i]:geometry[1][i + 1]])
+            edges.append((node_ids[u[i]], node_ids[v[i]], key[i], data))
+        G.add_edges_from(edges)
+        return G
+
+
+def load_graph(graphml_file, as_networkx=True, snapshot=True):
+    """
+    道路ネットワークを読み込む。GraphML の隣に有効なスナップショットがあればそれを読み、無ければ GraphML を読んでスナップショットを作る
+    :param graphml_file: GraphMLファイルのパス
+    :param as_networkx: True の場合は MultiDiGraph、False の場合は GraphSnapshot を返す
+    :param snapshot: False の場合はスナップショットを使わずに GraphML を読む
+    :return: MultiDiGraph または GraphSnapshot
+    """
+    if not snapshot:
+        return ox.load_graphml(filepath=graphml_file)
+
+    path = graph_snapshot_path(graphml_file)
+    if os.path.exists(path):
+        try:
+            loaded = GraphSnapshot(path)
+            if loaded.meta.get("version") == GRAPH_SNAPSHOT_VERSION and loaded.source_matches(graphml_file):
+                return loaded.to_networkx() if as_networkx else loaded
+        except (ValueError, KeyError) as e:
+            print(f"スナップショットを読み込めないため作り直します: {path} - {e}")
+
+    G = ox.load_graphml(filepath=graphml_file)
+    save_graph_snapshot(G, path, source_file=graphml_file)
+    print(f"ネットワークのスナップショットを保存しました: {path}")
+    return G if as_networkx else GraphSnapshot(path)
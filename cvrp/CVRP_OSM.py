@@ -0,0 +1,219 @@
+import bz2
+import gzip
+import re
+import xml.etree.ElementTree as ET
+from itertools import groupby, pairwise
+import networkx as nx
+import numpy as np
+import osmnx as ox
+import shapely
+from shapely.geometry import box
+
+# ox.graph_from_place(..., network_type="drive") と同じ way の条件（Overpass の "drive" フィルタ）
+# (タグ, 演算子, 正規表現)。演算子 None はタグがあること、"~" は一致すること、"!~" はタグが無いか一致しないこと
+DRIVE_FILTER = [
+    ("highway", None, None),
+    ("area", "!~", "yes"),
+    ("access", "!~", "private"),
+    ("highway", "!~", "abandoned|bridleway|bus_guideway|construction|corridor|cycleway|elevator|escalator|footway|no|path|"
+                      "pedestrian|planned|platform|proposed|raceway|razed|rest_area|service|services|steps|track"),
+    ("motor_vehicle", "!~", "no"),
+    ("motorcar", "!~", "no"),
+    ("service", "!~", "alley|driveway|emergency_access|parking|parking_aisle|private"),
+]
+
+# 一方通行の判定（osmnx と同じ値）
+ONEWAY_VALUES = {"yes", "true", "1", "-1", "reverse", "T", "F"}
+REVERSED_VALUES = {"-1", "reverse", "T"}
+
+# ox.graph_from_polygon と同じく、切り出し範囲の 500 m 外側まで読み込んでから簡略化する
+CLIP_BUFFER_M = 500
+
+
+def highway_filter(include_types=None, exclude_types=None):
+    """
+    道路種別の指定から way の条件を作る（CVRP_Geography.download_road_network の custom_filter と同じ意味）
+    :param include_types: 含める道路種別（highway）のリスト
+    :param exclude_types: 除外する道路種別（highway）のリスト
+    :return: DRIVE_FILTER と同じ形式の条件リスト
+    """
+    if include_types:
+        return [("highway", "~", "|".join(include_types))]
+    if exclude_types:
+        return [("highway", "!~", "|".join(exclude_types))]
+    return DRIVE_FILTER
+
+
+def _compile_filter(way_filter):
+    return [(key, op, re.compile(pattern) if pattern else None) for key, op, pattern in way_filter]
+
+
+def _match_filter(tags, compiled):
+    for key, op, pattern in compiled:
+        value = tags.get(key)
+        if op is None:
+            if value is None:
+                return False
+        elif op == "~":
+            if value is None or not pattern.search(value):
+                return False
+        elif value is not None and pattern.search(value):
+            return False
+    return True
+
+
+def _open_osm(path):
+    if path.endswith(".bz2"):
+        return bz2.open(path, "rb")
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def _read_osm_xml(path, compiled):
+    """ .osm（XML）を2回に分けて順に読み、条件に合う way と、その way が使うノードの座標だけを取り出す """
+    paths = {}
+    with _open_osm(path) as f:
+        root, refs, tags = None, [], {}
+        for event, elem in ET.iterparse(f, events=("start", "end")):
+            if event == "start":
+                root = elem if root is None else root
+                continue
+            if elem.tag == "nd":
+                refs.append(int(elem.get("ref")))
+            elif elem.tag == "tag":
+                tags[elem.get("k")] = elem.get("v")
+            elif elem.tag in ("node", "way", "relation"):
+                if elem.tag == "way" and _match_filter(tags, compiled):
+                    paths[int(elem.get("id"))] = (refs, tags)
+                refs, tags = [], {}
+                root.clear()
+
+    needed = {ref for refs, _ in paths.values() for ref in refs}
+    nodes = {}
+    with _open_osm(path) as f:
+        root, tags = None, {}
+        for event, elem in ET.iterparse(f, events=("start", "end")):
+            if event == "start":
+                root = elem if root is None else root
+                continue
+            if elem.tag == "tag":
+                tags[elem.get("k")] = elem.get("v")
+            elif elem.tag in ("node", "way", "relation"):
+                if elem.tag == "node":
+                    node_id = int(elem.get("id"))
+                    if node_id in needed:
+                        nodes[node_id] = (float(elem.get("lon")), float(elem.get("lat")), tags)
+                tags = {}
+                root.clear()
+    return nodes, paths
+
+
+def _read_osm_pbf(path, compiled):
+    """ .osm.pbf を pyosmium で2回に分けて読み、条件に合う way と、その way が使うノードの座標だけを取り出す """
+    try:
+        import osmium
+    except ImportError as e:
+        raise ImportError(".osm.pbf の読み込みには pyosmium（pip install osmium）が必要です。") from e
+
+    paths = {}
+    nodes = {}
+
+    class WayHandler(osmium.SimpleHandler):
+        def way(self, w):
+            tags = {tag.k: tag.v for tag in w.tags}
+            if _match_filter(tags, compiled):
+                paths[w.id] = ([n.ref for n in w.nodes], tags)
+
+    class NodeHandler(osmium.SimpleHandler):
+        def __init__(self, needed):
+            super().__init__()
+            self.needed = needed
+
+        def node(self, n):
+            if n.id in self.needed:
+                nodes[n.id] = (n.location.lon, n.location.lat, {tag.k: tag.v for tag in n.tags})
+
+    WayHandler().apply_file(path, locations=False)
+    NodeHandler({ref for refs, _ in paths.values() for ref in refs}).apply_file(path, locations=False)
+    return nodes, paths
+
+
+def _create_graph(nodes, paths):
+    """ osmnx と同じ属性（x, y, osmid, highway, maxspeed, oneway, reversed, length など）で MultiDiGraph を作る """
+    G = nx.MultiDiGraph(crs=ox.settings.default_crs, created_with="CVRP_OSM")
+    for node_id, (lon, lat, tags) in nodes.items():
+        attrs = {"y": lat, "x": lon}
+        attrs.update({tag: tags[tag] for tag in ox.settings.useful_tags_node if tag in tags})
+        G.add_node(node_id, **attrs)
+
+    for way_id, (refs, tags) in paths.items():
+        refs = [ref for ref, _ in groupby(refs) if ref in nodes]
+        if len(refs) < 2:
+            continue
+        path = {"osmid": way_id}
+        path.update({tag: tags[tag] for tag in ox.settings.useful_tags_way if tag in tags})
+
+        is_one_way = path.get("oneway") in ONEWAY_VALUES or path.get("junction") == "roundabout"
+        if is_one_way and path.get("oneway") in REVERSED_VALUES:
+            refs.reverse()
+        path["oneway"] = is_one_way
+
+        edges = list(pairwise(refs))
+        G.add_edges_from(edges, **path, reversed=False)
+        if not is_one_way:
+            G.add_edges_from([(v, u) for u, v in edges], **path, reversed=True)
+
+    if len(G.edges) > 0:
+        G = ox.distance.add_edge_lengths(G)
+    return G
+
+
+def graph_from_osm_file(osm_file, polygon=None, bbox=None, include_types=None, exclude_types=None, simplify=True):
+    """
+    ローカルの OSM データ（.osm / .osm.bz2 / .osm.gz / .osm.pbf）から車両用の道路ネットワークを作成する
+    way・ノードは逐次読み込み、条件に合う way と使われるノードだけを保持する（県全体の抽出データも読み込める）。
+    切り出し・簡略化の手順は ox.graph_from_polygon と同じ（500 m 外側で読み込み → 最大連結成分 → 簡略化 → 範囲で切り出し）。
+    :param osm_file: OSMデータのパス（.osm.pbf は pyosmium が必要）
+    :param polygon: 切り出す範囲（shapely の Polygon / MultiPolygon, 経緯度）
+    :param bbox: 切り出す範囲 (西, 南, 東, 北)。polygon と同時には指定しない
+    :param include_types: 含める道路種別（highway）のリスト
+    :param exclude_types: 除外する道路種別（highway）のリスト
+    :param simplify: 交差点以外のノードをまとめる（ox.simplify_graph）
+    :return: MultiDiGraph
+    """
+    if bbox is not None:
+        polygon = box(*bbox)
+    compiled = _compile_filter(highway_filter(include_types, exclude_types))
+
+    if osm_file.endswith(".pbf"):
+        nodes, paths = _read_osm_pbf(osm_file, compiled)
+    else:
+        nodes, paths = _read_osm_xml(osm_file, compiled)
+    print(f"{osm_file} から way {len(paths):,} 本・ノード {len(nodes):,} 個を読み込みました。")
+
+    poly_buff = None
+    if polygon is not None:
+        # 外側 500 m に1点でも入る way を丸ごと残す（Overpass の範囲検索と同じ）
+        poly_proj, crs_utm = ox.projection.project_geometry(polygon)
+        poly_buff, _ = ox.projection.project_geometry(poly_proj.buffer(CLIP_BUFFER_M), crs=crs_utm, to_latlong=True)
+        node_ids = np.fromiter(nodes.keys(), dtype=np.int64, count=len(nodes))
+        coords = np.array([(lon, lat) for lon, lat, _ in nodes.values()]).reshape(-1, 2)
+        inside = set(node_ids[shapely.contains_xy(poly_buff, coords[:, 0], coords[:, 1])].tolist())
+        paths = {way_id: path for way_id, path in paths.items() if any(ref in inside for ref in path[0])}
+
+    G_buff = _create_graph(nodes, paths)
+    if poly_buff is not None:
+        G_buff = ox.truncate.truncate_graph_polygon(G_buff, poly_buff)
+    G_buff = ox.truncate.largest_component(G_buff, strongly=False)
+    if simplify:
+        G_buff = ox.simplify_graph(G_buff)
+
+    if polygon is not None:
+        G = ox.truncate.truncate_graph_polygon(G_buff, polygon)
+        G = ox.truncate.largest_component(G, strongly=False)
+    else:
+        G = G_buff
+    nx.set_node_attributes(G, values=ox.stats.count_streets_per_node(G_buff, nodes=G.nodes), name="street_count")
+    print(f"道路ネットワーク: ノード {len(G):,} 個・エッジ {len(G.edges):,} 本")
+    return G
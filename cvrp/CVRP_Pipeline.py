@@ -0,0 +1,178 @@
+import hashlib
+import json
+import os
+import time
+from .CVRP_BinaryStore import file_hash
+
+# 状態ファイルの形式（変更した場合は全ステージを実行し直す）
+PIPELINE_STATE_VERSION = 1
+
+
+class Stage:
+    """
+    パイプラインの1ステージ
+    :param name: ステージ名
+    :param func: 実行する関数（引数なし）
+    :param inputs: 入力ファイル・ディレクトリのパス（内容のハッシュを実行要否の判定に使う）
+    :param outputs: 出力ファイルのパス
+    :param params: 結果に影響する条件（JSONに変換できる値）
+    :param after: 入力ファイルを介さない依存先のステージ名
+    """
+
+    def __init__(self, name, func, inputs=(), outputs=(), params=None, after=()):
+        self.name = name
+        self.func = func
+        self.inputs = [str(path) for path in inputs]
+        self.outputs = [str(path) for path in outputs]
+        self.params = params or {}
+        self.after = list(after)
+
+
+class Pipeline:
+    """
+    ステージの依存関係（DAG）を宣言して順に実行する。
+    各ステージは「入力ファイルの内容 + 条件」のハッシュをキーとして状態ファイルに記録し、キーが同じで出力も記録時のままなら実行を省略する。
+    依存関係は入力ファイルを出力するステージから自動で決まり、上流が実行し直しても出力が変わらなければ下流は省略される。
+    （例: omaezaki_nodes.csv を変更した場合、スナップ以降のステージだけが実行され、OSMの取得やDEMの結合はやり直さない）
+    :param state_file: 状態ファイル（JSON）のパス
+    """
+
+    def __init__(self, state_file="pipeline_state.json"):
+        self.state_file = state_file
+        self.stages = {}
+        self.state = {"version": PIPELINE_STATE_VERSION, "stages": {}, "files": {}}
+        if state_file and os.path.exists(state_file):
+            with open(state_file, encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get("version") == PIPELINE_STATE_VERSION:
+                self.state = state
+
+    def add_stage(self, name, func, inputs=(), outputs=(), params=None, after=()):
+        """ ステージを追加する（引数は Stage を参照）。同じ名前のステージは置き換える """
+        self.stages[name] = Stage(name, func, inputs, outputs, params, after)
+        return self.stages[name]
+
+    def dependencies(self, name):
+        """ ステージが依存するステージ名（入力ファイルを出力するステージ + after） """
+        stage = self.stages[name]
+        producers = {output: other.name for other in self.stages.values() for output in other.outputs}
+        depends = [producers[path] for path in stage.inputs if path in producers and producers[path] != name]
+        return list(dict.fromkeys(depends + stage.after))
+
+    def order(self, targets=None):
+        """
+        実行順（トポロジカル順）のステージ名のリスト
+        :param targets: 実行したいステージ名のリスト（依存先も含める）。None の場合は全ステージ
+        """
+        ordered, visiting, done = [], set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name not in self.stages:
+                raise KeyError(f"未定義のステージです: {name}")
+            if name in visiting:
+                raise ValueError(f"ステージの依存関係が循環しています: {name}")
+            visiting.add(name)
+            for dependency in self.dependencies(name):
+                visit(dependency)
+            visiting.discard(name)
+            done.add(name)
+            ordered.append(name)
+
+        for name in (targets or list(self.stages)):
+            visit(name)
+        return ordered
+
+    def fingerprint(self, path):
+        """
+        ファイル（ディレクトリの場合は中の全ファイル）の内容のハッシュ。存在しない場合は None
+        大きさ・更新時刻が前回と同じファイルは状態ファイルに記録したハッシュを使い、読み直さない
+        """
+        if os.path.isdir(path):
+            sha1 = hashlib.sha1()
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for filename in sorted(files):
+                    filepath = os.path.join(root, filename)
+                    sha1.update(f"{os.path.relpath(filepath, path)}:{self.fingerprint(filepath)}\n".encode("utf-8"))
+            return sha1.hexdigest()
+        if not os.path.exists(path):
+            return None
+
+        stat = os.stat(path)
+        cached = self.state["files"].get(path)
+        if cached and cached["size"] == stat.st_size and cached["mtime_ns"] == stat.st_mtime_ns:
+            return cached["hash"]
+        digest = file_hash(path)
+        self.state["files"][path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": digest}
+        return digest
+
+    def stage_key(self, name):
+        """ ステージのキー（入力ファイルの内容と条件のハッシュ） """
+        stage = self.stages[name]
+        sha1 = hashlib.sha1(json.dumps({"stage": name, "params": stage.params}, sort_keys=True, default=str).encode("utf-8"))
+        for path in stage.inputs:
+            sha1.update(f"{path}:{self.fingerprint(path)}\n".encode("utf-8"))
+        return sha1.hexdigest()
+
+    def is_up_to_date(self, name, key=None):
+        """
+        前回の実行から入力・条件・出力が変わっていないか
+        出力ファイルの組が前回の記録と異なる場合（出力の追加・名前の変更）や、出力が削除された場合は最新でないとみなす
+        """
+        record = self.state["stages"].get(name)
+        if record is None or record["key"] != (key or self.stage_key(name)):
+            return False
+        outputs = self.stages[name].outputs
+        if set(outputs) != set(record["outputs"]):
+            return False
+        return all(self.fingerprint(path) == record["outputs"][path] for path in outputs)
+
+    def run(self, targets=None, force=()):
+        """
+        ステージを依存関係の順に実行する（最新のステージは省略）
+        :param targets: 実行したいステージ名のリスト（依存先も含めて確認する）。None の場合は全ステージ
+        :param force: 最新でも実行し直すステージ名のリスト
+        :return: {ステージ名: "ran" または "skipped"}
+        """
+        results = {}
+        for name in self.order(targets):
+            stage = self.stages[name]
+            key = self.stage_key(name)
+            if name not in force and self.is_up_to_date(name, key):
+                print(f"⏭️ {name}: 最新のため省略します")
+                results[name] = "skipped"
+                continue
+
+            print(f"▶️ {name}: 実行します")
+            start = time.time()
+            stage.func()
+            elapsed = time.time() - start
+
+            missing = [path for path in stage.outputs if not os.path.exists(path)]
+            if missing:
+                raise RuntimeError(f"ステージ {name} の出力が作成されませんでした: {missing}")
+            self.state["stages"][name] = {
+                "key": key,
+                "outputs": {path: self.fingerprint(path) for path in stage.outputs},
+                "elapsed": round(elapsed, 2),
+                "finished_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            }
+            self.save_state()
+            print(f"✅ {name}: 完了（{elapsed:.2f} 秒）")
+            results[name] = "ran"
+        return results
+
+    def status(self):
+        """ 各ステージが最新かどうか {ステージ名: True/False} """
+        return {name: self.is_up_to_date(name) for name in self.order()}
+
+    def save_state(self):
+        """ 状態ファイルを書き出す """
+        if not self.state_file:
+            return
+        tmp_path = f"{self.state_file}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.state_file)
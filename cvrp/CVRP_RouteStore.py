@@ -0,0 +1,107 @@
+import numpy as np
+from .CVRP_BinaryStore import save_arrays, load_arrays
+
+# ルート保存形式（CVRP_BinaryStore のコンテナに保存）
+#   predecessors: (起点数, ネットワークのノード数) int32。起点ごとの最短経路木で、各ノードの1つ前のノードの行番号（無い場合は -9999）
+#   sources: predecessors の各行の起点（ネットワークのノードの行番号）。同じノードにスナップした拠点は1行を共有する
+#   graph_node_ids, graph_x, graph_y: ネットワークのノードID（OSM）と経緯度
+#   node_ids, node_graph_index, node_x, node_y: 拠点IDと、そのスナップ先の行番号・拠点自体の経緯度
+# ペアごとにルートを持たず、ルートは reconstruct_path で必要なときに先行ノードをたどって復元する
+ROUTE_STORE_VERSION = 1
+
+# scipy.sparse.csgraph.dijkstra の「先行ノード無し」と同じ値
+NO_PREDECESSOR = -9999
+
+
+def save_route_store(path, predecessors, sources, graph_node_ids, graph_x, graph_y, node_ids, node_graph_index, node_x, node_y,
+                     graph_hash=None):
+    """
+    起点ごとの最短経路木（先行ノード配列）を保存する
+    :param path: 保存先のパス（例: omaezaki_routes.bin）
+    :param predecessors: (起点数, ネットワークのノード数) の先行ノード配列（dijkstra(..., return_predecessors=True) の戻り値）
+    :param sources: 各行の起点（ネットワークのノードの行番号）
+    :param graph_node_ids: ネットワークのノードID（行番号の順）
+    :param graph_x: ネットワークのノードの経度
+    :param graph_y: ネットワークのノードの緯度
+    :param node_ids: 拠点ID
+    :param node_graph_index: 各拠点のスナップ先（ネットワークのノードの行番号）
+    :param node_x: 拠点の経度
+    :param node_y: 拠点の緯度
+    :param graph_hash: 計算に使ったGraphML（と重み条件）のハッシュ（再利用の確認用）
+    """
+    arrays = {
+        "predecessors": np.asarray(predecessors, dtype=np.int32),
+        "sources": np.asarray(sources, dtype=np.int32),
+        "graph_node_ids": np.asarray(graph_node_ids, dtype=np.int64),
+        "graph_x": np.asarray(graph_x, dtype=np.float64),
+        "graph_y": np.asarray(graph_y, dtype=np.float64),
+        "node_ids": np.asarray(node_ids, dtype=np.int64),
+        "node_graph_index": np.asarray(node_graph_index, dtype=np.int32),
+        "node_x": np.asarray(node_x, dtype=np.float64),
+        "node_y": np.asarray(node_y, dtype=np.float64),
+    }
+    meta = {"version": ROUTE_STORE_VERSION, "graph_hash": graph_hash}
+    save_arrays(path, arrays, meta)
+
+
+class RouteStore:
+    """
+    save_route_store で保存したルートをメモリマップで開き、拠点間のルートを必要なときに復元する
+    （Geography・Gurobi・GA で共通。先行ノード配列は参照した行だけが読み込まれる）
+    """
+
+    def __init__(self, path, mmap=True):
+        self.arrays, self.meta = load_arrays(path, mmap=mmap)
+        self.predecessors = self.arrays["predecessors"]
+        self.sources = np.asarray(self.arrays["sources"])
+        self.graph_node_ids = np.asarray(self.arrays["graph_node_ids"])
+        self.row_of_source = {source: row for row, source in enumerate(self.sources.tolist())}
+        node_ids = np.asarray(self.arrays["node_ids"]).tolist()
+        self.node_position = {node_id: i for i, node_id in enumerate(node_ids)}
+
+    def has_node(self, node_id):
+        """ 拠点IDがこのファイルに含まれるか（拠点CSVを作り直した場合の確認用） """
+        return int(node_id) in self.node_position
+
+    def _graph_index(self, node_id):
+        return int(self.arrays["node_graph_index"][self.node_position[int(node_id)]])
+
+    def path_indices(self, source_id, target_id):
+        """ 拠点間の最短経路をネットワークのノードの行番号のリストで返す（ルートが無い場合は None） """
+        source = self._graph_index(source_id)
+        target = self._graph_index(target_id)
+        row = self.predecessors[self.row_of_source[source]]
+
+        path = [target]
+        while path[-1] != source:
+            previous = int(row[path[-1]])
+            if previous < 0:
+                return None
+            path.append(previous)
+        path.reverse()
+        return path
+
+    def reconstruct_path(self, source_id, target_id):
+        """
+        拠点間の最短経路を復元する
+        :param source_id: 起点の拠点ID
+        :param target_id: 終点の拠点ID
+        :return: ネットワークのノードID（OSM）のリスト（ルートが無い場合は None）
+        """
+        indices = self.path_indices(source_id, target_id)
+        return None if indices is None else self.graph_node_ids[indices].tolist()
+
+    def path_coords(self, source_id, target_id):
+        """
+        拠点間のルートを地図に描くための座標列を返す（拠点 → スナップ先 → 道路上のノード → スナップ先 → 拠点）
+        :return: (緯度, 経度) のリスト（ルートが無い場合は None）
+        """
+        indices = self.path_indices(source_id, target_id)
+        if indices is None:
+            return None
+        source, target = self.node_position[int(source_id)], self.node_position[int(target_id)]
+        lats = np.asarray(self.arrays["graph_y"])[indices]
+        lons = np.asarray(self.arrays["graph_x"])[indices]
+        return ([(float(self.arrays["node_y"][source]), float(self.arrays["node_x"][source]))]
+                + list(zip(lats.tolist(), lons.tolist()))
+                + [(float(self.arrays["node_y"][target]), float(self.arrays["node_x"][target]))])
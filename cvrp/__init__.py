@@ -0,0 +1,5 @@
+# 全シナリオで共通の処理（地理データ・移動時間行列・Gurobiモデル）
+# 各シナリオのディレクトリ（20250511_elevationXXm_gurubi_client12m）には標高などの条件だけを書いた実行スクリプトを置く
+#   1.Geography/CVRP_Geography_v7.py    → cvrp.CVRP_Geography_v7.main(elev=...)
+#   2.Optimization/CVRP_gurobi_3d_v2.py → cvrp.CVRP_gurobi_3d_v2.main(nodes_csv=...)
+# gurobipy などの重い依存を読み込まないよう、ここでは何も import しない
@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+# テストはリポジトリのルートから cvrp パッケージを読み込む
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# 標高0mのシナリオの入力データ（拠点CSV・パイプラインで作成したネットワーク）
+GEOGRAPHY_DIR = os.path.join(ROOT, "20250511_elevation0m_gurubi_client12m", "1.Geography")
+
+
+@pytest.fixture
+def geo():
+    """ TopoJSON を読み込まない CVRP_Geography（ネットワーク・行列の計算だけに使う） """
+    from cvrp.CVRP_Geography_v7 import CVRP_Geography
+    return CVRP_Geography(os.path.join(GEOGRAPHY_DIR, "r2ka22223.topojson"))
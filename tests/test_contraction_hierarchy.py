@@ -0,0 +1,87 @@
+import math
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from cvrp.CVRP_ContractionHierarchy import build_contraction_hierarchy, save_contraction_hierarchy, ContractionHierarchy
+
+
+def random_graph(seed, n_nodes=40, n_edges=110):
+    """
+    ランダムな有向ネットワーク（平行エッジ・重み0のエッジ・一方通行で行き来できない組・孤立ノードを含む）
+    ノードIDは OSM と同じく連番ではない整数にする
+    """
+    rng = np.random.default_rng(seed)
+    nodes = [1000 + 7 * i for i in range(n_nodes)]
+    G = nx.MultiDiGraph()
+    for node in nodes:
+        G.add_node(node, x=138.1 + rng.random() * 0.1, y=34.6 + rng.random() * 0.1)
+
+    # 最後の5ノードは孤立させ、それ以外の前半と後半は前半→後半の一方通行だけでつなぐ
+    connected = nodes[:-5]
+    half = len(connected) // 2
+    for _ in range(n_edges):
+        u, v = rng.choice(connected, size=2, replace=False)
+        if nodes.index(u) >= half > nodes.index(v):
+            u, v = v, u
+        weight = 0.0 if rng.random() < 0.1 else float(np.round(rng.uniform(1, 60), 3))
+        G.add_edge(int(u), int(v), weight=weight)
+        if rng.random() < 0.2:
+            G.add_edge(int(u), int(v), weight=float(np.round(rng.uniform(1, 60), 3)))
+    return G
+
+
+def path_weight(G, path):
+    """ 経路の移動時間（平行エッジは最小の重みを使う） """
+    return sum(min(data["weight"] for data in G[u][v].values()) for u, v in zip(path[:-1], path[1:]))
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_contraction_hierarchy_matches_dijkstra_for_every_pair(geo, tmp_path, seed):
+    G = random_graph(seed)
+    graph_node_list, _, csr = geo.graph_to_csr(G)
+    rank, edges = build_contraction_hierarchy(csr)
+    path = tmp_path / "random.ch.bin"
+    save_contraction_hierarchy(str(path), rank, edges, graph_node_list,
+                               [G.nodes[node]["x"] for node in graph_node_list], [G.nodes[node]["y"] for node in graph_node_list])
+    hierarchy = ContractionHierarchy(str(path))
+
+    unreachable = 0
+    for source in G.nodes:
+        for target in G.nodes:
+            try:
+                expected = nx.shortest_path_length(G, source, target, weight="weight")
+            except nx.NetworkXNoPath:
+                expected = math.inf
+                unreachable += 1
+
+            route = hierarchy.shortest_path(source, target)
+            if math.isinf(expected):
+                assert math.isinf(hierarchy.travel_time(source, target))
+                assert route is None
+                continue
+            assert hierarchy.travel_time(source, target) == pytest.approx(expected, abs=1e-9)
+            assert route[0] == source and route[-1] == target
+            assert all(G.has_edge(u, v) for u, v in zip(route[:-1], route[1:]))
+            assert path_weight(G, route) == pytest.approx(expected, abs=1e-9)
+
+    # 到達できない組が実際にテストされていること
+    assert unreachable > 0
+
+
+def test_contraction_hierarchy_handles_graph_without_edges(geo, tmp_path):
+    G = nx.MultiDiGraph()
+    G.add_node(1, x=138.1, y=34.6)
+    G.add_node(2, x=138.2, y=34.7)
+    graph_node_list, _, csr = geo.graph_to_csr(G)
+    rank, edges = build_contraction_hierarchy(csr)
+    path = tmp_path / "empty.ch.bin"
+    save_contraction_hierarchy(str(path), rank, edges, graph_node_list, [138.1, 138.2], [34.6, 34.7])
+    hierarchy = ContractionHierarchy(str(path))
+
+    assert hierarchy.travel_time(1, 1) == 0.0
+    assert hierarchy.shortest_path(1, 1) == [1]
+    assert math.isinf(hierarchy.travel_time(1, 2))
+    assert hierarchy.shortest_path(1, 2) is None
+    assert hierarchy.nearest_node(34.7, 138.2)[0] == 2
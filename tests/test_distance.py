@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from geopy.distance import geodesic
+
+from cvrp.CVRP_Distance import haversine_m, latlon_to_unit_xyz, chord_to_m, m_to_chord
+
+
+def random_pairs(max_m, n=2000, seed=0):
+    """ 御前崎市付近のランダムな地点と、そこから 1 m〜max_m 離れたランダムな方向の地点 """
+    rng = np.random.default_rng(seed)
+    lats = 34.58 + rng.random(n) * 0.1
+    lons = 138.1 + rng.random(n) * 0.15
+    angles = rng.random(n) * 2 * np.pi
+    distances = 1 + rng.random(n) * (max_m - 1)
+    lats2 = lats + distances * np.cos(angles) / 111000
+    lons2 = lons + distances * np.sin(angles) / (111000 * np.cos(np.radians(lats)))
+    return lats, lons, lats2, lons2
+
+
+def geodesic_m(lats, lons, lats2, lons2):
+    return np.array([geodesic((a, b), (c, d)).m for a, b, c, d in zip(lats, lons, lats2, lons2)])
+
+
+@pytest.mark.parametrize("max_m", [60, 14000])
+def test_haversine_matches_geodesic_within_documented_relative_error(max_m):
+    lats, lons, lats2, lons2 = random_pairs(max_m)
+    expected = geodesic_m(lats, lons, lats2, lons2)
+
+    relative = (haversine_m(lats, lons, lats2, lons2) - expected) / expected
+    assert np.abs(relative).max() <= 0.0024
+
+
+def test_haversine_error_below_60m():
+    lats, lons, lats2, lons2 = random_pairs(60, seed=1)
+
+    error = np.abs(haversine_m(lats, lons, lats2, lons2) - geodesic_m(lats, lons, lats2, lons2))
+    assert error.max() < 0.15
+
+
+def test_haversine_broadcasts_to_distance_matrix():
+    lats, lons = np.array([34.60, 34.65]), np.array([138.10, 138.20])
+    shelter_lats, shelter_lons = np.array([34.61, 34.62, 34.63]), np.array([138.11, 138.12, 138.13])
+
+    matrix = haversine_m(lats[:, None], lons[:, None], shelter_lats, shelter_lons)
+    assert matrix.shape == (2, 3)
+    assert matrix[1, 2] == pytest.approx(float(haversine_m(lats[1], lons[1], shelter_lats[2], shelter_lons[2])))
+    assert float(haversine_m(34.6, 138.1, 34.6, 138.1)) == 0.0
+
+
+def test_chord_conversion_matches_haversine():
+    lats, lons, lats2, lons2 = random_pairs(14000, n=100)
+    chords = np.linalg.norm(latlon_to_unit_xyz(lats, lons) - latlon_to_unit_xyz(lats2, lons2), axis=-1)
+
+    np.testing.assert_allclose(chord_to_m(chords), haversine_m(lats, lons, lats2, lons2), rtol=1e-9)
+    np.testing.assert_allclose(m_to_chord(chord_to_m(chords)), chords, rtol=1e-9)
@@ -0,0 +1,167 @@
+import json
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pytest
+
+from cvrp.CVRP_Elevation import ElevationProvider, GSIElevationProvider, FallbackElevationProvider
+
+
+class StubGSIServer:
+    """
+    国土地理院 標高API の代わりのローカルサーバー
+    elevations に無い地点は '-----'（データ無し）を返し、failures の回数だけ 503 を返してから応答する
+    """
+
+    def __init__(self):
+        self.elevations = {}
+        self.failures = Counter()
+        self.requests = Counter()
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                point = (float(query["lat"][0]), float(query["lon"][0]))
+                with stub.lock:
+                    stub.requests[point] += 1
+                    failing = stub.failures[point] > 0
+                    if failing:
+                        stub.failures[point] -= 1
+                if failing:
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                body = json.dumps({"elevation": stub.elevations.get(point, "-----"), "hsrc": "5m（レーザ）"}).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/getelevation.php"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def gsi_server():
+    server = StubGSIServer()
+    yield server
+    server.close()
+
+
+class FixedProvider(ElevationProvider):
+    """ 地点ごとの標高を辞書で返す取得元（問い合わせた地点を記録する） """
+
+    def __init__(self, elevations):
+        self.elevations = elevations
+        self.calls = []
+
+    def get_elevations(self, lats, lons):
+        points = list(zip(np.ravel(lats).tolist(), np.ravel(lons).tolist()))
+        self.calls.append(points)
+        return np.array([self.elevations.get(point, np.nan) for point in points], dtype=float)
+
+
+def test_elevation_provider_is_abstract():
+    with pytest.raises(TypeError):
+        ElevationProvider()
+
+
+def test_gsi_provider_fetches_in_parallel_and_rounds(gsi_server):
+    points = [(round(34.6 + i * 0.001, 3), round(138.1 + i * 0.001, 3)) for i in range(40)]
+    for i, point in enumerate(points):
+        gsi_server.elevations[point] = i + 0.4567
+    provider = GSIElevationProvider(cache_file=None, max_workers=8, url=gsi_server.url)
+
+    lats, lons = zip(*points)
+    elevations = provider.get_elevations(lats, lons)
+
+    np.testing.assert_allclose(elevations, [round(i + 0.4567, 2) for i in range(40)])
+    assert all(count == 1 for count in gsi_server.requests.values())
+
+
+def test_gsi_provider_no_data_is_cached_as_nan(gsi_server):
+    provider = GSIElevationProvider(cache_file=None, url=gsi_server.url)
+
+    assert np.isnan(provider.get_elevations([34.5], [138.0])[0])
+    assert provider.get_elevation(34.5, 138.0) is None
+    # データ無し（'-----'）は有効な応答としてキャッシュされ、問い合わせ直さない
+    assert gsi_server.requests[(34.5, 138.0)] == 1
+
+
+def test_gsi_provider_retries_server_errors(gsi_server):
+    gsi_server.elevations[(34.61, 138.11)] = 12.0
+    gsi_server.failures[(34.61, 138.11)] = 1
+    provider = GSIElevationProvider(cache_file=None, retries=2, url=gsi_server.url)
+
+    assert provider.get_elevation(34.61, 138.11) == 12.0
+    assert gsi_server.requests[(34.61, 138.11)] == 2
+
+
+def test_gsi_provider_does_not_cache_failures(gsi_server, tmp_path):
+    gsi_server.elevations[(34.62, 138.12)] = 8.5
+    gsi_server.failures[(34.62, 138.12)] = 2
+    cache_file = tmp_path / "gsi_elevation_cache.json"
+    provider = GSIElevationProvider(cache_file=str(cache_file), retries=1, url=gsi_server.url)
+
+    # 再試行しても 503 の場合は NaN を返し、キャッシュしない
+    assert np.isnan(provider.get_elevations([34.62], [138.12])[0])
+    assert provider.cache == {}
+    # 次の呼び出しで問い合わせ直す
+    assert provider.get_elevation(34.62, 138.12) == 8.5
+    assert gsi_server.requests[(34.62, 138.12)] == 3
+
+
+def test_gsi_provider_disk_cache_uses_rounded_coordinates(gsi_server, tmp_path):
+    gsi_server.elevations[(34.63, 138.13)] = 5.25
+    cache_file = tmp_path / "gsi_elevation_cache.json"
+    provider = GSIElevationProvider(cache_file=str(cache_file), precision=6, url=gsi_server.url)
+
+    # precision 桁に丸めると同じ座標になる地点は1回だけ問い合わせる
+    elevations = provider.get_elevations([34.63, 34.63 + 1e-8], [138.13, 138.13 - 1e-8])
+    np.testing.assert_allclose(elevations, [5.25, 5.25])
+    assert gsi_server.requests[(34.63, 138.13)] == 1
+    assert json.loads(cache_file.read_text(encoding="utf-8")) == {"34.630000,138.130000": 5.25}
+
+    # ディスクのキャッシュを読み込んだ取得元は問い合わせない
+    reloaded = GSIElevationProvider(cache_file=str(cache_file), url=gsi_server.url)
+    assert reloaded.get_elevation(34.63, 138.13) == 5.25
+    assert gsi_server.requests[(34.63, 138.13)] == 1
+
+
+def test_fallback_provider_asks_later_providers_only_for_missing_points():
+    first = FixedProvider({(1.0, 1.0): 10.0, (3.0, 3.0): 30.0})
+    second = FixedProvider({(1.0, 1.0): -1.0, (2.0, 2.0): 20.0})
+    third = FixedProvider({(4.0, 4.0): 40.0})
+    provider = FallbackElevationProvider(first, second, third)
+
+    elevations = provider.get_elevations([1.0, 2.0, 3.0, 4.0, 5.0], [1.0, 2.0, 3.0, 4.0, 5.0])
+
+    # 前の取得元の値が優先され、次の取得元には残りの地点だけを順に問い合わせる
+    np.testing.assert_allclose(elevations, [10.0, 20.0, 30.0, 40.0, np.nan])
+    assert first.calls == [[(1.0, 1.0), (2.0, 2.0), (3.0, 3.0), (4.0, 4.0), (5.0, 5.0)]]
+    assert second.calls == [[(2.0, 2.0), (4.0, 4.0), (5.0, 5.0)]]
+    assert third.calls == [[(4.0, 4.0), (5.0, 5.0)]]
+
+
+def test_fallback_provider_stops_when_all_points_are_found():
+    first = FixedProvider({(1.0, 1.0): 10.0})
+    second = FixedProvider({})
+    provider = FallbackElevationProvider(first, second)
+
+    assert provider.get_elevation(1.0, 1.0) == 10.0
+    assert second.calls == []
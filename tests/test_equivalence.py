@@ -0,0 +1,94 @@
+import itertools
+
+import networkx as nx
+import numpy as np
+import osmnx as ox
+import pandas as pd
+import pytest
+
+from cvrp.CVRP_BinaryStore import save_travel_time_matrix
+
+PENALTY = 100000
+
+
+def classes_of(df):
+    """ 同値類の出力を {同値類番号: 拠点IDの集合} にする """
+    return {int(k): set(group["node_id"].tolist()) for k, group in df.groupby("equivalence_class")}
+
+
+def reference_classes(matrix, node_ids, penalty_threshold=PENALTY):
+    """ 変更前の実装と同じ、上三角（i < j）の到達可能な組を辺とする無向グラフの連結成分 """
+    G = nx.Graph()
+    G.add_nodes_from(node_ids)
+    for i, j in itertools.combinations(range(len(node_ids)), 2):
+        if matrix[i][j] < penalty_threshold:
+            G.add_edge(node_ids[i], node_ids[j])
+    return {frozenset(component) for component in nx.connected_components(G)}
+
+
+def test_equivalence_classes_from_matrix(geo, tmp_path):
+    node_ids = [10, 11, 12, 13, 14, 15]
+    matrix = np.full((6, 6), float(PENALTY))
+    np.fill_diagonal(matrix, 0)
+    matrix[0, 2] = matrix[2, 4] = matrix[1, 3] = 30.0
+    matrix[5, 0] = 20.0  # 下三角（j < i）だけの到達は使わない
+    matrix_csv = tmp_path / "matrix.csv"
+    pd.DataFrame(matrix, index=node_ids, columns=node_ids).to_csv(matrix_csv)
+    matrix_bin = tmp_path / "matrix.bin"
+    save_travel_time_matrix(str(matrix_bin), matrix, node_ids, PENALTY)
+
+    from_csv = geo.analyze_equivalence_classes(str(matrix_csv), str(tmp_path / "classes_csv.csv"))
+    from_bin = geo.analyze_equivalence_classes(str(matrix_bin), str(tmp_path / "classes_bin.csv"))
+
+    # 同値類の番号は拠点IDの並びで最初に現れた順
+    assert classes_of(from_csv) == {1: {10, 12, 14}, 2: {11, 13}, 3: {15}}
+    pd.testing.assert_frame_equal(from_csv, from_bin)
+    assert from_csv["equivalence_class"].tolist() == [1, 1, 1, 2, 2, 3]
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / "classes_csv.csv", encoding="utf-8-sig"), from_csv)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_equivalence_classes_match_networkx_reference(geo, tmp_path, seed):
+    rng = np.random.default_rng(seed)
+    n = 40
+    matrix = np.where(rng.random((n, n)) < 0.03, rng.uniform(1, 100, (n, n)), float(PENALTY))
+    node_ids = rng.permutation(1000)[:n].tolist()
+    matrix_bin = tmp_path / "matrix.bin"
+    save_travel_time_matrix(str(matrix_bin), matrix, node_ids, PENALTY)
+
+    df = geo.analyze_equivalence_classes(str(matrix_bin), str(tmp_path / "classes.csv"))
+
+    assert {frozenset(nodes) for nodes in classes_of(df).values()} == reference_classes(matrix, node_ids)
+
+
+def write_one_way_network(tmp_path):
+    """
+    1 ⇄ 2 → 3（一方通行で 3 から戻れない）と、別の 4 ⇄ 5 からなるネットワーク。拠点 0〜4 を各ノードに置く
+    """
+    G = nx.MultiDiGraph(crs="epsg:4326")
+    for node in range(1, 6):
+        G.add_node(node, x=138.1 + node * 0.001, y=34.6 + (node >= 4) * 0.01)
+    for u, v in [(1, 2), (2, 1), (2, 3), (4, 5), (5, 4)]:
+        G.add_edge(u, v, length=100.0, highway="residential")
+    graphml_file = tmp_path / "network.graphml"
+    ox.save_graphml(G, filepath=graphml_file)
+    nodes_csv = tmp_path / "nodes.csv"
+    pd.DataFrame({"id": range(5), "x": [G.nodes[node]["x"] for node in range(1, 6)], "y": [G.nodes[node]["y"] for node in range(1, 6)]}) \
+        .to_csv(nodes_csv, index=False)
+    return str(graphml_file), str(nodes_csv)
+
+
+def test_equivalence_classes_from_graph_strong_and_weak(geo, tmp_path):
+    graphml_file, nodes_csv = write_one_way_network(tmp_path)
+
+    strong = geo.analyze_equivalence_classes_from_graph(graphml_file, nodes_csv, str(tmp_path / "strong.csv"), connection="strong")
+    weak = geo.analyze_equivalence_classes_from_graph(graphml_file, nodes_csv, str(tmp_path / "weak.csv"), connection="weak")
+
+    assert classes_of(strong) == {1: {0, 1}, 2: {2}, 3: {3, 4}}
+    assert classes_of(weak) == {1: {0, 1, 2}, 2: {3, 4}}
+
+    # 行列から求める同値類は強連結と弱連結の間の細かさになる
+    matrix_bin = str(tmp_path / "matrix.bin")
+    geo.calculate_travel_times(graphml_file, nodes_csv, None, None, penalty=PENALTY, output_bin=matrix_bin)
+    from_matrix = geo.analyze_equivalence_classes(matrix_bin, str(tmp_path / "matrix_classes.csv"))
+    assert classes_of(from_matrix) == {1: {0, 1, 2}, 2: {3, 4}}
@@ -0,0 +1,87 @@
+import os
+
+import networkx as nx
+import osmnx as ox
+import pytest
+from shapely.geometry import LineString
+
+from cvrp.CVRP_GraphStore import GraphSnapshot, graph_snapshot_path, load_graph
+
+
+def write_graphml(path, extra_edge=False):
+    """ osmnx と同じ型の属性（float, int, bool, 文字列, リスト, 欠損, geometry）を持つ小さなネットワークを GraphML に保存する """
+    G = nx.MultiDiGraph(crs="epsg:4326", created_with="test")
+    G.add_node(101, y=34.600, x=138.100, street_count=3, highway="traffic_signals")
+    G.add_node(102, y=34.601, x=138.101, street_count=1)
+    G.add_node(103, y=34.602, x=138.100, street_count=2, ref="A1")
+    G.add_edge(101, 102, key=0, osmid=11, highway="primary", oneway=True, reversed=False, length=141.5, maxspeed="40", name="本通り",
+               geometry=LineString([(138.100, 34.600), (138.1005, 34.6004), (138.101, 34.601)]))
+    G.add_edge(102, 103, key=0, osmid=[12, 13], highway=["residential", "tertiary"], oneway=False, reversed=True, length=150.25,
+               lanes=["1", "2"])
+    G.add_edge(103, 102, key=0, osmid=12, highway="residential", oneway=False, reversed=False, length=150.25)
+    G.add_edge(103, 102, key=1, osmid=14, highway="service", oneway=False, reversed=False, length=210.0)
+    if extra_edge:
+        G.add_edge(102, 101, key=0, osmid=15, highway="primary", oneway=False, reversed=False, length=141.5)
+    ox.save_graphml(G, filepath=path)
+    return str(path)
+
+
+def assert_same_graph(actual, expected):
+    assert list(actual.nodes) == list(expected.nodes)
+    for node, data in expected.nodes(data=True):
+        assert actual.nodes[node] == data
+        assert {key: type(value) for key, value in actual.nodes[node].items()} == {key: type(value) for key, value in data.items()}
+
+    assert list(actual.edges(keys=True)) == list(expected.edges(keys=True))
+    for u, v, k, data in expected.edges(keys=True, data=True):
+        loaded = dict(actual.edges[u, v, k])
+        geometry, loaded_geometry = data.get("geometry"), loaded.pop("geometry", None)
+        assert (geometry is None) == (loaded_geometry is None)
+        if geometry is not None:
+            assert loaded_geometry.equals(geometry)
+        data = {key: value for key, value in data.items() if key != "geometry"}
+        assert loaded == data
+        assert {key: type(value) for key, value in loaded.items()} == {key: type(value) for key, value in data.items()}
+
+
+def test_snapshot_round_trip_matches_graphml(tmp_path):
+    graphml_file = write_graphml(tmp_path / "network.graphml")
+    expected = ox.load_graphml(filepath=graphml_file)
+
+    G = load_graph(graphml_file)
+    snapshot = GraphSnapshot(graph_snapshot_path(graphml_file))
+
+    assert os.path.exists(graph_snapshot_path(graphml_file))
+    assert_same_graph(G, expected)
+    assert_same_graph(snapshot.to_networkx(), expected)
+    # float / int / bool / 文字列・リストの種類で保存される
+    kinds = {key: info["kind"] for key, info in snapshot.meta["attributes"]["edge"].items()}
+    assert kinds["length"] == "float" and kinds["oneway"] == "bool" and kinds["highway"] == "category" and kinds["osmid"] == "category"
+    assert snapshot.meta["attributes"]["node"]["street_count"]["kind"] == "int"
+    assert snapshot.edge_attribute("maxspeed").tolist() == ["40", None, None, None]
+    assert snapshot.x.tolist() == pytest.approx([138.100, 138.101, 138.100])
+
+
+def test_snapshot_is_used_until_graphml_changes(tmp_path):
+    graphml_file = write_graphml(tmp_path / "network.graphml")
+    load_graph(graphml_file)
+    snapshot_file = graph_snapshot_path(graphml_file)
+    assert GraphSnapshot(snapshot_file).source_matches(graphml_file)
+
+    # GraphML を書き換えると古いスナップショットとみなし、読み込み時に作り直す
+    write_graphml(tmp_path / "network.graphml", extra_edge=True)
+    stat = os.stat(graphml_file)
+    os.utime(graphml_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert not GraphSnapshot(snapshot_file).source_matches(graphml_file)
+
+    G = load_graph(graphml_file)
+    assert G.has_edge(102, 101)
+    assert GraphSnapshot(snapshot_file).source_matches(graphml_file)
+    assert_same_graph(load_graph(graphml_file), ox.load_graphml(filepath=graphml_file))
+
+
+def test_snapshot_without_source_is_stale(tmp_path):
+    graphml_file = write_graphml(tmp_path / "network.graphml")
+    load_graph(graphml_file)
+
+    assert not GraphSnapshot(graph_snapshot_path(graphml_file)).source_matches(str(tmp_path / "missing.graphml"))
@@ -0,0 +1,97 @@
+import gzip
+
+import pytest
+
+from cvrp.CVRP_OSM import graph_from_osm_file
+
+# 御前崎市付近の小さな道路網（緯度 0.001 度 ≒ 111 m, 経度 0.001 度 ≒ 92 m）
+#   6 ←── 5        10 ── 11（どこにもつながらない道路）
+#   ↓     ↓
+#   1 ─ 2 ─ 3 ─ 4 ─ 15（範囲外・500 m 以内）─ … ─ 14（範囲外・500 m より遠い）
+#       ¦   ¦   ¦
+#       7   8   9（歩道・service・私道）
+NODES = {
+    1: (34.6000, 138.1000), 2: (34.6000, 138.1010), 3: (34.6000, 138.1020), 4: (34.6000, 138.1030),
+    5: (34.6010, 138.1030), 6: (34.6010, 138.1000),
+    7: (34.5990, 138.1010), 8: (34.5990, 138.1020), 9: (34.5990, 138.1030),
+    10: (34.6012, 138.1015), 11: (34.6012, 138.1025),
+    14: (34.6000, 138.1300), 15: (34.6000, 138.1060),
+}
+WAYS = [
+    (101, [1, 2, 3, 4], {"highway": "residential", "name": "本通り"}),
+    (102, [4, 5], {"highway": "primary", "oneway": "-1", "maxspeed": "40"}),  # 5 → 4 の一方通行
+    (103, [5, 6, 1], {"highway": "tertiary", "oneway": "yes"}),
+    (104, [2, 7], {"highway": "footway"}),
+    (105, [3, 8], {"highway": "service"}),
+    (106, [4, 9], {"highway": "residential", "access": "private"}),
+    (107, [10, 11], {"highway": "residential"}),
+    (108, [4, 15, 14], {"highway": "secondary"}),
+]
+BBOX = (138.0995, 34.5995, 138.1035, 34.6015)
+
+
+def write_osm(path):
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', '<osm version="0.6">']
+    for node_id, (lat, lon) in NODES.items():
+        lines.append(f'  <node id="{node_id}" lat="{lat}" lon="{lon}"/>')
+    for way_id, refs, tags in WAYS:
+        lines.append(f'  <way id="{way_id}">')
+        lines.extend(f'    <nd ref="{ref}"/>' for ref in refs)
+        lines.extend(f'    <tag k="{k}" v="{v}"/>' for k, v in tags.items())
+        lines.append("  </way>")
+    lines.append("</osm>")
+    data = "\n".join(lines).encode("utf-8")
+    if str(path).endswith(".gz"):
+        with gzip.open(path, "wb") as f:
+            f.write(data)
+    else:
+        path.write_bytes(data)
+    return str(path)
+
+
+@pytest.fixture
+def osm_file(tmp_path):
+    return write_osm(tmp_path / "omaezaki.osm")
+
+
+def test_drive_filter_and_oneway(osm_file):
+    G = graph_from_osm_file(osm_file, simplify=False)
+
+    # 歩道・service・私道は除外し、どこにもつながらない道路は最大連結成分から外れる
+    assert set(G.nodes) == {1, 2, 3, 4, 5, 6, 14, 15}
+    edges = set(G.edges())
+    assert {(1, 2), (2, 1), (2, 3), (3, 2), (3, 4), (4, 3)} <= edges
+    # oneway=-1 は way の向きと逆（5 → 4）、oneway=yes は way の向き（5 → 6 → 1）だけ
+    assert (5, 4) in edges and (4, 5) not in edges
+    assert {(5, 6), (6, 1)} <= edges and (6, 5) not in edges and (1, 6) not in edges
+
+    data = G.get_edge_data(5, 4)[0]
+    assert data["oneway"] is True and data["reversed"] is False and data["maxspeed"] == "40"
+    assert G.get_edge_data(2, 1)[0]["reversed"] is True
+    assert G.get_edge_data(1, 2)[0]["length"] == pytest.approx(91.6, abs=0.5)
+
+
+def test_bbox_clipping_keeps_largest_component(osm_file):
+    G = graph_from_osm_file(osm_file, bbox=BBOX, simplify=False)
+
+    # 範囲外のノード（500 m 以内の 15 も含む）と、範囲内でもつながらない 10, 11 は残らない
+    assert set(G.nodes) == {1, 2, 3, 4, 5, 6}
+    assert G.nodes[4]["street_count"] == 3  # 範囲外の道路（4 → 15）も交差する道路として数える
+
+
+def test_simplify_and_compressed_file(tmp_path):
+    G = graph_from_osm_file(write_osm(tmp_path / "omaezaki.osm"), bbox=BBOX)
+    G_gz = graph_from_osm_file(write_osm(tmp_path / "omaezaki.osm.gz"), bbox=BBOX)
+
+    # 交差点でないノード 2, 3, 6 はまとめられ、1 ⇄ 4 のエッジの長さは元のエッジの合計になる
+    assert set(G.nodes) == {1, 4, 5}
+    assert G.get_edge_data(1, 4)[0]["length"] == pytest.approx(3 * 91.6, abs=1.5)
+    assert set(G.edges()) == {(1, 4), (4, 1), (5, 4), (5, 1)}
+    assert set(G_gz.edges(keys=True)) == set(G.edges(keys=True))
+
+
+def test_include_types(osm_file):
+    G = graph_from_osm_file(osm_file, include_types=["residential"], simplify=False)
+
+    # ox.graph_from_place の custom_filter と同じく drive の条件は使わないため、私道（4 - 9）も残る
+    assert set(G.nodes) == {1, 2, 3, 4, 9}
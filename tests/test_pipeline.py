@@ -0,0 +1,75 @@
+from cvrp.CVRP_Pipeline import Pipeline
+
+
+def copy_stage(pipeline, calls, source, output):
+    """ source の内容を大文字にして output に書き出すステージ（実行回数を calls に記録する） """
+
+    def run():
+        calls.append(output.name)
+        output.write_text(source.read_text(encoding="utf-8").upper(), encoding="utf-8")
+
+    return pipeline.add_stage("copy", run, inputs=[source], outputs=[output])
+
+
+def test_pipeline_skips_unchanged_stage_and_reruns_on_input_change(tmp_path):
+    source, output, state_file = tmp_path / "input.txt", tmp_path / "output.txt", tmp_path / "state.json"
+    source.write_text("a", encoding="utf-8")
+    calls = []
+
+    pipeline = Pipeline(str(state_file))
+    copy_stage(pipeline, calls, source, output)
+    assert pipeline.run() == {"copy": "ran"}
+
+    # 状態ファイルを読み直したパイプラインでも、入力が同じなら省略する
+    pipeline = Pipeline(str(state_file))
+    copy_stage(pipeline, calls, source, output)
+    assert pipeline.run() == {"copy": "skipped"}
+
+    source.write_text("b", encoding="utf-8")
+    assert pipeline.run() == {"copy": "ran"}
+    assert output.read_text(encoding="utf-8") == "B"
+    assert calls == ["output.txt", "output.txt"]
+
+
+def test_pipeline_reruns_when_output_is_deleted_or_renamed(tmp_path):
+    source, output, state_file = tmp_path / "input.txt", tmp_path / "output.txt", tmp_path / "state.json"
+    source.write_text("a", encoding="utf-8")
+    calls = []
+
+    pipeline = Pipeline(str(state_file))
+    copy_stage(pipeline, calls, source, output)
+    pipeline.run()
+
+    output.unlink()
+    assert pipeline.status() == {"copy": False}
+    assert pipeline.run() == {"copy": "ran"}
+
+    # 出力の名前を変えたステージは、入力と条件が同じでも新しい出力を作る
+    renamed = tmp_path / "renamed.txt"
+    pipeline = Pipeline(str(state_file))
+    copy_stage(pipeline, calls, source, renamed)
+    assert pipeline.run() == {"copy": "ran"}
+    assert renamed.read_text(encoding="utf-8") == "A"
+
+
+def test_pipeline_runs_downstream_stage_only_when_upstream_output_changes(tmp_path):
+    source, middle, final = tmp_path / "input.txt", tmp_path / "middle.txt", tmp_path / "final.txt"
+    source.write_text("a", encoding="utf-8")
+    calls = []
+
+    def build(state_file):
+        pipeline = Pipeline(str(state_file))
+        pipeline.add_stage("first", lambda: (calls.append("first"), middle.write_text(source.read_text(encoding="utf-8").strip())),
+                           inputs=[source], outputs=[middle])
+        pipeline.add_stage("second", lambda: (calls.append("second"), final.write_text(middle.read_text() * 2)),
+                           inputs=[middle], outputs=[final])
+        return pipeline
+
+    pipeline = build(tmp_path / "state.json")
+    assert pipeline.order() == ["first", "second"]
+    pipeline.run()
+
+    # 上流が実行し直しても出力が同じなら下流は省略する
+    source.write_text("a\n", encoding="utf-8")
+    assert pipeline.run() == {"first": "ran", "second": "skipped"}
+    assert calls == ["first", "second", "first"]
@@ -0,0 +1,39 @@
+import pytest
+
+from CVRP_Scenarios import CVRP_Scenarios, GA_DEFAULTS
+
+
+def normalize(**scenario):
+    return CVRP_Scenarios([{"name": "s", "elev": 0, **scenario}], output_dir="results", cache_dir="cache").scenarios[0]
+
+
+def test_ga_scenario_uses_ga_main_parameters():
+    scenario = normalize(solver="ga")
+
+    # CVRP_GA_main_v2.py と同じ条件（theta = 10）
+    assert scenario["ga"] == {"population_size": 500, "crossover_rate": 0.8, "mutation_rate": 0.1, "generations": 30000,
+                              "penalty": 1000, "theta": 10}
+    assert scenario["theta"] == 10
+
+
+def test_gurobi_scenario_uses_gurobi_main_theta():
+    scenario = normalize(solver="gurobi")
+
+    assert scenario["gurobi"] == {"theta": 0}
+    assert scenario["theta"] == 0
+
+
+def test_scenario_overrides_solver_parameters():
+    scenario = normalize(solver="ga", theta=3, ga={"generations": 50})
+    assert scenario["ga"] == {**GA_DEFAULTS, "generations": 50, "theta": 3}
+
+    # ソルバーごとの指定がシナリオの theta より優先される
+    scenario = normalize(solver="gurobi", theta=3, gurobi={"theta": 5})
+    assert scenario["gurobi"]["theta"] == 5
+    assert scenario["theta"] == 5
+    assert GA_DEFAULTS["theta"] == 10
+
+
+def test_unknown_solver_is_rejected():
+    with pytest.raises(ValueError):
+        normalize(solver="cplex")
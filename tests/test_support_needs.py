@@ -0,0 +1,58 @@
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+from shapely.geometry import box
+
+from cvrp.CVRP_Elevation import ElevationProvider
+
+
+class SlopeProvider(ElevationProvider):
+    """ 北に行くほど高くなる標高（API・DEM を使わずに決まった値を返す） """
+
+    def get_elevations(self, lats, lons):
+        return np.round((np.asarray(lats, dtype=float) - 34.60) * 1000, 2)
+
+
+def prepare(geo):
+    """ 2地区と避難所2か所（うち1つは市役所）を設定する """
+    geo.gdf = gpd.GeoDataFrame({"S_NAME": ["北地区", "南地区"], "SUPPORT_NEEDS": [6, 4]},
+                               geometry=[box(138.10, 34.61, 138.12, 34.63), box(138.10, 34.60, 138.12, 34.61)], crs="EPSG:4326")
+    geo.center_lat, geo.center_lon = 34.615, 138.11
+    geo.shelters_df = pd.DataFrame({"名称": ["市役所", "公民館"], "想定収容人数": [0, 100], "緯度": [34.615, 34.62], "経度": [138.11, 138.115],
+                                    "備考": ["市役所", ""]})
+    geo.build_shelter_index()
+
+
+def assign(geo, tmp_path, name, seed):
+    output_csv = tmp_path / f"{name}.csv"
+    geo.assign_random_support_needs(str(output_csv), str(tmp_path / f"{name}.html"), min_distance_m=50, min_elevation_m=5.0,
+                                    elevation_provider=SlopeProvider(), seed=seed)
+    return pd.read_csv(output_csv)
+
+
+def test_same_seed_gives_identical_clients(geo, tmp_path):
+    prepare(geo)
+
+    first = assign(geo, tmp_path, "first", seed=0)
+    second = assign(geo, tmp_path, "second", seed=0)
+    other = assign(geo, tmp_path, "other", seed=1)
+
+    pd.testing.assert_frame_equal(first, second)
+    assert (tmp_path / "first.csv").read_bytes() == (tmp_path / "second.csv").read_bytes()
+    clients = first[first["type"] == "client"]
+    assert not clients[["x", "y", "demand", "priority"]].equals(other[other["type"] == "client"][["x", "y", "demand", "priority"]])
+
+
+def test_clients_satisfy_constraints(geo, tmp_path):
+    prepare(geo)
+
+    nodes = assign(geo, tmp_path, "nodes", seed=0)
+
+    assert list(nodes["type"][:2]) == ["city_hall", "shelter"]
+    clients = nodes[nodes["type"] == "client"]
+    assert len(clients) == 10
+    assert (clients["z"] >= 5.0).all()
+    assert set(clients["demand"]) <= {1, 2}
+    assert set(clients["priority"].astype(int)) <= {1, 2, 3, 4, 5}
+    distances, _ = geo.nearest_shelter(clients["y"].values, clients["x"].values)
+    assert (distances >= 50).all()
@@ -0,0 +1,180 @@
+import os
+
+import networkx as nx
+import numpy as np
+import osmnx as ox
+import pandas as pd
+import pytest
+
+from conftest import GEOGRAPHY_DIR
+from cvrp.CVRP_GraphStore import load_graph
+from cvrp.CVRP_RouteStore import RouteStore
+
+PENALTY = 100000
+
+
+def small_graph():
+    """
+    平行エッジ・重み0のエッジ・到達できないノードを含む小さなネットワーク
+        1 ⇄ 2（1→2 は平行エッジ 10 秒と 4 秒）, 2 → 3（0 秒）, 3 → 4（一方通行 5 秒）, 4 → 1（7 秒）, 5 は孤立
+    """
+    G = nx.MultiDiGraph()
+    G.add_nodes_from([1, 2, 3, 4, 5])
+    G.add_edge(1, 2, weight=10.0)
+    G.add_edge(1, 2, weight=4.0)
+    G.add_edge(2, 1, weight=6.0)
+    G.add_edge(2, 3, weight=0.0)
+    G.add_edge(3, 4, weight=5.0)
+    G.add_edge(4, 1, weight=7.0)
+    return G
+
+
+def test_graph_to_csr_keeps_minimum_parallel_edge_and_zero_weight(geo):
+    graph_node_list, node_index, csr = geo.graph_to_csr(small_graph())
+
+    assert graph_node_list == [1, 2, 3, 4, 5]
+    assert csr.nnz == 5
+    assert csr[node_index[1], node_index[2]] == 4.0
+    # 重み0のエッジも辺として残る（疎行列の暗黙の0と区別される）
+    row = node_index[2]
+    assert node_index[3] in csr.indices[csr.indptr[row]:csr.indptr[row + 1]]
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_csr_matches_networkx_on_small_graph(geo, n_jobs):
+    G = small_graph()
+    graph_nodes = [1, 2, 3, 4, 5, 3]  # 同じノードにスナップした拠点を含む
+
+    expected = np.array([
+        [0, 4, 4, 9, PENALTY, 4],
+        [6, 0, 0, 5, PENALTY, 0],
+        [12, 16, 0, 5, PENALTY, 0],
+        [7, 11, 11, 0, PENALTY, 11],
+        [PENALTY, PENALTY, PENALTY, PENALTY, 0, PENALTY],
+        [12, 16, 0, 5, PENALTY, 0],
+    ], dtype=float)
+    reference = geo._travel_time_matrix_networkx(G, graph_nodes, PENALTY)
+    candidate = geo._travel_time_matrix_csr(G, graph_nodes, PENALTY, n_jobs=n_jobs)
+
+    np.testing.assert_allclose(reference, expected)
+    np.testing.assert_allclose(candidate, expected)
+
+
+def test_csr_matches_networkx_on_omaezaki_graph(geo):
+    graphml_file = os.path.join(GEOGRAPHY_DIR, "omaezaki_≤0melev.graphml")
+    if not os.path.exists(graphml_file):
+        pytest.skip(f"{graphml_file} がありません（1.Geography で CVRP_Geography_v7.py を実行すると作成されます）")
+
+    G = load_graph(graphml_file)
+    geo.add_travel_time_weights(G)
+    snapped_csv = os.path.join(GEOGRAPHY_DIR, "omaezaki_≤0melev_snapped_nodes.csv")
+    graph_nodes = geo.snap_nodes_to_graph(graphml_file, os.path.join(GEOGRAPHY_DIR, "omaezaki_nodes.csv"), G=G,
+                                          snapped_csv=snapped_csv)["graph_node"].tolist()
+
+    reference = geo._travel_time_matrix_networkx(G, graph_nodes, PENALTY)
+    candidate = geo._travel_time_matrix_csr(G, graph_nodes, PENALTY)
+
+    assert np.allclose(candidate, reference)
+
+
+def write_small_network(tmp_path):
+    """
+    small_graph を GraphML と拠点CSVとして保存する（maxspeed 36 km/h = 10 m/s なので length は重みの10倍）
+    拠点は各ノードの座標に置く
+    """
+    G = small_graph()
+    G.graph["crs"] = "epsg:4326"
+    for node in G.nodes:
+        G.nodes[node].update(x=138.1 + node * 0.001, y=34.6 + node * 0.001)
+    for _, _, data in G.edges(data=True):
+        data.update(length=data.pop("weight") * 10, maxspeed="36", highway="residential")
+    graphml_file = tmp_path / "small.graphml"
+    ox.save_graphml(G, filepath=graphml_file)
+
+    nodes_csv = tmp_path / "nodes.csv"
+    pd.DataFrame({"id": range(5), "x": [G.nodes[node]["x"] for node in G.nodes], "y": [G.nodes[node]["y"] for node in G.nodes]}) \
+        .to_csv(nodes_csv, index=False)
+    return str(graphml_file), str(nodes_csv)
+
+
+def test_calculate_travel_times_writes_matrix_and_csv(geo, tmp_path):
+    graphml_file, nodes_csv = write_small_network(tmp_path)
+    output_csv, output_matrix_csv = tmp_path / "travel_time.csv", tmp_path / "travel_time_matrix.csv"
+
+    matrix = geo.calculate_travel_times(graphml_file, nodes_csv, str(output_csv), str(output_matrix_csv), penalty=PENALTY,
+                                        output_bin=str(tmp_path / "matrix.bin"))
+
+    assert matrix[0, 1] == pytest.approx(4.0)
+    assert matrix[3, 0] == pytest.approx(7.0)
+    assert matrix[0, 4] == PENALTY
+    assert len(pd.read_csv(output_csv)) == 25
+    assert pd.read_csv(output_matrix_csv, index_col=0).shape == (5, 5)
+
+
+def test_calculate_travel_times_raises_on_missing_graph(geo, tmp_path):
+    _, nodes_csv = write_small_network(tmp_path)
+
+    with pytest.raises(FileNotFoundError):
+        geo.calculate_travel_times(str(tmp_path / "missing.graphml"), nodes_csv, None, None)
+
+
+def test_calculate_travel_times2_returns_route_list(geo, tmp_path):
+    graphml_file, nodes_csv = write_small_network(tmp_path)
+    output_routes = tmp_path / "routes.bin"
+
+    routes = geo.calculate_travel_times2(graphml_file, nodes_csv, str(tmp_path / "travel_time.csv"), str(tmp_path / "travel_time_matrix.csv"),
+                                         output_routes=str(output_routes))
+
+    # 拠点 i < j の組のうちルートのあるもの（拠点4 = ノード5 は孤立）。ルートはネットワークのノードID
+    assert [(route["source_id"], route["target_id"]) for route in routes] == [(0, 1), (0, 2), (0, 3), (1, 2), (1, 3), (2, 3)]
+    assert routes[1]["route"] == [1, 2, 3]
+    assert routes[3]["route"] == [2, 3]
+    # 保存したルートは RouteStore でも読み込める
+    assert RouteStore(str(output_routes)).reconstruct_path(3, 0) == [4, 1]
+
+
+def random_network(seed=0, n_nodes=30, n_edges=80):
+    """ 一方通行・平行エッジ・到達できない組を含むランダムなネットワーク（ノード 29 は孤立） """
+    rng = np.random.default_rng(seed)
+    G = nx.MultiDiGraph()
+    G.add_nodes_from(range(n_nodes))
+    for _ in range(n_edges):
+        u, v = rng.choice(n_nodes - 1, size=2, replace=False)
+        G.add_edge(int(u), int(v), weight=float(np.round(rng.uniform(0, 60), 3)))
+    return G
+
+
+@pytest.mark.parametrize("symmetric", [False, True])
+@pytest.mark.parametrize("change", ["add", "remove", "reorder", "mixed", "duplicate"])
+def test_update_travel_time_matrix_matches_full_rebuild(geo, tmp_path, symmetric, change):
+    G = random_network()
+    previous_nodes = [0, 3, 5, 8, 13, 21, 29]
+    new_nodes = {
+        "add": previous_nodes + [1, 27],
+        "remove": [0, 5, 13, 29],
+        "reorder": [21, 0, 29, 8, 3, 13, 5],
+        "mixed": [27, 13, 2, 0, 29, 14],   # 削除・追加・並べ替えを同時に行う
+        "duplicate": [3, 3, 5, 1, 1, 29],  # 同じノードにスナップした拠点（既存・追加とも）
+    }[change]
+    graph_hash = "test-graph"
+
+    previous = geo.build_travel_time_matrix(G, previous_nodes, penalty=PENALTY)
+    previous_bin = str(tmp_path / "matrix.bin")
+    geo.save_travel_time_outputs(previous, list(range(len(previous_nodes))), output_bin=previous_bin, penalty=PENALTY,
+                                 graph_hash=graph_hash, graph_nodes=previous_nodes, symmetric=symmetric)
+
+    updated = geo.update_travel_time_matrix(G, new_nodes, previous_bin, graph_hash, penalty=PENALTY)
+    expected = geo.build_travel_time_matrix(G, new_nodes, penalty=PENALTY)
+
+    assert updated.shape == expected.shape
+    np.testing.assert_allclose(updated, expected, rtol=0, atol=1e-4)  # 既存部分は float32 で保存した値
+
+
+def test_update_travel_time_matrix_rejects_other_network(geo, tmp_path):
+    G = random_network()
+    previous_bin = str(tmp_path / "matrix.bin")
+    geo.save_travel_time_outputs(geo.build_travel_time_matrix(G, [0, 1], penalty=PENALTY), [0, 1], output_bin=previous_bin,
+                                 penalty=PENALTY, graph_hash="old-graph", graph_nodes=[0, 1])
+
+    assert geo.update_travel_time_matrix(G, [0, 1, 2], previous_bin, "new-graph", penalty=PENALTY) is None
+    assert geo.update_travel_time_matrix(G, [0, 1, 2], previous_bin, "old-graph", penalty=PENALTY + 1) is None